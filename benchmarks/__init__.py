@@ -0,0 +1,12 @@
+"""
+A reproducible benchmark suite of the map loading, the search solvers and the heuristics.
+Runs each workload with fixed seeds, warmups and repetitions, writes the timings and the
+ outcome metrics as a JSON report, and compares two reports to flag regressions.
+See `python -m benchmarks --help`.
+"""
+
+from .suite import *
+from .runner import *
+from .compare import *
+
+__all__ = suite.__all__ + runner.__all__ + compare.__all__
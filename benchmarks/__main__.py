@@ -0,0 +1,103 @@
+"""
+The command line of the benchmark suite (run from the project directory).
+
+Usage:
+    python -m benchmarks run [-o report.json] [--map map.csv] [--only 'map/*' ...]
+                             [--pairs 10] [--warmups 1] [--repetitions 3] [--seed 236501]
+    python -m benchmarks list
+    python -m benchmarks compare baseline.json candidate.json [--threshold 0.1] [--statistic min]
+
+`compare` exits with status 1 if any benchmark regressed (or changed its metrics).
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+
+from framework import Consts
+from .suite import make_benchmarks
+from .runner import select_benchmarks, run_benchmarks
+from .compare import compare_reports, format_comparisons
+
+
+def _make_selected_benchmarks(args):
+    benchmarks = make_benchmarks(args.map, nr_map_pairs=args.pairs, seed=args.seed)
+    return select_benchmarks(benchmarks, args.only)
+
+
+def _run(args) -> int:
+    benchmarks = _make_selected_benchmarks(args)
+    if not benchmarks:
+        print('No benchmark matches {}.'.format(args.only), file=sys.stderr)
+        return 2
+    config = {'map': args.map, 'pairs': args.pairs, 'only': args.only}
+    # The progress (and anything the benchmarked code prints) goes to stderr, so stdout holds only the report.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(benchmarks, warmups=args.warmups, repetitions=args.repetitions,
+                                seed=args.seed, config=config)
+    report_json = json.dumps(report, indent=2)
+    if args.output is None:
+        print(report_json)
+    else:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report_json + '\n')
+    return 0
+
+
+def _list(args) -> int:
+    for benchmark in _make_selected_benchmarks(args):
+        print(benchmark.name)
+    return 0
+
+
+def _compare(args) -> int:
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.candidate) as candidate_file:
+        candidate = json.load(candidate_file)
+    if baseline['config'].get('pairs') != candidate['config'].get('pairs') or \
+            baseline['config'].get('seed') != candidate['config'].get('seed'):
+        print('Warning: the reports were made with different parameters.', file=sys.stderr)
+    comparisons = compare_reports(baseline, candidate, threshold=args.threshold, statistic=args.statistic)
+    print(format_comparisons(comparisons))
+    return 1 if any(comparison.is_failure for comparison in comparisons) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='The benchmark suite.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    def add_suite_arguments(subparser):
+        subparser.add_argument('--map', default=Consts.get_data_file_path('tlv.csv'), help='the map csv file')
+        subparser.add_argument('--only', nargs='+', metavar='PATTERN',
+                               help="run only the benchmarks whose names match (e.g., 'map/*')")
+        subparser.add_argument('--pairs', type=int, default=10, help='#random junction pairs of the map problems')
+        subparser.add_argument('--seed', type=int, default=Consts.SEED)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and write a JSON report')
+    add_suite_arguments(run_parser)
+    run_parser.add_argument('-o', '--output', help='the report file (default: stdout)')
+    run_parser.add_argument('--warmups', type=int, default=1)
+    run_parser.add_argument('--repetitions', type=int, default=3)
+    run_parser.set_defaults(handler=_run)
+
+    list_parser = subparsers.add_parser('list', help='list the benchmarks')
+    add_suite_arguments(list_parser)
+    list_parser.set_defaults(handler=_list)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two reports and flag regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='the relative slowdown that is considered a regression')
+    compare_parser.add_argument('--statistic', choices=('min', 'median', 'mean'), default='min')
+    compare_parser.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Compares two benchmark reports (a baseline and a candidate) and flags the regressions.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+__all__ = ['BenchmarkComparison', 'compare_reports', 'format_comparisons']
+
+
+class BenchmarkComparison(NamedTuple):
+    name: str
+    baseline_time: Optional[float]
+    candidate_time: Optional[float]
+    metrics_changed: bool
+    status: str  # One of: 'ok', 'faster', 'regression', 'changed', 'added', 'removed'.
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if self.baseline_time is None or self.candidate_time is None or self.baseline_time == 0:
+            return None
+        return self.candidate_time / self.baseline_time
+
+    @property
+    def is_failure(self) -> bool:
+        return self.status in ('regression', 'changed')
+
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float = 0.1,
+                    statistic: str = 'min') -> List[BenchmarkComparison]:
+    """
+    Compares the benchmarks that appear in the two reports by the given `statistic` of their times.
+    A benchmark regressed if its time grew by more than `threshold` (relatively to the baseline).
+    A benchmark changed if its metrics (e.g., the number of expanded states or the solution cost)
+     are not the same as in the baseline: it does a different work, so the timing is meaningless.
+    The minimum is the default statistic, because it is the least sensitive to noise of other processes.
+    """
+    baseline_results = baseline['benchmarks']
+    candidate_results = candidate['benchmarks']
+    comparisons = []
+    for name in list(baseline_results) + [name for name in candidate_results if name not in baseline_results]:
+        baseline_result = baseline_results.get(name)
+        candidate_result = candidate_results.get(name)
+        if candidate_result is None:
+            comparisons.append(BenchmarkComparison(name, baseline_result[statistic], None, False, 'removed'))
+            continue
+        if baseline_result is None:
+            comparisons.append(BenchmarkComparison(name, None, candidate_result[statistic], False, 'added'))
+            continue
+
+        baseline_time, candidate_time = baseline_result[statistic], candidate_result[statistic]
+        metrics_changed = baseline_result['metrics'] != candidate_result['metrics']
+        if metrics_changed:
+            status = 'changed'
+        elif candidate_time > baseline_time * (1 + threshold):
+            status = 'regression'
+        elif candidate_time < baseline_time * (1 - threshold):
+            status = 'faster'
+        else:
+            status = 'ok'
+        comparisons.append(BenchmarkComparison(name, baseline_time, candidate_time, metrics_changed, status))
+    return comparisons
+
+
+def format_comparisons(comparisons: List[BenchmarkComparison]) -> str:
+    def format_time(seconds: Optional[float]) -> str:
+        return '-' if seconds is None else '{:.4f}'.format(seconds)
+
+    lines = ['{:<40} {:>12} {:>12} {:>8}  {}'.format('benchmark', 'baseline [s]', 'candidate [s]', 'ratio', 'status')]
+    for comparison in comparisons:
+        ratio = comparison.ratio
+        lines.append('{:<40} {:>12} {:>12} {:>8}  {}'.format(
+            comparison.name, format_time(comparison.baseline_time), format_time(comparison.candidate_time),
+            '-' if ratio is None else '{:.2f}x'.format(ratio), comparison.status.upper()))
+    return '\n'.join(lines)
@@ -0,0 +1,108 @@
+"""
+Runs the benchmarks and produces a JSON-serializable report of the timings and the metrics.
+"""
+
+import fnmatch
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from framework import Consts
+from .suite import Benchmark
+
+__all__ = ['REPORT_FORMAT_VERSION', 'select_benchmarks', 'run_benchmarks']
+
+REPORT_FORMAT_VERSION = 1
+
+
+def select_benchmarks(benchmarks: Sequence[Benchmark], patterns: Optional[Sequence[str]]) -> List[Benchmark]:
+    """Filters the benchmarks by shell-style patterns of their names (e.g., `map/*`)."""
+    if not patterns:
+        return list(benchmarks)
+    return [benchmark for benchmark in benchmarks
+            if any(fnmatch.fnmatchcase(benchmark.name, pattern) for pattern in patterns)]
+
+
+def _seed_all(seed: int):
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=Consts.PROJECT_PATH, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, universal_newlines=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_revision': _git_revision(),
+    }
+
+
+def _run_benchmark(benchmark: Benchmark, warmups: int, repetitions: int, seed: int) -> Dict[str, Any]:
+    """
+    Runs the benchmark `warmups + repetitions` times (only the repetitions are recorded).
+    Each run gets its own setup, and the random generators are re-seeded before each run,
+     so all the runs do the very same work.
+    """
+    times = []
+    metrics = None
+    for run_idx in range(warmups + repetitions):
+        _seed_all(seed)
+        inputs = benchmark.setup()
+        start = time.perf_counter()
+        run_metrics = benchmark.run(inputs)
+        elapsed = time.perf_counter() - start
+        if metrics is not None and run_metrics != metrics:
+            raise RuntimeError('The benchmark `{}` is not deterministic: {} != {}'.format(
+                benchmark.name, run_metrics, metrics))
+        metrics = run_metrics
+        if run_idx >= warmups:
+            times.append(elapsed)
+    return {
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.,
+        'metrics': metrics,
+    }
+
+
+def run_benchmarks(benchmarks: Sequence[Benchmark], warmups: int = 1, repetitions: int = 3,
+                   seed: int = Consts.SEED, config: Optional[Dict[str, Any]] = None,
+                   verbose: bool = True) -> Dict[str, Any]:
+    """
+    Runs the given benchmarks and returns the report (a JSON-serializable dict).
+    :param config: The parameters that the benchmarks were made with (stored in the report as is).
+    """
+    assert repetitions >= 1 and warmups >= 0
+    results = dict()
+    for benchmark in benchmarks:
+        result = _run_benchmark(benchmark, warmups, repetitions, seed)
+        results[benchmark.name] = result
+        if verbose:
+            print('{:<40} min: {:>9.4f}s   median: {:>9.4f}s   {}'.format(
+                benchmark.name, result['min'], result['median'], result['metrics']), file=sys.stderr)
+
+    return {
+        'format_version': REPORT_FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': _environment(),
+        'config': dict(config or {}, warmups=warmups, repetitions=repetitions, seed=seed),
+        'benchmarks': results,
+    }
@@ -0,0 +1,153 @@
+"""
+The workloads of the benchmark suite.
+Each benchmark has a `setup` step (not timed), that prepares its inputs, and a `run` step
+ (timed), that returns the metrics of its outcome (e.g., the number of expanded states and
+ the cost of the solution). The metrics are stored with the timings, so that a comparison
+ of two runs also catches a change in the behavior of a solver (not only in its speed).
+"""
+
+import random
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from framework import *
+from deliveries import *
+
+__all__ = ['Benchmark', 'make_benchmarks']
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Dict[str, Any]]
+
+
+def _solution_cost(result: SearchResult) -> Optional[float]:
+    return None if result.final_search_node is None else float(result.final_search_node.cost)
+
+
+def _search_metrics(results: List[SearchResult]) -> Dict[str, Any]:
+    costs = [_solution_cost(result) for result in results]
+    return {
+        'nr_expanded_states': sum(result.nr_expanded_states for result in results),
+        'nr_solved': sum(cost is not None for cost in costs),
+        'total_cost': round(sum(cost for cost in costs if cost is not None), 6)
+    }
+
+
+def _make_map_problems(roads: Roads, nr_pairs: int, seed: int) -> List[MapProblem]:
+    rnd = random.Random(seed)
+    junction_ids = roads.arrays.junction_ids.tolist()
+    return [MapProblem(roads, rnd.choice(junction_ids), rnd.choice(junction_ids)) for _ in range(nr_pairs)]
+
+
+def _make_loading_benchmarks(map_path: str) -> List[Benchmark]:
+    def setup_cached():
+        load_map_from_csv(map_path)  # Makes sure the binary cache exists.
+
+    def load(use_cache: bool, workers: Optional[int] = None, eager_traffic_params: bool = False) -> Dict[str, Any]:
+        roads = load_map_from_csv(map_path, use_cache=use_cache, workers=workers,
+                                  eager_traffic_params=eager_traffic_params)
+        return {'nr_junctions': len(roads), 'nr_links': int(len(roads.arrays.link_targets))}
+
+    return [
+        Benchmark('load_map/csv', lambda: None, lambda _: load(False)),
+        Benchmark('load_map/csv(1 worker)', lambda: None, lambda _: load(False, workers=1)),
+        Benchmark('load_map/cache', setup_cached, lambda _: load(True)),
+        # With the traffic parameters of all the links computed while loading (rather than on access).
+        Benchmark('load_map/csv+traffic_params', lambda: None, lambda _: load(False, eager_traffic_params=True)),
+        Benchmark('load_map/cache+traffic_params', setup_cached, lambda _: load(True, eager_traffic_params=True)),
+    ]
+
+
+def _make_map_problem_benchmarks(get_roads: Callable[[], Roads], nr_pairs: int, seed: int) -> List[Benchmark]:
+    solvers_factories = [
+        ('UniformCost', lambda: UniformCost()),
+        ('A*(Null)', lambda: AStar(NullHeuristic)),
+        ('A*(AirDist)', lambda: AStar(AirDistHeuristic)),
+        ('wA*(AirDist,0.8)', lambda: AStar(AirDistHeuristic, 0.8)),
+        ('GreedyStochastic(AirDist)', lambda: GreedyStochastic(AirDistHeuristic)),
+        ('Bidirectional(Null)', lambda: BidirectionalSearch()),
+        ('Bidirectional(AirDist)', lambda: BidirectionalSearch(AirDistHeuristic)),
+    ]
+
+    def make_benchmark(solver_name: str, solver_factory: Callable[[], GraphProblemSolver]) -> Benchmark:
+        def setup():
+            return solver_factory(), _make_map_problems(get_roads(), nr_pairs, seed)
+
+        def run(inputs) -> Dict[str, Any]:
+            solver, problems = inputs
+            return _search_metrics([solver.solve_problem(problem) for problem in problems])
+
+        return Benchmark('map/' + solver_name, setup, run)
+
+    return [make_benchmark(solver_name, solver_factory) for solver_name, solver_factory in solvers_factories]
+
+
+def _make_relaxed_deliveries_benchmarks(get_roads: Callable[[], Roads], input_file: str) -> List[Benchmark]:
+    solvers_factories = [
+        ('A*(MaxAirDist)', lambda: AStar(MaxAirDistHeuristic)),
+        ('A*(MSTAirDist)', lambda: AStar(MSTAirDistHeuristic)),
+        ('GreedyStochastic(MSTAirDist)', lambda: GreedyStochastic(MSTAirDistHeuristic)),
+    ]
+
+    def make_benchmark(solver_name: str, solver_factory: Callable[[], GraphProblemSolver]) -> Benchmark:
+        def setup():
+            # A new problem per run, so that no run benefits from the caches filled by a former run.
+            problem_input = DeliveriesProblemInput.load_from_file(input_file, get_roads())
+            return solver_factory(), RelaxedDeliveriesProblem(problem_input)
+
+        def run(inputs) -> Dict[str, Any]:
+            solver, problem = inputs
+            return _search_metrics([solver.solve_problem(problem)])
+
+        return Benchmark('relaxed/' + solver_name, setup, run)
+
+    return [make_benchmark(solver_name, solver_factory) for solver_name, solver_factory in solvers_factories]
+
+
+def _make_strict_deliveries_benchmarks(get_roads: Callable[[], Roads], input_file: str) -> List[Benchmark]:
+    solvers_factories = [
+        ('A*(MSTAirDist)', lambda: AStar(MSTAirDistHeuristic)),
+        ('A*(RelaxedDeliveries)', lambda: AStar(RelaxedDeliveriesHeuristic)),
+    ]
+
+    def make_benchmark(solver_name: str, solver_factory: Callable[[], GraphProblemSolver]) -> Benchmark:
+        def setup():
+            # The road distances between the stop points are found (by the inner solver) during the
+            #  run, so they are a part of the measured time.
+            roads = get_roads()
+            problem_input = DeliveriesProblemInput.load_from_file(input_file, roads)
+            problem = StrictDeliveriesProblem(problem_input, roads, inner_problem_solver=AStar(AirDistHeuristic))
+            return solver_factory(), problem
+
+        def run(inputs) -> Dict[str, Any]:
+            solver, problem = inputs
+            return _search_metrics([solver.solve_problem(problem)])
+
+        return Benchmark('strict/' + solver_name, setup, run)
+
+    return [make_benchmark(solver_name, solver_factory) for solver_name, solver_factory in solvers_factories]
+
+
+def make_benchmarks(map_path: str, nr_map_pairs: int = 10, seed: int = Consts.SEED,
+                    relaxed_input_file: str = 'big_delivery.in',
+                    strict_input_file: str = 'small_delivery.in') -> List[Benchmark]:
+    """
+    Creates the benchmarks of the suite:
+        `load_map/*`: loading the map, from the csv file and from its binary cache.
+        `map/*`: solving `MapProblem`s between `nr_map_pairs` random pairs of junctions, with each solver.
+        `relaxed/*`: solving the relaxed deliveries problem of `relaxed_input_file`, with each heuristic.
+        `strict/*`: solving the strict deliveries problem of `strict_input_file`, with each heuristic.
+    The map is loaded (once) only by the setup of the first benchmark that needs it.
+    """
+    loaded_roads = []
+
+    def get_roads() -> Roads:
+        if not loaded_roads:
+            loaded_roads.append(load_map_from_csv(map_path))
+        return loaded_roads[0]
+
+    return _make_loading_benchmarks(map_path) + \
+        _make_map_problem_benchmarks(get_roads, nr_map_pairs, seed) + \
+        _make_relaxed_deliveries_benchmarks(get_roads, relaxed_input_file) + \
+        _make_strict_deliveries_benchmarks(get_roads, strict_input_file)
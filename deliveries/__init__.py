@@ -1,14 +1,15 @@
 from .deliveries_problem_input import DeliveriesProblemInput
-from .map_heuristics import AirDistHeuristic
-from .map_problem import MapState, MapProblem
+from .map_heuristics import AirDistHeuristic, ALTHeuristic
+from .map_problem import MapState, MapProblem, MultiTargetMapProblem
+from .map_solvers import ContractionHierarchiesSolver
 from .relaxed_deliveries_problem import RelaxedDeliveriesState, RelaxedDeliveriesProblem
 from .strict_deliveries_problem import StrictDeliveriesState, StrictDeliveriesProblem
 from .deliveries_heuristics import MaxAirDistHeuristic, MSTAirDistHeuristic, RelaxedDeliveriesHeuristic
 
 __all__ = [
     'DeliveriesProblemInput',
-    'AirDistHeuristic',
-    'MapState', 'MapProblem',
+    'AirDistHeuristic', 'ALTHeuristic',
+    'MapState', 'MapProblem', 'MultiTargetMapProblem', 'ContractionHierarchiesSolver',
     'RelaxedDeliveriesState', 'RelaxedDeliveriesProblem', 'StrictDeliveriesState', 'StrictDeliveriesProblem',
     'MaxAirDistHeuristic', 'MSTAirDistHeuristic', 'RelaxedDeliveriesHeuristic'
 ]
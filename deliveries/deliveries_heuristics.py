@@ -1,12 +1,13 @@
 from framework.graph_search import *
 from .relaxed_deliveries_problem import RelaxedDeliveriesState, RelaxedDeliveriesProblem
 from .strict_deliveries_problem import StrictDeliveriesState, StrictDeliveriesProblem
-from .deliveries_problem_input import DeliveriesProblemInput
 from framework.ways import *
+from framework.ways import tools
 
+import math
 import numpy as np
-from scipy.sparse.csgraph import minimum_spanning_tree as mst
-from typing import Set, Dict, FrozenSet
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional
 
 
 class MaxAirDistHeuristic(HeuristicFunction):
@@ -21,12 +22,8 @@ class MaxAirDistHeuristic(HeuristicFunction):
         assert isinstance(state, RelaxedDeliveriesState)
         if self.problem.is_goal(state):
             return 0
-        max_dist=0
-        drop_points_left = self.problem.drop_points.difference(state.dropped_so_far)
-        for destination in drop_points_left:
-            if destination.calc_air_distance_from(state.current_location)> max_dist:
-                max_dist=destination.calc_air_distance_from(state.current_location)
-        return max_dist
+        distances = self.problem.locations_air_distances[state.location_idx]
+        return max(distances[self.problem.remained_drop_points_indices(state)].tolist(), default=0)
 
 
 class MSTAirDistHeuristic(HeuristicFunction):
@@ -35,71 +32,110 @@ class MSTAirDistHeuristic(HeuristicFunction):
     def __init__(self, problem: GraphProblem):
         super(MSTAirDistHeuristic, self).__init__(problem)
         assert isinstance(self.problem, RelaxedDeliveriesProblem)
-        self._junctions_distances_cache: Dict[FrozenSet[Junction], float] = dict()
+        # The MST depends only on the current location and on the remaining drop points.
+        # Its weight is memoized by (current location index, bitmask of the dropped drop points).
+        # The memo is kept by the problem, so it is shared by all the searches over its locations.
+        self._mst_weights_cache: Dict[Tuple[int, int], float] = self.problem.mst_weights_cache
 
     def estimate(self, state: GraphProblemState) -> float:
         assert isinstance(self.problem, RelaxedDeliveriesProblem)
         assert isinstance(state, RelaxedDeliveriesState)
 
-        remained_drop_points = set(self.problem.drop_points - state.dropped_so_far)
-        remained_drop_points.add(state.current_location)
-        return self._calculate_junctions_air_dist_mst_weight(remained_drop_points)
-
-    def _get_distance_between_junctions(self, junction1: Junction, junction2: Junction):
-        junctions_pair = frozenset({junction1, junction2})
-        if junctions_pair in self._junctions_distances_cache:
-            return self._junctions_distances_cache[junctions_pair]
-        dist = junction1.calc_air_distance_from(junction2)
-        self._junctions_distances_cache[junctions_pair] = dist
-        return dist
-
-    def _calculate_junctions_air_dist_mst_weight(self, junctions: Set[Junction]) -> float:
-        nr_junctions = len(junctions)
-        idx_to_junction = {idx: junction for idx, junction in enumerate(junctions)}
-        distances_matrix = np.zeros((nr_junctions, nr_junctions), dtype=np.float)
-        for j1_idx in range(nr_junctions):
-            for j2_idx in range(nr_junctions):
-                if j1_idx == j2_idx:
-                    continue
-                dist = self._get_distance_between_junctions(idx_to_junction[j1_idx], idx_to_junction[j2_idx])
-                distances_matrix[j1_idx, j2_idx] = dist
-                distances_matrix[j2_idx, j1_idx] = dist
-        return mst(distances_matrix).sum()
+        key = (state.location_idx, state.dropped_mask)
+        mst_weight = self._mst_weights_cache.get(key)
+        if mst_weight is None:
+            mst_weight = self._calculate_mst_weight(state.location_idx,
+                                                    self.problem.remained_drop_points_indices(state))
+            self._mst_weights_cache[key] = mst_weight
+        return mst_weight
+
+    def _calculate_mst_weight(self, location_idx: int, drop_points_indices: List[int]) -> float:
+        """
+        The weight of the MST (by air distances) over the current location and the given drop points.
+        The current location is not counted twice if it is one of the given drop points.
+        """
+        nodes = np.array([location_idx] + drop_points_indices, dtype=np.intp)
+        total_weight, _ = tools.prim_mst(self.problem.locations_air_distances[np.ix_(nodes, nodes)])
+        return total_weight
 
 
 class RelaxedDeliveriesHeuristic(HeuristicFunction):
+    """
+    Estimates the cost of a strict deliveries state by the cost of the optimal solution of
+     the relaxed deliveries problem from that state (solved by A* with the MST heuristic).
+
+    The inner problems share the locations and the distances tables of the strict problem
+     (see `RelaxedDeliveriesProblem.make_relaxed_subproblem()`), and so does the memo of the
+     MST heuristic.
+    The estimations are cached (with LRU eviction) by (location, dropped drop points, fuel).
+    Solvers receive the heuristic type, so use `configured()` to set the parameters of the cache:
+    >>> AStar(RelaxedDeliveriesHeuristic.configured(fuel_bucket_size=100, max_inner_expansions=50))
+    """
+
     heuristic_name = 'RelaxedProb'
 
+    def __init__(self, problem: GraphProblem, cache_size: int = 100000,
+                 fuel_bucket_size: Optional[float] = None, max_inner_expansions: Optional[int] = None):
+        """
+        :param cache_size: The maximal number of cached estimations.
+        :param fuel_bucket_size: If set, the fuel is rounded *up* to a multiple of this size before
+                                 solving the inner problem, so that states with close fuel amounts share
+                                 a cached estimation. The estimation stays admissible, as more fuel never
+                                 makes the relaxed problem more expensive. Otherwise, the fuel is keyed
+                                 exactly (by `fuel_as_int`).
+        :param max_inner_expansions: If set, the inner search is stopped after this many expansions, and
+                                     the smallest f-score in its open queue is returned instead. It is a lower
+                                     bound of the relaxed cost (the MST heuristic is admissible), and it is at
+                                     least as large as the MST heuristic of the state.
+        """
+        super(RelaxedDeliveriesHeuristic, self).__init__(problem)
+        assert isinstance(self.problem, StrictDeliveriesProblem)
+        self.cache_size = cache_size
+        self.fuel_bucket_size = fuel_bucket_size
+        self._estimations_cache: 'OrderedDict[Tuple[int, int, int], float]' = OrderedDict()
+        self.nr_cache_hits = 0
+        self.nr_cache_misses = 0
+        self._inner_solver = AStar(MSTAirDistHeuristic)
+        self._inner_solver.budget = SearchBudget(max_expansions=max_inner_expansions)
+
     def estimate(self, state: GraphProblemState) -> float:
         """
         Solve the appropriate relaxed problem in order to
          evaluate the distance to the goal.
-        TODO: implement this method!
         """
-
         assert isinstance(self.problem, StrictDeliveriesProblem)
         assert isinstance(state, StrictDeliveriesState)
         if self.problem.is_goal(state):
             return 0
-        sub_prob_drop_pnts = set()
-        sub_prob_drop_pnts = sub_prob_drop_pnts.union(self.problem.drop_points-state.dropped_so_far)-{state.current_location}
-        #sub_prob_drop_pnts -= state.dropped_so_far
-        reduced_in = DeliveriesProblemInput('relaxed_reduced',state.current_location,
-                                            sub_prob_drop_pnts.copy(),
-                                            self.problem.gas_stations, self.problem.gas_tank_capacity, state.fuel)
-        relaxed_problem = RelaxedDeliveriesProblem(reduced_in)
-        # print('solving inner problem for init junction: ', state.current_location.index, 'dropping points:')
-        # for junction in relaxed_problem.drop_points:
-        #     print(junction.index)
-        # print('dropped so far:')
-        # for junction in state.dropped_so_far:
-        #     print(junction.index)
-        # print('fuel: ', state.fuel)
-        assert relaxed_problem.initial_state is not None
-        assert relaxed_problem.initial_state.current_location == state.current_location
-        astar_Mst = AStar(MSTAirDistHeuristic)
-        res = astar_Mst.solve_problem(relaxed_problem)
-        if res.final_search_node is None:
-            return np.inf
+
+        if self.fuel_bucket_size is None:
+            fuel, fuel_key = state.fuel, state.fuel_as_int
         else:
+            fuel_key = math.ceil(state.fuel / self.fuel_bucket_size)
+            fuel = fuel_key * self.fuel_bucket_size
+        key = (state.location_idx, state.dropped_mask, fuel_key)
+        estimation = self._estimations_cache.get(key)
+        if estimation is not None:
+            self.nr_cache_hits += 1
+            self._estimations_cache.move_to_end(key)
+            return estimation
+
+        self.nr_cache_misses += 1
+        estimation = self._solve_relaxed_problem(state, fuel)
+        self._estimations_cache[key] = estimation
+        if len(self._estimations_cache) > self.cache_size:
+            self._estimations_cache.popitem(last=False)
+        return estimation
+
+    def _solve_relaxed_problem(self, state: StrictDeliveriesState, fuel: float) -> float:
+        relaxed_problem = self.problem.make_relaxed_subproblem(state, fuel)
+        assert relaxed_problem.initial_state.current_location == state.current_location
+        res = self._inner_solver.solve_problem(relaxed_problem)
+        if res.final_search_node is not None:
             return res.final_search_node.cost
+        if res.termination_reason is TerminationReason.MAX_EXPANSIONS and not self._inner_solver.open.is_empty():
+            # The smallest f-score (g + h) in open is a lower bound of the optimal cost, as the MST heuristic
+            #  is admissible. The priority of a node is (g + h) / 2.
+            return 2 * self._inner_solver.open.peek_next_node().expanding_priority
+        return np.inf
+
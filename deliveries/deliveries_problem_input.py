@@ -1,8 +1,10 @@
-from framework.ways import Junction, Roads
+from framework.ways import Junction, Roads, tools
 from framework import Consts
 
-from typing import FrozenSet, NamedTuple, List
+from typing import FrozenSet, NamedTuple, List, Optional
+import numpy as np
 import os
+import random
 
 
 class DeliveriesProblemInput(NamedTuple):
@@ -42,6 +44,43 @@ class DeliveriesProblemInput(NamedTuple):
                 raise ValueError('Invalid input file `{}`.'.format(input_file_name))
         return DeliveriesProblemInput(input_name, start_point, drop_points, gas_stations, gas_tank_capacity, gas_tank_init_fuel)
 
+    @staticmethod
+    def make_random(roads: Roads, input_name: str, nr_drop_points: int, nr_gas_stations: int,
+                    seed: int = Consts.SEED, gas_tank_capacity: Optional[float] = None) -> 'DeliveriesProblemInput':
+        """
+        Makes a random deliveries-problem-input over the given map (e.g., a synthetic map,
+         see `framework.ways.map_generator`). The start point, the drop points and the gas stations
+         are distinct random junctions. The tank is initially full.
+        Unless given, the gas tank capacity is twice the longest (air) distance that has to be driven
+         without refueling: between two gas stations (along the minimum spanning tree of the gas
+         stations), or from a stop point to its nearest gas station and back. Hence, the problem
+         is likely (but not guaranteed) to be solvable.
+        """
+        rnd = random.Random(seed)
+        positions = rnd.sample(range(len(roads)), 1 + nr_drop_points + nr_gas_stations)
+        junction_ids = roads.arrays.junction_ids[positions].tolist()
+        start_point_id = junction_ids[0]
+        drop_point_ids = junction_ids[1:1 + nr_drop_points]
+        gas_station_ids = junction_ids[1 + nr_drop_points:]
+
+        if gas_tank_capacity is None:
+            if gas_station_ids:
+                # The longest edge of the minimum spanning tree of the gas stations.
+                _, longest_tree_edge = tools.prim_mst(roads.air_distances_matrix(gas_station_ids, gas_station_ids))
+                stop_point_ids = [start_point_id] + drop_point_ids
+                farthest_from_gas = float(roads.air_distances_matrix(stop_point_ids, gas_station_ids).min(axis=1).max())
+                longest_drive = max(longest_tree_edge, 2 * farthest_from_gas)
+            else:
+                # No refueling at all: enough fuel to visit the stop points one after the other, in any order.
+                stop_point_ids = [start_point_id] + drop_point_ids
+                longest_drive = float(roads.air_distances_matrix(stop_point_ids, stop_point_ids).max()) * len(drop_point_ids)
+            gas_tank_capacity = float(np.ceil(2 * longest_drive))
+
+        return DeliveriesProblemInput(input_name, roads[start_point_id],
+                                      frozenset(roads[junction_id] for junction_id in drop_point_ids),
+                                      frozenset(roads[junction_id] for junction_id in gas_station_ids),
+                                      gas_tank_capacity, gas_tank_capacity)
+
     def store_to_file(self, input_file_name: str):
         with open(Consts.get_data_file_path(input_file_name), 'w') as input_file:
             lines = [
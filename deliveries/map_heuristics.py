@@ -1,10 +1,18 @@
 from framework.graph_search import *
-from .map_problem import MapProblem, MapState
+from framework.ways import tools
+from .map_problem import BaseMapProblem, MapState, MultiTargetMapProblem
 
 
 class AirDistHeuristic(HeuristicFunction):
     heuristic_name = 'AirDist'
 
+    def __init__(self, problem: GraphProblem):
+        super(AirDistHeuristic, self).__init__(problem)
+        if isinstance(problem, MultiTargetMapProblem):
+            terms = problem.roads.geodesic_terms
+            self._targets_geodesic_terms = [terms.point(problem.roads.position_of(target_junction_id))
+                                            for target_junction_id in problem.target_junction_ids]
+
     def estimate(self, state: GraphProblemState) -> float:
         """
         The air distance between the geographic location represented
@@ -17,29 +25,52 @@ class AirDistHeuristic(HeuristicFunction):
         Use the method `calc_air_distance_from()` to calculate the
         air distance between two junctions.
         """
-        assert isinstance(self.problem, MapProblem)
+        assert isinstance(self.problem, BaseMapProblem)
         assert isinstance(state, MapState)
+        if isinstance(self.problem, MultiTargetMapProblem):
+            # The distance to the closest target, which is a lower bound for the distance to each of them.
+            state_terms = self.problem.roads.geodesic_terms.point(self.problem.roads.position_of(state.junction_id))
+            return min(tools.compute_distance_from_terms(state_terms, target_terms)
+                       for target_terms in self._targets_geodesic_terms)
         if self.problem.target_junction_id== state.junction_id:
             return 0
         else:
-            return self.problem.roads[state.junction_id].\
-                        calc_air_distance_from(self.problem.roads[self.problem.target_junction_id])
+            return self.problem.roads.air_distance(state.junction_id, self.problem.target_junction_id)
 
 
 
-        """
-        
-        for multiple targets
-        estimation = 0
-        valid = False
-        for id,junction in self.problem.roads.items():
-            if self.problem.target_junction_id== id:
-                if valid==False or estimation > self.problem.road[state.junction_id].\
-                        calc_air_distance_from(junction):
-                    estimation=self.problem.road[state.junction_id].\
-                        calc_air_distance_from(junction)
-                    valid= True
-        assert valid == True
-        return estimation
-        """
 
+class ALTHeuristic(AirDistHeuristic):
+    """
+    The ALT (A*, Landmarks, Triangle inequality) heuristic: the road distances between a few landmarks
+     and all the junctions are precomputed (see `framework/ways/landmarks.py`), and the estimate is the
+     best triangle-inequality bound over the landmarks (and at least the air distance).
+    The landmark table of the map is computed once, and is stored next to the map's csv file.
+    Use `ALTHeuristic.with_landmarks()` (see `configured()`) for another number of landmarks or selection strategy.
+    """
+
+    heuristic_name = 'ALT'
+
+    @classmethod
+    def with_landmarks(cls, nr_landmarks: int, strategy: str = 'avoid') -> HeuristicFunctionType:
+        """Returns an `ALTHeuristic` type that uses the given number of landmarks, selected by the given strategy."""
+        heuristic_type = cls.configured(nr_landmarks=nr_landmarks, strategy=strategy)
+        heuristic_type.heuristic_name = '{}({}, {})'.format(cls.heuristic_name, strategy, nr_landmarks)
+        return heuristic_type
+
+    def __init__(self, problem: GraphProblem, nr_landmarks: int = 16, strategy: str = 'avoid'):
+        super(ALTHeuristic, self).__init__(problem)
+        assert isinstance(problem, BaseMapProblem)
+        roads = problem.roads
+        self._landmarks_table = roads.landmarks_table(nr_landmarks, strategy)
+        target_junction_ids = problem.target_junction_ids if isinstance(problem, MultiTargetMapProblem) \
+            else [problem.target_junction_id]
+        self._targets_positions = [roads.position_of(target_junction_id) for target_junction_id in target_junction_ids]
+
+    def estimate(self, state: GraphProblemState) -> float:
+        assert isinstance(state, MapState)
+        position = self.problem.roads.position_of(state.junction_id)
+        # With several targets, the distance to the closest target is bounded by the smallest of the bounds.
+        landmarks_bound = min(self._landmarks_table.lower_bound(position, target_position)
+                              for target_position in self._targets_positions)
+        return max(landmarks_bound, super(ALTHeuristic, self).estimate(state))
@@ -1,7 +1,7 @@
 from framework.graph_search import *
 from framework.ways import *
 
-from typing import Iterator, Tuple
+from typing import Iterator, Tuple, Iterable, FrozenSet
 
 
 class MapState(GraphProblemState):
@@ -24,21 +24,18 @@ class MapState(GraphProblemState):
         return str(self.junction_id).rjust(5, ' ')
 
 
-class MapProblem(GraphProblem):
+class BaseMapProblem(GraphProblem):
     """
-    Represents a problem on the geographic map.
-    The problem is defined by a source location on the map and a destination.
+    The common part of the problems on the geographic map: the states are the junctions of the map,
+     and the operators are its roads (whose cost is their air distance).
+    The goal is defined by the inheritor (see `MapProblem` and `MultiTargetMapProblem`).
     """
 
-    name = 'Map'
-
-    def __init__(self, roads: Roads, source_junction_id: int, target_junction_id: int):
+    def __init__(self, roads: Roads, source_junction_id: int):
         initial_state = MapState(source_junction_id)
-        super(MapProblem, self).__init__(initial_state)
+        super(BaseMapProblem, self).__init__(initial_state)
         self.roads = roads
-        self.target_junction_id = target_junction_id
-        self.name += '(src: {} dst: {})'.format(source_junction_id, target_junction_id)
-    
+
     def expand_state_with_costs(self, state_to_expand: GraphProblemState) -> Iterator[Tuple[GraphProblemState, float]]:
         """
         For a given state, iterates over its successor states.
@@ -49,24 +46,53 @@ class MapProblem(GraphProblem):
         # All of the states in this problem are instances of the class `MapState`.
         assert isinstance(state_to_expand, MapState)
 
-        # Get the junction (in the map) that is represented by the state to expand.
-        junction = self.roads[state_to_expand.junction_id]
-
         # Iterate over the outgoing roads of the current junction.
-        for link in junction.links:
+        # We read the targets of the links directly from the map arrays rather than creating
+        #  `Link` objects. The air distance of each link is computed once for the whole map.
+        for successor_junction_id, operator_cost in self.roads.successors_with_air_distances(state_to_expand.junction_id):
             # Create the successor state (it should be an instance of class `MapState`).
-            successor_state = MapState(link.target)
-
-            # TODO: calculate the distance between `junction` and the successor's junction.
+            successor_state = MapState(successor_junction_id)
 
-
-            # Use the method `calc_air_distance_from()` of class `Junction` to measure this distance.
+            # The operator cost is the air distance between the junctions (same as `calc_air_distance_from()`).
             # Do NOT use `link.distance` here.
-            operator_cost = junction.calc_air_distance_from(self.roads[successor_state.junction_id])  # TODO: modify this! done
 
             # Yield the successor state and the cost of the operator we used to get this successor.
             yield successor_state, operator_cost
 
+
+class MapProblem(BaseMapProblem, BidirectionalGraphProblem):
+    """
+    Represents a problem on the geographic map.
+    The problem is defined by a source location on the map and a destination.
+    It can be searched backward from the destination as well (see `BidirectionalSearch`).
+    """
+
+    name = 'Map'
+
+    def __init__(self, roads: Roads, source_junction_id: int, target_junction_id: int):
+        super(MapProblem, self).__init__(roads, source_junction_id)
+        self.target_junction_id = target_junction_id
+        self.name += '(src: {} dst: {})'.format(source_junction_id, target_junction_id)
+
+    @property
+    def goal_state(self) -> MapState:
+        return MapState(self.target_junction_id)
+
+    def expand_state_backward_with_costs(self, state_to_expand: GraphProblemState) \
+            -> Iterator[Tuple[GraphProblemState, float]]:
+        """
+        For a given state, iterates over its predecessor states: the junctions from
+         which there exists a road that leads to the given state.
+        The operator cost is the air distance of the road, as in `expand_state_with_costs()`.
+        """
+        assert isinstance(state_to_expand, MapState)
+        for predecessor_junction_id, operator_cost in \
+                self.roads.predecessors_with_air_distances(state_to_expand.junction_id):
+            yield MapState(predecessor_junction_id), operator_cost
+
+    def make_reversed_problem(self) -> 'MapProblem':
+        return MapProblem(self.roads, self.target_junction_id, self.initial_state.junction_id)
+
     def is_goal(self, state: GraphProblemState) -> bool:
         """
         :return: Whether a given map state represents the destination.
@@ -76,3 +102,28 @@ class MapProblem(GraphProblem):
         # TODO: modify the returned value to indicate whether `state` is a final state.
         # You may use the problem's input parameters (stored as fields of this object by the constructor).
         return state.junction_id == self.target_junction_id
+
+
+class MultiTargetMapProblem(BaseMapProblem, MultiGoalGraphProblem):
+    """
+    Represents a problem on the geographic map, with several destinations.
+    Solving it for all the goals (`solver.solve_problem_for_all_goals(problem)`) finds the
+     shortest paths from the source location to each of the destinations by a single search.
+    It has no single goal state, so unlike `MapProblem` it cannot be searched backward.
+    """
+
+    name = 'MultiTargetMap'
+
+    def __init__(self, roads: Roads, source_junction_id: int, target_junction_ids: Iterable[int]):
+        super(MultiTargetMapProblem, self).__init__(roads, source_junction_id)
+        self.target_junction_ids: Tuple[int, ...] = tuple(sorted(set(target_junction_ids)))
+        self._goal_states = frozenset(MapState(junction_id) for junction_id in self.target_junction_ids)
+        self.name += '(src: {} dst: {})'.format(source_junction_id, list(self.target_junction_ids))
+
+    @property
+    def goal_states(self) -> FrozenSet[MapState]:
+        return self._goal_states
+
+    def is_goal(self, state: GraphProblemState) -> bool:
+        assert (isinstance(state, MapState))
+        return state in self._goal_states
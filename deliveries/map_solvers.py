@@ -0,0 +1,41 @@
+from framework.graph_search import *
+from framework.graph_search.utils.timer import Timer
+from .map_problem import MapProblem, MapState
+
+
+class ContractionHierarchiesSolver(GraphProblemSolver):
+    """
+    Solves map problems by a query on the contraction hierarchy of the map (see `Roads.contraction_hierarchy()`).
+    The hierarchy is built (or loaded from next to the csv file of the map) on the first query on a map.
+    The path is unpacked to the original links, and its nodes are the nodes of the same path as
+     `UniformCost` would find: their operator costs are the air distances of the links, so the cost
+     of the solution is the same. The number of expanded states is the number of junctions settled
+     by the two upward searches of the query.
+    It can be used as the `inner_problem_solver` of `StrictDeliveriesProblem`.
+    """
+
+    solver_name = 'CH'
+
+    def solve_problem(self, problem: MapProblem) -> SearchResult:
+        assert isinstance(problem, MapProblem)
+        roads = problem.roads
+        with Timer(print_title=False) as timer:
+            hierarchy = roads.contraction_hierarchy()
+            shortest_path = hierarchy.shortest_path(roads.position_of(problem.initial_state.junction_id),
+                                                    roads.position_of(problem.target_junction_id))
+            final_search_node = None
+            if shortest_path.positions:
+                junction_ids = roads.arrays.junction_ids[shortest_path.positions].tolist()
+                final_search_node = SearchNode(MapState(junction_ids[0]))
+                for junction_id, link_weight in zip(junction_ids[1:], shortest_path.link_weights):
+                    final_search_node = SearchNode(MapState(junction_id), final_search_node, link_weight)
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=shortest_path.nr_settled,
+            solving_time=timer.elapsed,
+            termination_reason=TerminationReason.OPEN_EXHAUSTED if final_search_node is None
+            else TerminationReason.GOAL_FOUND
+        )
@@ -1,8 +1,11 @@
 from framework.graph_search import *
 from framework.ways import *
+from framework.ways import tools
 from .deliveries_problem_input import DeliveriesProblemInput
 
-from typing import Set, FrozenSet, Iterator, Tuple, Union
+import numpy as np
+
+from typing import FrozenSet, Iterator, Iterable, Tuple, Dict, List, NamedTuple, Optional
 
 
 class RelaxedDeliveriesState(GraphProblemState):
@@ -11,52 +14,60 @@ class RelaxedDeliveriesState(GraphProblemState):
      deliveries problem.
     Notice that our state has "real number" field, which makes our
      states space infinite.
+
+    The state is encoded compactly, by the indices the problem assigns to its locations
+     (see `RelaxedDeliveriesProblem.locations`): the index of the current location, and a
+     bitmask of the dropped drop points (bit i is set iff the drop point whose location
+     index is i has been dropped). Hence, hashing and comparing states take O(1).
+    The `current_location` and `dropped_so_far` properties decode the state into junctions.
+    Use `RelaxedDeliveriesProblem.make_state()` to create a state out of junctions.
     """
 
-    def __init__(self, current_location: Junction,
-                 dropped_so_far: Union[Set[Junction], FrozenSet[Junction]],
-                 fuel: float):
-        self.current_location: Junction = current_location
-        self.dropped_so_far: FrozenSet[Junction] = frozenset(dropped_so_far)
-        self.fuel: float = fuel
-        assert fuel > 0
+    __slots__ = ('locations', 'location_idx', 'dropped_mask', 'fuel', 'fuel_as_int')
 
-    @property
-    def fuel_as_int(self):
+    def __init__(self, locations: Tuple[Junction, ...], location_idx: int, dropped_mask: int, fuel: float):
         """
-        Sometimes we have to compare 2 given states. However, our state
-         has a float field (fuel).
-        As we know, floats comparison is an unreliable operation.
-        Hence, we would like to "cluster" states within some fuel range,
-         so that 2 states in the same fuel range would be counted as equal.
+        :param locations: The locations of the problem (`RelaxedDeliveriesProblem.locations`),
+                          shared by all the states of the problem.
         """
-        return int(self.fuel * 1000000)
+        assert fuel > 0
+        self.locations: Tuple[Junction, ...] = locations
+        self.location_idx: int = location_idx
+        self.dropped_mask: int = dropped_mask
+        self.fuel: float = fuel
+        # Sometimes we have to compare 2 given states. However, our state
+        #  has a float field (fuel).
+        # As we know, floats comparison is an unreliable operation.
+        # Hence, we would like to "cluster" states within some fuel range,
+        #  so that 2 states in the same fuel range would be counted as equal.
+        self.fuel_as_int: int = int(fuel * 1000000)
+
+    @property
+    def current_location(self) -> Junction:
+        return self.locations[self.location_idx]
+
+    @property
+    def dropped_so_far(self) -> FrozenSet[Junction]:
+        mask = self.dropped_mask
+        return frozenset(self.locations[idx] for idx in range(mask.bit_length()) if (mask >> idx) & 1)
 
     def __eq__(self, other):
         """
         This method is used to determine whether two given state objects represents the same state.
         Notice: Never compare floats using `==` operator! Use `fuel_as_int` instead of `fuel`.
         """
-        if(self.fuel_as_int == other.fuel_as_int) and\
-                (self.current_location==other.current_location)\
-            and (self.dropped_so_far <= other.dropped_so_far)\
-                and (self.dropped_so_far >= other.dropped_so_far):
-            return True
-        else:
-            return False
+        return self.location_idx == other.location_idx and self.dropped_mask == other.dropped_mask \
+            and self.fuel_as_int == other.fuel_as_int
 
     def __hash__(self):
         """
         This method is used to create a hash of a state.
         It is critical that two objects representing the same state would have the same hash!
-        A common implementation might be something in the format of:
-        >>>          return hash((self., self.some_field2, self.some_field3))
-
         Notice: Do NOT give float fields to `hash(...)`.
                 Otherwise the upper requirement would not met.
                 In our case, use `fuel_as_int`.
         """
-        return hash((self.current_location.index, self.dropped_so_far, self.fuel_as_int))
+        return hash((self.location_idx, self.dropped_mask, self.fuel_as_int))
 
     def __str__(self):
         """
@@ -65,6 +76,50 @@ class RelaxedDeliveriesState(GraphProblemState):
         return str(self.current_location.index)
 
 
+class _DeliveriesLocations(NamedTuple):
+    """
+    This class is for local use only. The locations of a relaxed deliveries problem and the tables
+     precomputed over them, which its subproblems share (see `RelaxedDeliveriesProblem.make_relaxed_subproblem()`).
+    """
+    stop_points: Tuple[Junction, ...]
+    locations: Tuple[Junction, ...]
+    location_idx: Dict[Junction, int]
+    locations_air_distances: np.ndarray
+    stop_points_geodesic_terms: tools.GeodesicTerms
+    air_distances_to_stop_points_cache: Dict[Junction, np.ndarray]
+    mst_weights_cache: Dict[Tuple[int, int], float]
+
+    @staticmethod
+    def of(problem_input: DeliveriesProblemInput) -> '_DeliveriesLocations':
+        drop_points = frozenset(problem_input.drop_points)
+        gas_stations = frozenset(problem_input.gas_stations)
+
+        # A fixed order of the stop points: the drop points first, so that the index of each drop point
+        #  is also its bit in the `dropped_mask` of the states. A junction that is both a drop point and a
+        #  gas station is listed once, as a drop point.
+        stop_points = tuple(sorted(drop_points, key=lambda j: j.index)) + \
+            tuple(sorted(gas_stations - drop_points, key=lambda j: j.index))
+        # The locations the agent may be at: the stop points, followed by the start point.
+        locations = stop_points + (problem_input.start_point,)
+        location_idx: Dict[Junction, int] = {}
+        for idx, junction in enumerate(locations):
+            location_idx.setdefault(junction, idx)
+
+        # The air distances between each pair of locations (computed once), indexed as `locations`.
+        locations_geodesic_terms = tools.GeodesicTerms.of(
+            [junction.lat for junction in locations], [junction.lon for junction in locations])
+        locations_air_distances = tools.compute_distances(
+            locations_geodesic_terms.reshape(-1, 1), locations_geodesic_terms.reshape(1, -1))
+        locations_air_distances.flags.writeable = False
+        stop_points_geodesic_terms = locations_geodesic_terms.take(np.arange(len(stop_points)))
+
+        # The distances from junctions that are not locations of the problem (rarely needed), and the memo
+        #  of `MSTAirDistHeuristic` (by location index and dropped mask). Both depend only on the locations,
+        #  so they are shared by the problem, its subproblems and all the searches over them.
+        return _DeliveriesLocations(stop_points, locations, location_idx, locations_air_distances,
+                                    stop_points_geodesic_terms, {}, {})
+
+
 class RelaxedDeliveriesProblem(GraphProblem):
     """
     An instance of this class represents a relaxed deliveries problem.
@@ -72,18 +127,82 @@ class RelaxedDeliveriesProblem(GraphProblem):
 
     name = 'RelaxedDeliveries'
 
-    def __init__(self, problem_input: DeliveriesProblemInput):
+    """The type of the states of the problem. Might be overridden by the inheritor problem."""
+    state_type = RelaxedDeliveriesState
+
+    def __init__(self, problem_input: DeliveriesProblemInput, _locations: Optional[_DeliveriesLocations] = None):
+        """
+        :param _locations: For local use only: the precomputed locations of a problem of the same input,
+                           to share rather than compute again (see `make_relaxed_subproblem()`).
+        """
         self.name += '({})'.format(problem_input.input_name)
         assert problem_input.start_point not in problem_input.drop_points
-        initial_state = RelaxedDeliveriesState(
-            problem_input.start_point, frozenset(), problem_input.gas_tank_init_fuel)
-        super(RelaxedDeliveriesProblem, self).__init__(initial_state)
+        self.problem_input = problem_input
         self.start_point = problem_input.start_point
         self.drop_points = frozenset(problem_input.drop_points)
         self.gas_stations = frozenset(problem_input.gas_stations)
         self.gas_tank_capacity = problem_input.gas_tank_capacity
         self.possible_stop_points = self.drop_points | self.gas_stations
 
+        if _locations is None:
+            _locations = _DeliveriesLocations.of(problem_input)
+        self._locations = _locations
+        self.nr_drop_points = len(self.drop_points)
+        self.stop_points: Tuple[Junction, ...] = _locations.stop_points
+        self.all_drop_points_mask = (1 << self.nr_drop_points) - 1
+        self.locations: Tuple[Junction, ...] = _locations.locations
+        self.location_idx: Dict[Junction, int] = _locations.location_idx
+        self.locations_air_distances: np.ndarray = _locations.locations_air_distances
+        nr_stop_points = len(self.stop_points)
+        self.stop_points_air_distances: np.ndarray = self.locations_air_distances[:nr_stop_points, :nr_stop_points]
+        self._stop_points_geodesic_terms = _locations.stop_points_geodesic_terms
+        self._air_distances_to_stop_points_cache = _locations.air_distances_to_stop_points_cache
+        self.mst_weights_cache = _locations.mst_weights_cache
+
+        initial_state = self.make_state(problem_input.start_point, frozenset(), problem_input.gas_tank_init_fuel)
+        super(RelaxedDeliveriesProblem, self).__init__(initial_state)
+
+    def make_relaxed_subproblem(self, state: RelaxedDeliveriesState,
+                                fuel: Optional[float] = None) -> 'RelaxedDeliveriesProblem':
+        """
+        Returns the relaxed deliveries problem of delivering the drop points that have not been
+         dropped yet in the given state, starting at its location (with the given fuel, which
+         defaults to the state's fuel).
+        The subproblem shares the locations and all the precomputed tables of this problem,
+         so creating it does not compute them again, and its states are encoded the same way.
+        """
+        subproblem = RelaxedDeliveriesProblem(self.problem_input, self._locations)
+        subproblem.name = '{}(from: {})'.format(RelaxedDeliveriesProblem.name, state.current_location.index)
+        subproblem.initial_state = RelaxedDeliveriesState(
+            self.locations, state.location_idx, state.dropped_mask, state.fuel if fuel is None else fuel)
+        return subproblem
+
+    def make_state(self, current_location: Junction, dropped_so_far: Iterable[Junction], fuel: float) \
+            -> RelaxedDeliveriesState:
+        """Creates a state of this problem out of junctions."""
+        dropped_mask = 0
+        for junction in dropped_so_far:
+            dropped_mask |= 1 << self.location_idx[junction]
+        return self.state_type(self.locations, self.location_idx[current_location], dropped_mask, fuel)
+
+    def remained_drop_points_indices(self, state: RelaxedDeliveriesState) -> List[int]:
+        """The indices (in `self.stop_points`) of the drop points that have not been dropped in the given state."""
+        dropped_mask = state.dropped_mask
+        return [idx for idx in range(self.nr_drop_points) if not (dropped_mask >> idx) & 1]
+
+    def air_distances_to_stop_points(self, junction: Junction) -> np.ndarray:
+        """The air distances from the given junction to each of `self.stop_points` (in this order)."""
+        location_idx = self.location_idx.get(junction)
+        if location_idx is not None:
+            return self.locations_air_distances[location_idx, :len(self.stop_points)]
+        distances = self._air_distances_to_stop_points_cache.get(junction)
+        if distances is None:
+            distances = tools.compute_distances(tools.GeodesicTerms.of(junction.lat, junction.lon),
+                                                self._stop_points_geodesic_terms)
+            distances.flags.writeable = False
+            self._air_distances_to_stop_points_cache[junction] = distances
+        return distances
+
     def expand_state_with_costs(self, state_to_expand: GraphProblemState) -> Iterator[Tuple[GraphProblemState, float]]:
         """
         This method represents the `Succ: S -> P(S)` function of the relaxed deliveries problem.
@@ -94,33 +213,28 @@ class RelaxedDeliveriesProblem(GraphProblem):
         For each successor, a pair of the successor state and the operator cost is yielded.
         """
         assert isinstance(state_to_expand, RelaxedDeliveriesState)
-        # print('state_to_expand links: ', self.drop_points-state_to_expand.dropped_so_far)
-        for junction in self.possible_stop_points - state_to_expand.dropped_so_far:
-            #print('cur location:', state_to_expand.current_location.index, ' succ junction index: ', junction.index)
-            distance = junction.calc_air_distance_from(state_to_expand.current_location)
-            if distance <= state_to_expand.fuel:
-                if junction in self.drop_points:
-                    succ_dropped_so_far = set()
-                    succ_dropped_so_far = succ_dropped_so_far.union(state_to_expand.dropped_so_far)
-                    succ_dropped_so_far.add(junction)
-                    successor = RelaxedDeliveriesState(junction, succ_dropped_so_far, state_to_expand.fuel-distance)
-                    yield [successor, distance]
-                else:
-                    successor = RelaxedDeliveriesState(junction, state_to_expand.dropped_so_far, self.gas_tank_capacity)
-                    yield [successor, distance]
-        # for junction in self.gas_stations:
-        #     print('cur location:', state_to_expand.current_location.index, ' succ junction index: ', junction.index)
-            # distance = junction.calc_air_distance_from(state_to_expand.current_location)
-            # if distance <= state_to_expand.fuel:
-            #     successor = RelaxedDeliveriesState(junction, state_to_expand.dropped_so_far, self.gas_tank_capacity)
-
+        nr_drop_points = self.nr_drop_points
+        dropped_mask = state_to_expand.dropped_mask
+        fuel = state_to_expand.fuel
+        distances = self.locations_air_distances[state_to_expand.location_idx, :len(self.stop_points)].tolist()
+        for stop_point_idx, distance in enumerate(distances):
+            if distance > fuel:
+                continue
+            if stop_point_idx < nr_drop_points:
+                if (dropped_mask >> stop_point_idx) & 1:
+                    continue
+                successor = self.state_type(self.locations, stop_point_idx, dropped_mask | (1 << stop_point_idx),
+                                            fuel - distance)
+            else:
+                successor = self.state_type(self.locations, stop_point_idx, dropped_mask, self.gas_tank_capacity)
+            yield successor, distance
 
     def is_goal(self, state: GraphProblemState) -> bool:
         """
         This method receives a state and returns whether this state is a goal.
         """
         assert isinstance(state, RelaxedDeliveriesState)
-        return state.dropped_so_far <= self.drop_points <= state.dropped_so_far
+        return state.dropped_mask == self.all_drop_points_mask
 
     def solution_additional_str(self, result: 'SearchResult') -> str:
         """This method is used to enhance the printing method of a found solution."""
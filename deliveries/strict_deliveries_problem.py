@@ -1,9 +1,10 @@
 from framework.graph_search import *
 from framework.ways import *
-from .map_problem import MapProblem
+from .map_problem import MapProblem, MultiTargetMapProblem
 from .deliveries_problem_input import DeliveriesProblemInput
 from .relaxed_deliveries_problem import RelaxedDeliveriesState, RelaxedDeliveriesProblem
 
+import numpy as np
 from typing import Set, FrozenSet, Optional, Iterator, Tuple, Union
 
 
@@ -18,7 +19,8 @@ class StrictDeliveriesState(RelaxedDeliveriesState):
         If you believe you need to modify the state for the strict
          problem in some sense, please go ahead and do so.
     """
-    pass
+
+    __slots__ = ()
 
 
 class StrictDeliveriesProblem(RelaxedDeliveriesProblem):
@@ -28,15 +30,71 @@ class StrictDeliveriesProblem(RelaxedDeliveriesProblem):
 
     name = 'StrictDeliveries'
 
+    state_type = StrictDeliveriesState
+
     def __init__(self, problem_input: DeliveriesProblemInput, roads: Roads,
-                 inner_problem_solver: GraphProblemSolver, use_cache: bool = True):
+                 inner_problem_solver: GraphProblemSolver, use_cache: bool = True,
+                 precompute_distances: bool = False):
+        """
+        :param inner_problem_solver: Used for finding the road distances between stop points, on demand.
+                                     When the cache is used and the solver is `UniformCost`, the distances
+                                     from a location to all the stop points are found by a single multi-goal
+                                     search, which costs about as much as the search for the farthest one.
+                                     (Informed solvers search pair by pair, as a heuristic that bounds the
+                                     distances to all the targets at once is much weaker.)
+        :param precompute_distances: If set, the road distances between all the stop points are computed
+                                     upfront, by a single shortest-paths sweep (Dijkstra) per stop point.
+                                     In that case, the `inner_problem_solver` is not used.
+        """
         super(StrictDeliveriesProblem, self).__init__(problem_input)
-        self.initial_state = StrictDeliveriesState(
-            problem_input.start_point, frozenset(), problem_input.gas_tank_init_fuel)
         self.inner_problem_solver = inner_problem_solver
         self.roads = roads
         self.use_cache = use_cache
         self._init_cache()
+        self._road_distances_matrix: Optional[np.ndarray] = None
+        if precompute_distances:
+            self.precompute_road_distances()
+
+    def precompute_road_distances(self):
+        """
+        Computes the road distances between all the locations (the stop points and the start point) upfront.
+        Runs one one-to-many Dijkstra per location, over the map exported as a sparse matrix.
+        The operator cost is the same as of `MapProblem` (the air distance of each link), so the
+         distances are the same as found by an optimal `inner_problem_solver`.
+        The distances are indexed as `self.locations`.
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        positions = self.roads.positions_of([junction.index for junction in self.locations])
+        distances = dijkstra(self.roads.to_sparse_matrix('air_distance'), directed=True, indices=positions)
+        self._road_distances_matrix = distances[:, positions]
+
+    def _get_road_distance(self, source: Junction, target: Junction) -> float:
+        """The road distance between two stop points (infinite if there is no path between them)."""
+        if self._road_distances_matrix is not None:
+            return self._road_distances_matrix.item(self.location_idx[source], self.location_idx[target])
+        cost = self._get_from_cache(hash((source.index, target.index)))
+        if cost is None:
+            if self.use_cache and isinstance(self.inner_problem_solver, UniformCost):
+                self._solve_and_cache_road_distances_from(source)
+                return self._cache[hash((source.index, target.index))]
+            map_prob = MapProblem(self.roads, source.index, target.index)
+            map_res = self.inner_problem_solver.solve_problem(map_prob)
+            cost = np.inf if map_res.final_search_node is None else map_res.final_search_node.cost
+            self._insert_to_cache(hash((source.index, target.index)), cost)
+        return cost
+
+    def _solve_and_cache_road_distances_from(self, source: Junction):
+        """
+        Finds the road distances from the given location to all the stop points that are not
+         cached yet, by a single multi-goal search of the inner solver.
+        """
+        targets = [junction.index for junction in self.stop_points
+                   if hash((source.index, junction.index)) not in self._cache]
+        map_prob = MultiTargetMapProblem(self.roads, source.index, targets)
+        for goal_state, map_res in self.inner_problem_solver.solve_problem_for_all_goals(map_prob).items():
+            cost = np.inf if map_res.final_search_node is None else map_res.final_search_node.cost
+            self._insert_to_cache(hash((source.index, goal_state.junction_id)), cost)
 
     def _init_cache(self):
         self._cache = {}
@@ -66,39 +124,29 @@ class StrictDeliveriesProblem(RelaxedDeliveriesProblem):
         For each successor, a pair of the successor state and the operator cost is yielded.
         """
         assert isinstance(state_to_expand, StrictDeliveriesState)
-        # print("cur location ", state_to_expand.current_location)
-        # print("drop so far")
-        # for item in state_to_expand.dropped_so_far:
-        #     print(item.index)
-        # if not (state_to_expand.dropped_so_far < self.drop_points):
-        #     print("drop points")
-        #     for item in self.drop_points:
-        #         print(item.index)
-        #     print("dif",-self.drop_points)
-        #     exit(1)
-        for drop_point in self.possible_stop_points-state_to_expand.dropped_so_far:
-            # assert drop_point not in state_to_expand.dropped_so_far
-            cost = self._get_from_cache(hash((state_to_expand.current_location.index, drop_point.index)))
-            if cost is None:
-                map_prob = MapProblem(self.roads, state_to_expand.current_location.index, drop_point.index)
-                map_res = self.inner_problem_solver.solve_problem(map_prob)
-                cost = map_res.final_search_node.cost
-                self._insert_to_cache(hash((state_to_expand.current_location.index, drop_point.index)), cost)
-            assert cost is not None
+        current_location = state_to_expand.current_location
+        dropped_mask = state_to_expand.dropped_mask
+        for stop_point_idx, stop_point in enumerate(self.stop_points):
+            is_drop_point = stop_point_idx < self.nr_drop_points
+            if is_drop_point and (dropped_mask >> stop_point_idx) & 1:
+                continue
+            cost = self._get_road_distance(current_location, stop_point)
             if cost < state_to_expand.fuel:
-                succ_dropped_so_far = set()
-                succ_dropped_so_far = succ_dropped_so_far.union(state_to_expand.dropped_so_far)
-                if drop_point in self.drop_points:
-                    succ_dropped_so_far.add(drop_point)
-                    succ_state = StrictDeliveriesState(drop_point, succ_dropped_so_far, state_to_expand.fuel - cost)
-                    yield [succ_state, cost]
-                if drop_point in self.gas_stations:
-                    succ_state = StrictDeliveriesState(drop_point, succ_dropped_so_far, self.gas_tank_capacity)
-                    yield [succ_state, cost]
+                if is_drop_point:
+                    succ_dropped_mask = dropped_mask | (1 << stop_point_idx)
+                    succ_state = self.state_type(self.locations, stop_point_idx, succ_dropped_mask,
+                                                 state_to_expand.fuel - cost)
+                    yield succ_state, cost
+                if stop_point in self.gas_stations:
+                    # A drop point that is also a gas station is dropped at when refueling there.
+                    succ_dropped_mask = dropped_mask | (1 << stop_point_idx) if is_drop_point else dropped_mask
+                    succ_state = self.state_type(self.locations, stop_point_idx, succ_dropped_mask,
+                                                 self.gas_tank_capacity)
+                    yield succ_state, cost
 
     def is_goal(self, state: GraphProblemState) -> bool:
         """
         This method receives a state and returns whether this state is a goal.
         """
         assert isinstance(state, StrictDeliveriesState)
-        return state.dropped_so_far == self.drop_points
+        return state.dropped_mask == self.all_drop_points_mask
@@ -0,0 +1,60 @@
+"""
+Compares the anytime behavior of ARA* with the anytime greedy-stochastic scheme of `main.py`
+ (running `GreedyStochastic` again and again, keeping the cheapest solution), on the relaxed
+ deliveries problem. Prints the cost of the best solution known over time, and the
+ suboptimality bound that ARA* proves for it.
+
+Usage:
+    python experiments/anytime_benchmark.py [map.csv] [deliveries input file] [time limit (seconds)]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    input_file = sys.argv[2] if len(sys.argv) > 2 else 'big_delivery.in'
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 5.
+
+    roads = load_map_from_csv(map_path)
+    problem = RelaxedDeliveriesProblem(DeliveriesProblemInput.load_from_file(input_file, roads))
+    optimal_cost = AStar(MSTAirDistHeuristic).solve_problem(problem).final_search_node.cost
+    print('optimal cost: {:.2f}'.format(optimal_cost))
+
+    print()
+    print('ARA* (w: 1 -> 0.5)')
+    print('{:>10} {:>12} {:>8} {:>8} {:>8}'.format('time [s]', 'cost', 'bound', 'w', '#dev'))
+    solver = AnytimeRepairingAStar(MSTAirDistHeuristic, initial_heuristic_weight=1.)
+    for solution in solver.solve_problem_anytime(problem, SearchBudget(time_limit=time_limit)):
+        print('{:>10.4f} {:>12.2f} {:>8.3f} {:>8.3f} {:>8}'.format(
+            solution.elapsed, solution.cost, solution.suboptimality_bound, solution.heuristic_weight,
+            solution.nr_expanded_states))
+    print('termination: {}'.format(solver.termination_reason.value))
+
+    print()
+    print('Anytime greedy stochastic (no bound)')
+    print('{:>10} {:>12} {:>8}'.format('time [s]', 'cost', '#runs'))
+    np.random.seed(Consts.SEED)
+    best_cost = np.inf
+    nr_runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < time_limit:
+        result = GreedyStochastic(MSTAirDistHeuristic).solve_problem(problem)
+        nr_runs += 1
+        if result.final_search_node is not None and result.final_search_node.cost < best_cost:
+            best_cost = result.final_search_node.cost
+            print('{:>10.4f} {:>12.2f} {:>8}'.format(time.perf_counter() - start, best_cost, nr_runs))
+        if best_cost <= optimal_cost:
+            break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the bidirectional solvers with the unidirectional ones on `MapProblem`s
+ between random pairs of junctions: uniform-cost vs. bidirectional uniform-cost (Dijkstra),
+ and A* vs. bidirectional A* (both with the air-distance heuristic).
+Reports the mean number of expanded states and the mean solving time of each solver,
+ and verifies that all the solvers find paths of the same cost.
+
+Usage:
+    python experiments/bidirectional_benchmark.py [map.csv] [nr_pairs]
+"""
+
+import random
+import sys
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import MapProblem, AirDistHeuristic
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    roads = load_map_from_csv(map_path)
+    # Build the incoming-links index before timing anything.
+    roads.predecessors_with_air_distances(next(iter(roads)))
+
+    solvers = [UniformCost(), BidirectionalSearch(), AStar(AirDistHeuristic), BidirectionalSearch(AirDistHeuristic)]
+    total_expanded = [0] * len(solvers)
+    total_time = [0.0] * len(solvers)
+    nr_solved = 0
+
+    rnd = random.Random(236501)
+    junction_ids = roads.arrays.junction_ids.tolist()
+    for _ in range(nr_pairs):
+        problem = MapProblem(roads, rnd.choice(junction_ids), rnd.choice(junction_ids))
+        results = [solver.solve_problem(problem) for solver in solvers]
+        costs = [None if res.final_search_node is None else res.final_search_node.cost for res in results]
+        if any(cost is None for cost in costs):
+            assert all(cost is None for cost in costs), problem.name
+            continue
+        assert max(costs) - min(costs) < 1e-6 * max(1.0, max(costs)), (problem.name, costs)
+        nr_solved += 1
+        for i, res in enumerate(results):
+            total_expanded[i] += res.nr_expanded_states
+            total_time[i] += res.solving_time
+
+    print('#pairs: {}   #solved: {}'.format(nr_pairs, nr_solved))
+    print('{:<40} {:>14} {:>14}'.format('solver', 'mean #dev', 'mean time [s]'))
+    for solver, expanded, elapsed in zip(solvers, total_expanded, total_time):
+        print('{:<40} {:>14.0f} {:>14.4f}'.format(solver.solver_name, expanded / max(1, nr_solved),
+                                                   elapsed / max(1, nr_solved)))
+
+
+if __name__ == '__main__':
+    main()
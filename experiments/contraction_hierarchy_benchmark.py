@@ -0,0 +1,83 @@
+"""
+Compares queries on the contraction hierarchy of a map (`ContractionHierarchiesSolver`) with UniformCost
+ and with A* (air distance heuristic), on random map problems (pairs of junctions): the costs must be
+ the same, and the #expanded states and the time are printed in total.
+The hierarchy is built on the first run, and is loaded from next to the map afterwards (the time it
+ took is printed). Then each of the solvers finds the road distances between all the locations of a
+ deliveries input (as the inner solver of the strict deliveries problem would), which are compared
+ with a one-to-all Dijkstra search (`scipy.sparse.csgraph`) from each location.
+
+Usage:
+    python experiments/contraction_hierarchy_benchmark.py [map.csv] [#pairs] [deliveries input file]
+"""
+
+import math
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    input_file = sys.argv[3] if len(sys.argv) > 3 else 'small_delivery.in'
+
+    roads = load_map_from_csv(map_path)
+    start = time.perf_counter()
+    hierarchy = roads.contraction_hierarchy()
+    print('contraction hierarchy: {:.2f}s ({} junctions, {} shortcuts)'.format(
+        time.perf_counter() - start, hierarchy.nr_junctions, hierarchy.nr_shortcuts))
+
+    rnd = random.Random(Consts.SEED)
+    junction_ids = list(roads)
+    pairs = [(rnd.choice(junction_ids), rnd.choice(junction_ids)) for _ in range(nr_pairs)]
+
+    solvers = [UniformCost(), AStar(AirDistHeuristic), ContractionHierarchiesSolver()]
+    total_expanded = [0] * len(solvers)
+    total_time = [0.] * len(solvers)
+    for source_id, target_id in pairs:
+        problem = MapProblem(roads, source_id, target_id)
+        results = [solver.solve_problem(problem) for solver in solvers]
+        costs = {None if result.final_search_node is None else round(result.final_search_node.cost, 6)
+                 for result in results}
+        assert len(costs) == 1, 'All the solvers are optimal, so all the solutions should have the same cost.'
+        for idx, result in enumerate(results):
+            total_expanded[idx] += result.nr_expanded_states
+            total_time[idx] += result.solving_time
+
+    print()
+    print('{} pairs'.format(nr_pairs))
+    print('{:<30} {:>12} {:>10} {:>10}'.format('solver', '#dev', 'time [s]', 'speedup'))
+    for solver, expanded, solving_time in zip(solvers, total_expanded, total_time):
+        print('{:<30} {:>12} {:>10.3f} {:>10.1f}'.format(
+            solver.solver_name, expanded, solving_time, total_time[0] / max(solving_time, 1e-9)))
+
+    from scipy.sparse.csgraph import dijkstra
+
+    # The road distances between all the locations of a deliveries input, as the inner solver of the strict
+    #  deliveries problem finds them, compared to a one-to-all Dijkstra search from each location.
+    problem_input = DeliveriesProblemInput.load_from_file(input_file, roads)
+    location_ids = [problem_input.start_point.index] + \
+        sorted(junction.index for junction in problem_input.drop_points | problem_input.gas_stations)
+    expected_costs = dijkstra(roads.to_sparse_matrix('air_distance'), indices=roads.positions_of(location_ids))
+    print()
+    print('road distances between the {} locations of {}'.format(len(location_ids), problem_input.input_name))
+    print('{:<30} {:>10}'.format('solver', 'time [s]'))
+    for solver in solvers:
+        start = time.perf_counter()
+        for source_idx, source_id in enumerate(location_ids):
+            for target_id in location_ids:
+                result = solver.solve_problem(MapProblem(roads, source_id, target_id))
+                cost = math.inf if result.final_search_node is None else result.final_search_node.cost
+                expected_cost = expected_costs.item(source_idx, roads.position_of(target_id))
+                assert math.isclose(cost, expected_cost, rel_tol=1e-9), (source_id, target_id)
+        print('{:<30} {:>10.3f}'.format(solver.solver_name, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
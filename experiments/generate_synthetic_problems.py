@@ -0,0 +1,60 @@
+"""
+Generates a synthetic map (see `framework/ways/map_generator.py`) with matching random
+ deliveries-problem-inputs, for stress-testing the loading, the solvers and the deliveries
+ problems on maps of any size (10^4 to 10^7 junctions).
+The files are written to `framework/db/synthetic/` (so that `DeliveriesProblemInput.load_all_inputs()`,
+ which looks for the inputs of `tlv.csv`, does not pick them up):
+    <name>.csv                      the map.
+    <name>_<i>.in                   the deliveries inputs, loaded by:
+        DeliveriesProblemInput.load_from_file('synthetic/<name>_<i>.in', roads)
+
+Usage:
+    python experiments/generate_synthetic_problems.py {grid,geometric,city} nr_junctions
+        [--name NAME] [--seed SEED] [--inputs 3] [--drop-points 5] [--gas-stations 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from framework import *
+from framework.ways import map_generator
+from deliveries import DeliveriesProblemInput
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates a synthetic map with matching deliveries inputs.')
+    parser.add_argument('topology', choices=sorted(map_generator.TOPOLOGIES))
+    parser.add_argument('nr_junctions', type=int)
+    parser.add_argument('--name', help='the name of the files (default: <topology>_<nr_junctions>)')
+    parser.add_argument('--seed', type=int, default=Consts.SEED)
+    parser.add_argument('--inputs', type=int, default=3, help='#deliveries inputs')
+    parser.add_argument('--drop-points', type=int, default=5)
+    parser.add_argument('--gas-stations', type=int, default=5)
+    args = parser.parse_args()
+
+    name = args.name or '{}_{}'.format(args.topology, args.nr_junctions)
+    output_directory = Consts.get_data_file_path('synthetic')
+    os.makedirs(output_directory, exist_ok=True)
+    map_path = os.path.join(output_directory, name + '.csv')
+
+    start = time.perf_counter()
+    synthetic_map = map_generator.generate_map(args.topology, args.nr_junctions, seed=args.seed)
+    map_generator.write_map_csv(synthetic_map, map_path)
+    print('{}: {} junctions, {} links ({:.1f}s)'.format(
+        map_path, synthetic_map.nr_junctions, synthetic_map.nr_links, time.perf_counter() - start))
+
+    roads = load_map_from_csv(map_path)
+    for input_idx in range(args.inputs):
+        input_name = '{}_{}'.format(name, input_idx)
+        problem_input = DeliveriesProblemInput.make_random(
+            roads, input_name, args.drop_points, args.gas_stations, seed=args.seed + input_idx)
+        problem_input.store_to_file(os.path.join('synthetic', input_name + '.in'))
+        print('{}: gas tank capacity {:.0f}'.format(input_name, problem_input.gas_tank_capacity))
+
+
+if __name__ == '__main__':
+    main()
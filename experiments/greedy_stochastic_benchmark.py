@@ -0,0 +1,75 @@
+"""
+Measures the expansion rate of `GreedyStochastic`: choosing out of the N best nodes by
+ peeking at the top of the open queue, versus the former way of draining the whole open
+ queue into a list, scanning it for the N best nodes and pushing all the nodes back.
+Both variants use the same selection distribution and are run with the same seeds,
+ so they expand the same states.
+
+Usage:
+    python experiments/greedy_stochastic_benchmark.py [map.csv] [nr_problems]
+"""
+
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import MapProblem, AirDistHeuristic
+
+
+class DrainingGreedyStochastic(GreedyStochastic):
+    """The former open-queue handling: every expansion pops (and pushes back) all of `open`."""
+
+    def _extract_next_search_node_to_expand(self):
+        if self.open.is_empty():
+            return None
+        popped_nodes = []
+        while not self.open.is_empty():
+            popped_nodes.append(self.open.pop_next_node())
+        for node in popped_nodes:
+            self.open.push_node(node)
+
+        best_nodes = popped_nodes[:self.N]
+        priorities = np.array([node.expanding_priority for node in best_nodes], dtype=np.float64)
+        is_zero = priorities == 0
+        if is_zero.any():
+            best_nodes = [node for node, node_is_zero in zip(best_nodes, is_zero) if node_is_zero]
+            probabilities = None
+        else:
+            scores = (priorities / priorities.min()) ** (-1 / self.T)
+            probabilities = scores / scores.sum()
+        chosen_node = best_nodes[np.random.choice(len(best_nodes), None, True, probabilities)]
+
+        self.open.extract_node(chosen_node)
+        self.close.add_node(chosen_node)
+        self.T = self.T * self.T_scale_factor
+        return chosen_node
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_problems = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    roads = load_map_from_csv(map_path)
+    rnd = random.Random(236501)
+    junction_ids = roads.arrays.junction_ids.tolist()
+    problems = [MapProblem(roads, rnd.choice(junction_ids), rnd.choice(junction_ids)) for _ in range(nr_problems)]
+
+    print('{:<40} {:>8} {:>10} {:>10} {:>16}'.format('problem', 'variant', '#dev', 'time [s]', 'expansions/sec'))
+    for problem in problems:
+        costs = []
+        for variant_name, solver_type in (('drain', DrainingGreedyStochastic), ('peek', GreedyStochastic)):
+            np.random.seed(Consts.SEED)
+            result = solver_type(AirDistHeuristic).solve_problem(problem)
+            costs.append(None if result.final_search_node is None else result.final_search_node.cost)
+            print('{:<40} {:>8} {:>10} {:>10.3f} {:>16.0f}'.format(
+                problem.name, variant_name, result.nr_expanded_states, result.solving_time,
+                result.nr_expanded_states / result.solving_time))
+        assert costs[0] == costs[1], costs
+
+
+if __name__ == '__main__':
+    main()
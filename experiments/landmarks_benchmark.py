@@ -0,0 +1,63 @@
+"""
+Compares A* with the ALT (landmarks) heuristic to A* with the air-distance heuristic, on random
+ map problems (pairs of junctions): the #expanded states and the time, per pair and in total.
+The landmark tables are computed on the first run, and are loaded from next to the map afterwards
+ (the time it took is printed).
+
+Usage:
+    python experiments/landmarks_benchmark.py [map.csv] [#pairs] [#landmarks]
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    nr_landmarks = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    roads = load_map_from_csv(map_path)
+    heuristic_types = [AirDistHeuristic]
+    for strategy in ('farthest', 'avoid'):
+        start = time.perf_counter()
+        roads.landmarks_table(nr_landmarks, strategy)
+        print('landmarks table ({}, {}): {:.2f}s'.format(strategy, nr_landmarks, time.perf_counter() - start))
+        heuristic_types.append(ALTHeuristic.with_landmarks(nr_landmarks, strategy))
+
+    rnd = random.Random(Consts.SEED)
+    junction_ids = list(roads)
+    pairs = [(rnd.choice(junction_ids), rnd.choice(junction_ids)) for _ in range(nr_pairs)]
+
+    print()
+    print('{:>8} {:>8} {:>12}'.format('source', 'target', 'cost') +
+          ''.join(' {:>22}'.format(heuristic_type.heuristic_name) for heuristic_type in heuristic_types))
+    total_expanded = [0] * len(heuristic_types)
+    total_time = [0.] * len(heuristic_types)
+    for source_id, target_id in pairs:
+        problem = MapProblem(roads, source_id, target_id)
+        results = [AStar(heuristic_type).solve_problem(problem) for heuristic_type in heuristic_types]
+        costs = {None if result.final_search_node is None else round(result.final_search_node.cost, 6)
+                 for result in results}
+        assert len(costs) == 1, 'The heuristics are admissible, so all the solutions should be optimal.'
+        for idx, result in enumerate(results):
+            total_expanded[idx] += result.nr_expanded_states
+            total_time[idx] += result.solving_time
+        print('{:>8} {:>8} {:>12}'.format(source_id, target_id, str(costs.pop())) +
+              ''.join(' {:>22}'.format(result.nr_expanded_states) for result in results))
+
+    print()
+    print('{:<30} {:>12} {:>10} {:>10}'.format('heuristic', '#dev', 'ratio', 'time [s]'))
+    for heuristic_type, expanded, solving_time in zip(heuristic_types, total_expanded, total_time):
+        print('{:<30} {:>12} {:>10.3f} {:>10.3f}'.format(
+            heuristic_type.heuristic_name, expanded, expanded / max(total_expanded[0], 1), solving_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the memory-bounded solvers (IDA*, with and without a transposition table, and SMA*
+ with a few node caps) with A*, on the relaxed and on the strict deliveries problems of
+ a deliveries input. Prints the solution cost, the time, the #expanded states and the peak
+ memory allocated by the search (measured with `tracemalloc`, which slows the searches down).
+In the strict problem, the road distances between the stop points are computed upfront
+ (`precompute_distances`), so that only the memory of the search itself is measured.
+
+Usage:
+    python experiments/memory_bounded_benchmark.py [map.csv] [deliveries input file] [time limit per search (seconds)]
+"""
+
+import sys
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+def make_solvers():
+    return [
+        AStar(MSTAirDistHeuristic),
+        IDAStar(MSTAirDistHeuristic),
+        IDAStar(MSTAirDistHeuristic, transposition_table_size=10000),
+        IDAStar(MSTAirDistHeuristic, transposition_table_size=1000000),
+        IDAStar(MSTAirDistHeuristic, transposition_table_size=1000000, min_threshold_growth=0.01),
+        SMAStar(MSTAirDistHeuristic, max_nodes=100000),
+        SMAStar(MSTAirDistHeuristic, max_nodes=1000),
+        SMAStar(MSTAirDistHeuristic, max_nodes=100),
+    ]
+
+
+def run(problem_name: str, make_problem, time_limit: float):
+    print()
+    print(problem_name)
+    print('{:<45} {:>12} {:>9} {:>9} {:>11} {:>15}'.format(
+        'solver', 'cost', 'time [s]', '#dev', 'peak [MB]', 'termination'))
+    for solver in make_solvers():
+        problem = make_problem()
+        tracemalloc.start()
+        result = solver.solve_problem(problem, SearchBudget(time_limit=time_limit))
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cost = '-' if result.final_search_node is None else '{:.2f}'.format(result.final_search_node.cost)
+        print('{:<45} {:>12} {:>9.3f} {:>9} {:>11.2f} {:>15}'.format(
+            solver.solver_name, cost, result.solving_time, result.nr_expanded_states, peak_memory / 2 ** 20,
+            result.termination_reason.value))
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    input_file = sys.argv[2] if len(sys.argv) > 2 else 'big_delivery.in'
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 60.
+
+    roads = load_map_from_csv(map_path)
+    problem_input = DeliveriesProblemInput.load_from_file(input_file, roads)
+    run('RelaxedDeliveries({})'.format(problem_input.input_name),
+        lambda: RelaxedDeliveriesProblem(problem_input), time_limit)
+    run('StrictDeliveries({})'.format(problem_input.input_name),
+        lambda: StrictDeliveriesProblem(problem_input, roads, inner_problem_solver=AStar(AirDistHeuristic),
+                                        precompute_distances=True), time_limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures the rate of `MSTAirDistHeuristic.estimate()` calls, versus the former implementation
+ (a dense matrix filled by a double loop over frozenset-keyed pair distances, passed to
+ `scipy.sparse.csgraph.minimum_spanning_tree` on every call).
+The states are the ones for which A* (with the MST heuristic) estimates the heuristic
+ while solving the relaxed deliveries problem, in the same order.
+
+Usage:
+    python experiments/mst_heuristic_benchmark.py [map.csv] [deliveries input file]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+class FormerMSTAirDistHeuristic(HeuristicFunction):
+    """The former implementation of `MSTAirDistHeuristic`, for comparison."""
+
+    heuristic_name = 'FormerMSTAirDist'
+
+    def __init__(self, problem: GraphProblem):
+        super(FormerMSTAirDistHeuristic, self).__init__(problem)
+        self._junctions_distances_cache = dict()
+
+    def estimate(self, state: GraphProblemState) -> float:
+        from scipy.sparse.csgraph import minimum_spanning_tree
+
+        junctions = set(self.problem.drop_points - state.dropped_so_far)
+        junctions.add(state.current_location)
+        idx_to_junction = dict(enumerate(junctions))
+        distances_matrix = np.zeros((len(junctions), len(junctions)), dtype=np.float64)
+        for j1_idx in range(len(junctions)):
+            for j2_idx in range(len(junctions)):
+                if j1_idx == j2_idx:
+                    continue
+                junctions_pair = frozenset({idx_to_junction[j1_idx], idx_to_junction[j2_idx]})
+                dist = self._junctions_distances_cache.get(junctions_pair)
+                if dist is None:
+                    dist = idx_to_junction[j1_idx].calc_air_distance_from(idx_to_junction[j2_idx])
+                    self._junctions_distances_cache[junctions_pair] = dist
+                distances_matrix[j1_idx, j2_idx] = distances_matrix[j2_idx, j1_idx] = dist
+        return minimum_spanning_tree(distances_matrix).sum()
+
+
+class RecordingMSTAirDistHeuristic(MSTAirDistHeuristic):
+    """Records the states the search estimates, in order."""
+
+    recorded_states = []
+
+    def estimate(self, state: GraphProblemState) -> float:
+        self.recorded_states.append(state)
+        return super(RecordingMSTAirDistHeuristic, self).estimate(state)
+
+
+def measure_calls_rate(heuristic: HeuristicFunction, states) -> float:
+    start = time.perf_counter()
+    for state in states:
+        heuristic.estimate(state)
+    return len(states) / (time.perf_counter() - start)
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    input_file = sys.argv[2] if len(sys.argv) > 2 else 'big_delivery.in'
+
+    roads = load_map_from_csv(map_path)
+    problem = RelaxedDeliveriesProblem(DeliveriesProblemInput.load_from_file(input_file, roads))
+    AStar(RecordingMSTAirDistHeuristic).solve_problem(problem)
+    states = RecordingMSTAirDistHeuristic.recorded_states
+    nr_distinct = len({(state.current_location, state.dropped_so_far) for state in states})
+
+    former, current = FormerMSTAirDistHeuristic(problem), MSTAirDistHeuristic(problem)
+    for state in states:
+        assert abs(former.estimate(state) - current.estimate(state)) < 1e-6
+
+    print('#calls: {}   #distinct (location, remaining drop points): {}'.format(len(states), nr_distinct))
+    print('{:<20} {:>14}'.format('heuristic', 'calls/sec'))
+    for name, heuristic_type in (('former', FormerMSTAirDistHeuristic), ('current', MSTAirDistHeuristic)):
+        print('{:<20} {:>14.0f}'.format(name, measure_calls_rate(heuristic_type(problem), states)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of the open-list engines: the vendored `heapdict` (with decrease-key
+ expressed as extract + push, as the solvers used to do) versus `KeyedPriorityQueue`
+ (with a native decrease-key).
+The operations mix resembles a search: pushes of new keys, decrease-keys of recently
+ pushed keys and pops of the minimum.
+
+Usage:
+    python experiments/open_list_benchmark.py [nr_operations ...]
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from framework.graph_search.utils.heapdict import heapdict
+from framework.graph_search.utils.keyed_priority_queue import KeyedPriorityQueue
+
+PUSH, DECREASE, POP = range(3)
+
+
+def make_operations(nr_operations: int):
+    rnd = random.Random(236501)
+    operations = []
+    nr_pushed = 0
+    for _ in range(nr_operations):
+        draw = rnd.random()
+        if draw < 0.5 or nr_pushed == 0:
+            operations.append((PUSH, nr_pushed, rnd.random()))
+            nr_pushed += 1
+        elif draw < 0.7:
+            key = max(0, nr_pushed - 1 - int(rnd.expovariate(1 / 64)))
+            operations.append((DECREASE, key, rnd.random()))
+        else:
+            operations.append((POP, None, None))
+    return operations
+
+
+def run_heapdict(operations):
+    queue = heapdict()
+    for op, key, priority in operations:
+        if op == PUSH:
+            queue[key] = priority
+        elif op == DECREASE:
+            if key in queue and priority < queue[key]:
+                queue.pop(key)
+                queue[key] = priority
+        elif len(queue) > 0:
+            queue.popitem()
+
+
+def run_keyed_priority_queue(operations):
+    queue = KeyedPriorityQueue()
+    for op, key, priority in operations:
+        if op == PUSH:
+            queue.push(key, key, priority)
+        elif op == DECREASE:
+            if key in queue and priority < queue.priority_of(key):
+                queue.update(key, key, priority)
+        elif not queue.is_empty():
+            queue.pop()
+
+
+def main():
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6, 10 ** 7]
+    print('{:>12} {:>14} {:>14} {:>9}'.format('#operations', 'heapdict [s]', 'keyed [s]', 'speedup'))
+    for nr_operations in sizes:
+        operations = make_operations(nr_operations)
+        times = []
+        for run in (run_heapdict, run_keyed_priority_queue):
+            start = time.perf_counter()
+            run(operations)
+            times.append(time.perf_counter() - start)
+        print('{:>12} {:>14.3f} {:>14.3f} {:>8.1f}x'.format(nr_operations, times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
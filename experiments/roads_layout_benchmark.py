@@ -0,0 +1,74 @@
+"""
+Compares the array-backed (CSR) `Roads` layout with the former layout, in
+ which `Roads` was a dict of `Junction` named-tuples, each holding a list
+ of `Link` named-tuples.
+Reports the memory used by each layout and the `MapProblem` expansion rate.
+
+Usage:
+    python experiments/roads_layout_benchmark.py [map.csv] [nr_expansions]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import MapProblem, MapState
+
+
+def measure_allocated_bytes(make):
+    tracemalloc.start()
+    obj = make()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, allocated
+
+
+def make_dict_layout(roads: Roads):
+    """Materializes the map in the former dict-of-named-tuples layout."""
+    return {junction.index: Junction(junction.index, junction.lat, junction.lon, list(junction.links))
+            for junction in roads.values()}
+
+
+def expand_dict_layout(dict_roads, junction_id: int):
+    """The former `MapProblem.expand_state_with_costs()`, over the dict layout."""
+    junction = dict_roads[junction_id]
+    for link in junction.links:
+        yield MapState(link.target), junction.calc_air_distance_from(dict_roads[link.target])
+
+
+def measure_expansion_rate(expand, junction_ids):
+    start = time.perf_counter()
+    for junction_id in junction_ids:
+        for _ in expand(junction_id):
+            pass
+    return len(junction_ids) / (time.perf_counter() - start)
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_expansions = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    # Not from the cache: its arrays are memory-mapped, so their memory is not allocated (and not traced).
+    roads, csr_bytes = measure_allocated_bytes(lambda: load_map_from_csv(map_path, use_cache=False))
+    dict_roads, dict_bytes = measure_allocated_bytes(lambda: make_dict_layout(roads))
+    nr_links = roads.arrays.nr_links
+
+    print('#junctions: {}   #links: {}'.format(len(roads), nr_links))
+    print('{:<8} {:>12} {:>16} {:>16}'.format('layout', 'memory [MB]', 'bytes per link', 'expansions/sec'))
+
+    random.seed(236501)
+    junction_ids = [random.choice(roads.arrays.junction_ids.tolist()) for _ in range(nr_expansions)]
+    map_problem = MapProblem(roads, junction_ids[0], junction_ids[-1])
+    csr_rate = measure_expansion_rate(lambda jid: map_problem.expand_state_with_costs(MapState(jid)), junction_ids)
+    dict_rate = measure_expansion_rate(lambda jid: expand_dict_layout(dict_roads, jid), junction_ids)
+
+    for name, nr_bytes, rate in (('dict', dict_bytes, dict_rate), ('csr', csr_bytes, csr_rate)):
+        print('{:<8} {:>12.1f} {:>16.1f} {:>16.0f}'.format(name, nr_bytes / 1e6, nr_bytes / nr_links, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measures the memory and the allocation time of search nodes: the slotted `SearchNode`
+ versus the former `SearchNode`, which kept its fields in a per-node `__dict__`.
+First, nodes are allocated in a chain, in isolation. Then, a full-map `UniformCost`
+ search (towards an unreachable target, so that all the reachable junctions are
+ expanded) is run with each node class.
+
+Usage:
+    python experiments/search_node_benchmark.py [map.csv] [nr_nodes]
+"""
+
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+from framework import *
+from framework.graph_search import best_first_search
+from deliveries import MapProblem, MapState
+
+
+class DictSearchNode:
+    """The former `SearchNode` (without `__slots__`)."""
+
+    def __init__(self, state, parent_search_node=None, operator_cost=0, expanding_priority=None):
+        self.state = state
+        self.parent_search_node = parent_search_node
+        self.operator_cost = operator_cost
+        self.cost = None
+        self.expanding_priority = expanding_priority
+
+        self.cost = operator_cost
+        if self.parent_search_node is not None:
+            self.cost += self.parent_search_node.cost
+
+
+def measure_nodes_allocation(node_type, nr_nodes: int):
+    state = MapState(0)
+    tracemalloc.start()
+    start = time.perf_counter()
+    node = None
+    nodes = []
+    for _ in range(nr_nodes):
+        node = node_type(state, node, 1.0)
+        nodes.append(node)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The list of the nodes is not counted.
+    allocated -= sys.getsizeof(nodes)
+    return allocated / nr_nodes, elapsed / nr_nodes
+
+
+def measure_full_map_search(node_type, roads: Roads):
+    best_first_search.SearchNode = node_type
+    try:
+        source_junction_id = next(iter(roads))
+        problem = MapProblem(roads, source_junction_id, -1)  # An unreachable target.
+        tracemalloc.start()
+        result = UniformCost().solve_problem(problem)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Without tracing (tracemalloc slows allocations down).
+        result = UniformCost().solve_problem(problem)
+        return result.nr_expanded_states, peak, result.solving_time
+    finally:
+        best_first_search.SearchNode = SearchNode
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    print('{:<10} {:>16} {:>20}'.format('node', 'bytes per node', 'allocation [ns]'))
+    for name, node_type in (('dict', DictSearchNode), ('slots', SearchNode)):
+        bytes_per_node, seconds_per_node = measure_nodes_allocation(node_type, nr_nodes)
+        print('{:<10} {:>16.1f} {:>20.0f}'.format(name, bytes_per_node, seconds_per_node * 1e9))
+
+    roads = load_map_from_csv(map_path)
+    print()
+    print('{:<10} {:>10} {:>16} {:>10}'.format('node', '#dev', 'peak mem [MB]', 'time [s]'))
+    for name, node_type in (('dict', DictSearchNode), ('slots', SearchNode)):
+        nr_expanded, peak, elapsed = measure_full_map_search(node_type, roads)
+        print('{:<10} {:>10} {:>16.1f} {:>10.2f}'.format(name, nr_expanded, peak / 1e6, elapsed))
+
+
+if __name__ == '__main__':
+    main()
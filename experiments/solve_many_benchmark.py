@@ -0,0 +1,52 @@
+"""
+Measures the speedup of `solve_many()` with the number of worker processes.
+The batch is the weights sweep of `main.py`: A* (with the air-distance heuristic) over
+ the same `MapProblem`, with 20 weights in [0.5, 1], repeated over a few random problems.
+Also verifies that the results do not depend on the number of workers.
+
+Usage:
+    python experiments/solve_many_benchmark.py [map.csv] [nr_problems]
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import MapProblem, AirDistHeuristic
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_problems = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    roads = load_map_from_csv(map_path)
+    rnd = random.Random(236501)
+    junction_ids = roads.arrays.junction_ids.tolist()
+    problems = [MapProblem(roads, rnd.choice(junction_ids), rnd.choice(junction_ids)) for _ in range(nr_problems)]
+    jobs = [(AStar(AirDistHeuristic, weight), problem) for problem in problems for weight in np.linspace(0.5, 1, 20)]
+
+    nr_cpus = os.cpu_count() or 1
+    workers_counts = sorted({1, nr_cpus} | {2 ** i for i in range(nr_cpus.bit_length()) if 2 ** i <= nr_cpus})
+    print('#jobs: {}   #cpus: {}'.format(len(jobs), nr_cpus))
+    print('{:>8} {:>10} {:>9}'.format('workers', 'time [s]', 'speedup'))
+    serial_time = None
+    serial_costs = None
+    for workers in workers_counts:
+        start = time.perf_counter()
+        results = list(solve_many(jobs, workers=workers, ordered=True))
+        elapsed = time.perf_counter() - start
+        costs = [None if res.final_search_node is None else res.final_search_node.cost for _, res in results]
+        if serial_time is None:
+            serial_time, serial_costs = elapsed, costs
+        assert costs == serial_costs
+        print('{:>8} {:>10.2f} {:>8.1f}x'.format(workers, elapsed, serial_time / elapsed))
+
+
+if __name__ == '__main__':
+    main()
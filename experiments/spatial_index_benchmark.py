@@ -0,0 +1,85 @@
+"""
+Compares the queries of the spatial index of a map (`Roads.spatial_index()`) with linear scans of
+ all the junctions, on random coordinates in the bounding box of the map: a scan of the `Junction`
+ objects (`compute_distance()` per junction), and a vectorized scan of the map arrays (`compute_distances()`).
+All the methods must return the same junctions. Prints the mean latency of each query (in microseconds).
+
+Usage:
+    python experiments/spatial_index_benchmark.py [map.csv] [#queries] [radius (meters)]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from framework import *
+from framework.ways import tools
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    nr_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    radius = float(sys.argv[3]) if len(sys.argv) > 3 else 500.
+
+    roads = load_map_from_csv(map_path)
+    start = time.perf_counter()
+    spatial_index = roads.spatial_index()
+    print('spatial index of {} junctions: {:.3f}s'.format(len(roads), time.perf_counter() - start))
+
+    lats, lons, junction_ids = roads.arrays.lats, roads.arrays.lons, roads.arrays.junction_ids
+    rnd = random.Random(Consts.SEED)
+    points = [(rnd.uniform(lats.min(), lats.max()), rnd.uniform(lons.min(), lons.max())) for _ in range(nr_queries)]
+    boxes = [(lat, lon, lat + (lats.max() - lats.min()) / 20, lon + (lons.max() - lons.min()) / 20)
+             for lat, lon in points]
+    junctions = list(roads.values())
+
+    def scan_junctions_nearest(lat, lon):
+        return min(junctions, key=lambda junction: tools.compute_distance((lat, lon), junction.coordinates)).index
+
+    def scan_arrays_distances(lat, lon):
+        return tools.compute_distances(tools.GeodesicTerms.of([lat], [lon]), roads.geodesic_terms)
+
+    def scan_arrays_nearest(lat, lon, k):
+        return junction_ids[np.argsort(scan_arrays_distances(lat, lon), kind='stable')[:k]].tolist()
+
+    def scan_arrays_within_radius(lat, lon):
+        return sorted(junction_ids[scan_arrays_distances(lat, lon) <= radius].tolist())
+
+    def scan_arrays_in_bbox(min_lat, min_lon, max_lat, max_lon):
+        return sorted(junction_ids[(lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)].tolist())
+
+    queries = [
+        ('nearest (k=1)', points, [
+            ('scan junctions', scan_junctions_nearest),
+            ('scan arrays', lambda lat, lon: scan_arrays_nearest(lat, lon, 1)[0]),
+            ('spatial index', lambda lat, lon: spatial_index.nearest(lat, lon)[0][0])]),
+        ('nearest (k=10)', points, [
+            ('scan arrays', lambda lat, lon: scan_arrays_nearest(lat, lon, 10)),
+            ('spatial index', lambda lat, lon: [junction_id for junction_id, _ in spatial_index.nearest(lat, lon, 10)])]),
+        ('within radius ({:g}m)'.format(radius), points, [
+            ('scan arrays', scan_arrays_within_radius),
+            ('spatial index', lambda lat, lon: sorted(junction_id for junction_id, _ in
+                                                      spatial_index.within_radius(lat, lon, radius)))]),
+        ('in bbox (1/400 of the map)', boxes, [
+            ('scan arrays', scan_arrays_in_bbox),
+            ('spatial index', spatial_index.in_bbox)]),
+    ]
+
+    print()
+    print('{:<30} {:<20} {:>12}'.format('query', 'method', 'mean [us]'))
+    for query_name, arguments, methods in queries:
+        results = []
+        for method_name, method in methods:
+            start = time.perf_counter()
+            results.append([method(*args) for args in arguments])
+            print('{:<30} {:<20} {:>12.1f}'.format(query_name, method_name,
+                                                   (time.perf_counter() - start) / len(arguments) * 1e6))
+        assert all(result == results[-1] for result in results), 'All the methods should find the same junctions.'
+
+
+if __name__ == '__main__':
+    main()
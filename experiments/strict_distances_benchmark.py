@@ -0,0 +1,45 @@
+"""
+Compares the two ways `StrictDeliveriesProblem` finds the road distances between stop points:
+ lazily, by an inner A* solve per (location, stop point) pair on a cache miss, versus
+ upfront, by a single Dijkstra sweep per stop point (`precompute_distances=True`).
+
+Usage:
+    python experiments/strict_distances_benchmark.py [map.csv] [deliveries_input.in]
+"""
+
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from framework import *
+from deliveries import *
+
+
+def main():
+    map_path = sys.argv[1] if len(sys.argv) > 1 else Consts.get_data_file_path('tlv.csv')
+    input_name = sys.argv[2] if len(sys.argv) > 2 else 'small_delivery.in'
+    roads = load_map_from_csv(map_path)
+    problem_input = DeliveriesProblemInput.load_from_file(input_name, roads)
+
+    start = time.perf_counter()
+    lazy_problem = StrictDeliveriesProblem(problem_input, roads, inner_problem_solver=AStar(AirDistHeuristic))
+    lazy_result = AStar(MSTAirDistHeuristic).solve_problem(lazy_problem)
+    lazy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    precomputed_problem = StrictDeliveriesProblem(problem_input, roads, inner_problem_solver=AStar(AirDistHeuristic),
+                                                  precompute_distances=True)
+    precompute_time = time.perf_counter() - start
+    precomputed_result = AStar(MSTAirDistHeuristic).solve_problem(precomputed_problem)
+    precomputed_time = time.perf_counter() - start
+
+    print(lazy_result)
+    print(precomputed_result)
+    print('lazy A*:     {:8.2f} sec   ({} inner solves)'.format(lazy_time, lazy_problem.nr_cache_misses))
+    print('precomputed: {:8.2f} sec   ({:.2f} sec of them for the Dijkstra sweeps)'.format(
+        precomputed_time, precompute_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ class Consts:
     STOCH_TEMPERATURE_DECAY_FUNCTION = 0.95
     STOCH_TOP_SCORES_TO_CONSIDER = 5
 
+    SEED = 236501
+
     PROJECT_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '../')
     FRAMEWORK_PATH = os.path.join(PROJECT_PATH, 'framework/')
     DATA_PATH = os.path.join(FRAMEWORK_PATH, 'db/')
@@ -17,7 +19,7 @@ class Consts:
 
     @staticmethod
     def set_seed():
-        np.random.seed(236501)
+        np.random.seed(Consts.SEED)
 
 
 Consts.set_seed()
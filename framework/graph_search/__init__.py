@@ -1,7 +1,14 @@
 
 from .graph_problem_interface import *
+from .best_first_search import BestFirstSearch
 from .uniform_cost import UniformCost
 from .astar import AStar
 from .greedy_stochastic import GreedyStochastic
+from .bidirectional_search import BidirectionalSearch
+from .anytime_astar import *
+from .memory_bounded_search import *
+from .parallel import *
+from .search_observer import *
 
-__all__ = ['UniformCost', 'AStar', 'GreedyStochastic'] + graph_problem_interface.__all__
+__all__ = ['BestFirstSearch', 'UniformCost', 'AStar', 'GreedyStochastic', 'BidirectionalSearch'] + \
+          graph_problem_interface.__all__ + anytime_astar.__all__ + memory_bounded_search.__all__ + parallel.__all__ + search_observer.__all__
@@ -0,0 +1,232 @@
+from .graph_problem_interface import *
+from .best_first_search import SearchNodesPriorityQueue, SearchNodesCollection
+from .utils.timer import Timer
+from typing import Dict, Iterator, List, NamedTuple, Optional
+import itertools
+import math
+import time
+
+__all__ = ['AnytimeSolution', 'AnytimeRepairingAStar']
+
+
+class AnytimeSolution(NamedTuple):
+    """A solution published by an anytime solver (see `AnytimeRepairingAStar.solve_problem_anytime()`)."""
+
+    """The node of the goal. Its cost is the cost of the solution."""
+    final_search_node: SearchNode
+    """The cost of the solution is at most this factor times the optimal cost (1 means optimal)."""
+    suboptimality_bound: float
+    """The weight of the search iteration that has published the solution."""
+    heuristic_weight: float
+    """The time (in seconds) since the search has started."""
+    elapsed: float
+    """The number of states expanded since the search has started."""
+    nr_expanded_states: int
+
+    @property
+    def cost(self) -> float:
+        return self.final_search_node.cost
+
+
+class AnytimeRepairingAStar(GraphProblemSolver):
+    """
+    This class implements the Anytime Repairing A* (ARA*) search algorithm.
+    ARA* runs a series of weighted-A* searches, starting with a high heuristic weight (which finds
+     a solution quickly), and lowering the weight after each search, down to 0.5 (plain A*).
+    Rather than searching from scratch, each search reuses the nodes of the former searches:
+     within a search each state is expanded at most once, and the states whose cost has decreased
+     after they had been expanded are kept aside (the INCONS list) and are moved into open (along
+     with all the states that remained in open, with their priorities updated for the new weight)
+     when the next search starts.
+    With the weight `w` (the priority of a node is ((1-w) * g) + (w * h), as in `AStar`), a search ends
+     with a solution whose cost is at most w / (1 - w) times the optimal cost (when `h` is consistent).
+     A tighter bound is the cost of the solution divided by the smallest g + h in open and INCONS.
+    """
+
+    solver_name = 'ARA*'
+
+    def __init__(self, heuristic_function_type: HeuristicFunctionType,
+                 initial_heuristic_weight: float = 0.8, heuristic_weight_decrement: float = 0.05):
+        """
+        :param heuristic_function_type: The type of the heuristic. In each call to `solve_problem()`
+                                        a heuristic instance is created.
+        :param initial_heuristic_weight: The weight of the first search (in [0.5, 1]).
+        :param heuristic_weight_decrement: The weight is lowered by this amount after each search (down to 0.5).
+        """
+        assert 0.5 <= initial_heuristic_weight <= 1
+        assert heuristic_weight_decrement > 0
+        self.heuristic_function_type = heuristic_function_type
+        self.initial_heuristic_weight = initial_heuristic_weight
+        self.heuristic_weight_decrement = heuristic_weight_decrement
+        self.solver_name += ' (h={heuristic_name}, w={heuristic_weight:.3f}-{heuristic_weight_decrement:.3f})'.format(
+            heuristic_name=heuristic_function_type.heuristic_name,
+            heuristic_weight=initial_heuristic_weight,
+            heuristic_weight_decrement=heuristic_weight_decrement)
+        """The budget of each search, unless another budget is given to `solve_problem()`. `None` is unlimited.
+        Typically, only a deadline (`SearchBudget.time_limit`) is set."""
+        self.budget: Optional[SearchBudget] = None
+        self.nr_expanded_states = 0
+        self.statistics: Optional[SearchStatistics] = None
+        self.termination_reason: Optional[TerminationReason] = None
+        """The solutions published by the last search, in their order."""
+        self.solutions: List[AnytimeSolution] = []
+
+    def solve_problem(self, problem: GraphProblem, budget: Optional[SearchBudget] = None) -> SearchResult:
+        """
+        Improves the solution until it is proven to be optimal, or until the budget has run out.
+        :return: The result of the best solution found (the other solutions are in `self.solutions`).
+        """
+        final_search_node = None
+        with Timer(print_title=False) as timer:
+            for solution in self.solve_problem_anytime(problem, budget):
+                final_search_node = solution.final_search_node
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=self.nr_expanded_states,
+            solving_time=timer.elapsed,
+            statistics=self.statistics,
+            termination_reason=self.termination_reason,
+            best_search_node=final_search_node
+        )
+
+    def solve_problem_anytime(self, problem: GraphProblem,
+                              budget: Optional[SearchBudget] = None) -> Iterator[AnytimeSolution]:
+        """
+        Yields a solution at the end of each search iteration (and a last one, if a better solution
+         has been found by the iteration that the budget has stopped). The solutions only get better:
+         either cheaper or with a tighter bound. The last one has a bound of 1 if the search has proven
+         it is optimal (then, `self.termination_reason` is `GOAL_FOUND`).
+        :param budget: Limits on the resources of the whole anytime search (overrides `self.budget`).
+        """
+        clock = time.perf_counter
+        start_time = clock()
+        budget = self.budget if budget is None else budget
+        budget = SearchBudget() if budget is None else budget
+        max_expansions = math.inf if budget.max_expansions is None else budget.max_expansions
+        max_nodes = math.inf if budget.max_nodes is None else budget.max_nodes
+        deadline = math.inf if budget.time_limit is None else start_time + budget.time_limit
+
+        heuristic_function = self.heuristic_function_type(problem)
+        heuristic_values: Dict[GraphProblemState, float] = {}
+
+        def heuristic_of(state: GraphProblemState) -> float:
+            heuristic_value = heuristic_values.get(state)
+            if heuristic_value is None:
+                heuristic_value = heuristic_values[state] = heuristic_function.estimate(state)
+            return heuristic_value
+
+        def priority_of(node: SearchNode) -> float:
+            return (1 - heuristic_weight) * node.cost + heuristic_weight * heuristic_of(node.state)
+
+        def suboptimality_bound(max_bound: float) -> float:
+            # Each state of an optimal path that has not been expanded with its optimal cost is in open or in
+            #  INCONS, so (as `h` is admissible) the smallest g + h there is a lower bound of the optimal cost.
+            lower_bound = min((node.cost + heuristic_of(node.state)
+                               for node in itertools.chain(open_queue.nodes(), inconsistent_nodes.values())),
+                              default=math.inf)
+            if incumbent.cost == 0:
+                return 1.
+            return max(1., min(max_bound, incumbent.cost / lower_bound if lower_bound > 0 else math.inf))
+
+        def make_solution(bound: float) -> AnytimeSolution:
+            return AnytimeSolution(incumbent, bound, heuristic_weight, clock() - start_time, nr_expanded_states)
+
+        self.statistics = statistics = SearchStatistics()
+        self.solutions = []
+        self.nr_expanded_states = nr_expanded_states = 0
+        self.termination_reason = None
+
+        heuristic_weight = self.initial_heuristic_weight
+        open_queue = SearchNodesPriorityQueue()
+        expanded_nodes = SearchNodesCollection()  # The states expanded by the current iteration (CLOSED).
+        inconsistent_nodes: Dict[GraphProblemState, SearchNode] = {}  # INCONS
+        best_node_by_state: Dict[GraphProblemState, SearchNode] = {}
+        incumbent: Optional[SearchNode] = None
+        published_solution: Optional[AnytimeSolution] = None
+
+        root_node = SearchNode(problem.initial_state)
+        root_node.expanding_priority = priority_of(root_node)
+        best_node_by_state[root_node.state] = root_node
+        open_queue.push_node(root_node)
+        if problem.is_goal(root_node.state):
+            incumbent = root_node
+
+        termination_reason = None
+        while termination_reason is None:
+            # A weighted-A* search, that ends once no node in open is better than the incumbent (whose h is 0).
+            while not open_queue.is_empty():
+                if incumbent is not None and \
+                        (1 - heuristic_weight) * incumbent.cost <= open_queue.peek_next_node().expanding_priority:
+                    break
+                node_to_expand = open_queue.pop_next_node()
+                expanded_nodes.add_node(node_to_expand)
+                nr_expanded_states += 1
+
+                for successor_state, operator_cost in problem.expand_state_with_costs(node_to_expand.state):
+                    statistics.nr_generated_nodes += 1
+                    best_node = best_node_by_state.get(successor_state)
+                    if best_node is not None and best_node.cost <= node_to_expand.cost + operator_cost:
+                        statistics.nr_pruned_duplicates += 1
+                        continue
+                    successor_node = SearchNode(successor_state, node_to_expand, operator_cost)
+                    best_node_by_state[successor_state] = successor_node
+                    if problem.is_goal(successor_state) and (incumbent is None or successor_node.cost < incumbent.cost):
+                        incumbent = successor_node
+                    if expanded_nodes.has_state(successor_state):
+                        statistics.nr_reopened_nodes += 1
+                        inconsistent_nodes[successor_state] = successor_node
+                        continue
+                    successor_node.expanding_priority = priority_of(successor_node)
+                    if open_queue.has_state(successor_state):
+                        open_queue.decrease_priority(successor_node, successor_node.expanding_priority)
+                    else:
+                        open_queue.push_node(successor_node)
+
+                statistics.max_open_size = max(statistics.max_open_size, len(open_queue))
+                if nr_expanded_states >= max_expansions:
+                    termination_reason = TerminationReason.MAX_EXPANSIONS
+                elif len(best_node_by_state) > max_nodes:
+                    termination_reason = TerminationReason.MAX_NODES
+                elif clock() > deadline:
+                    termination_reason = TerminationReason.DEADLINE
+                else:
+                    continue
+                break
+
+            if incumbent is None:
+                termination_reason = termination_reason or TerminationReason.OPEN_EXHAUSTED
+                break
+
+            # The weighted-A* bound holds only for a search that has ended.
+            iteration_bound = math.inf if termination_reason is not None or heuristic_weight == 1 \
+                else heuristic_weight / (1 - heuristic_weight)
+            bound = suboptimality_bound(iteration_bound)
+            if published_solution is None or incumbent is not published_solution.final_search_node or \
+                    bound < published_solution.suboptimality_bound:
+                self.nr_expanded_states = nr_expanded_states
+                published_solution = make_solution(bound)
+                self.solutions.append(published_solution)
+                yield published_solution
+
+            if termination_reason is None and (bound <= 1 or heuristic_weight <= 0.5):
+                termination_reason = TerminationReason.GOAL_FOUND
+            if termination_reason is not None:
+                break
+
+            # The next iteration: a lower weight, and all the states of open and INCONS are in open.
+            # Rounded, so that the weights do not drift away from the multiples of the decrement.
+            heuristic_weight = max(0.5, round(heuristic_weight - self.heuristic_weight_decrement, 12))
+            nodes_to_open = list(itertools.chain(open_queue.nodes(), inconsistent_nodes.values()))
+            open_queue = SearchNodesPriorityQueue()
+            for node in nodes_to_open:
+                node.expanding_priority = priority_of(node)
+                open_queue.push_node(node)
+            expanded_nodes = SearchNodesCollection()
+            inconsistent_nodes = {}
+
+        self.nr_expanded_states = statistics.nr_expanded_states = nr_expanded_states
+        statistics.nr_heuristic_evaluations = len(heuristic_values)
+        self.termination_reason = termination_reason
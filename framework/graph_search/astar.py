@@ -1,5 +1,6 @@
 from .graph_problem_interface import *
 from .best_first_search import BestFirstSearch
+from typing import Optional
 
 
 class AStar(BestFirstSearch):
@@ -46,9 +47,17 @@ class AStar(BestFirstSearch):
         Notice: You may use `search_node.cost`, `self.heuristic_weight`, and `self.heuristic_function`.
         """
         # if self.heuristic_weight != 0 and self.heuristic_function.estimate(search_node.state) == float("inf"):
+        self.statistics.nr_heuristic_evaluations += 1
         expandingPrio = (1-self.heuristic_weight)*search_node.cost+self.heuristic_weight*self.heuristic_function.estimate(search_node.state)
         return expandingPrio
 
+    def _estimate_remaining_cost(self, search_node: SearchNode) -> Optional[float]:
+        if self.heuristic_weight == 0:
+            self.statistics.nr_heuristic_evaluations += 1
+            return self.heuristic_function.estimate(search_node.state)
+        # Recovered from the f-score, rather than estimated again.
+        return (search_node.expanding_priority - (1 - self.heuristic_weight) * search_node.cost) / self.heuristic_weight
+
     def _open_successor_node(self, problem: GraphProblem, successor_node: SearchNode):
         """
         Called by solve_problem() in the implementation of `BestFirstSearch`
@@ -69,13 +78,16 @@ class AStar(BestFirstSearch):
         if self.use_close:
             if self.close.has_state(successor_node.state):
                 if self.close.get_node_by_state(successor_node.state).expanding_priority <= successor_node.expanding_priority:
+                    self.statistics.nr_pruned_duplicates += 1
                     return
                 else:
                     self.close.remove_node(self.close.get_node_by_state(successor_node.state));
+                    self.statistics.nr_reopened_nodes += 1
 
         if self.open.has_state(successor_node.state):
             if successor_node.expanding_priority < self.open.get_node_by_state(successor_node.state).expanding_priority:
-                self.open.extract_node(self.open.get_node_by_state(successor_node.state))
+                self.open.decrease_priority(successor_node, successor_node.expanding_priority)
             else:
-                return
+                self.statistics.nr_pruned_duplicates += 1
+            return
         self.open.push_node(successor_node)
@@ -1,42 +1,66 @@
 from .graph_problem_interface import *
 from .utils.timer import Timer
-from .utils.heapdict import heapdict
-from typing import Optional, Dict
+from .utils.keyed_priority_queue import KeyedPriorityQueue
+from .search_observer import SearchObserver
+from contextlib import closing
+from typing import Optional, Dict, Iterator, List, Sequence
+import copy
+import itertools
+import math
+import time
 import abc
 
 
 class SearchNodesPriorityQueue:
     """
     This class is used as a data structure for the `open` queue in the BestFirstSearch algorithm.
-    Notice that we store a mapping from state to the node represents it for quick operations.
+    Notice that the queue is indexed by the state of the node, for quick operations.
+    Nodes with equal priorities are extracted in the order they have been pushed.
     """
 
     def __init__(self):
-        self._nodes_queue = heapdict()  # node -> priority (selecting the next node to expand is done by this score)
-        self._state_to_search_node_mapping: Dict[GraphProblemState, SearchNode] = {}
+        self._nodes_queue = KeyedPriorityQueue()  # state -> node (selecting the next node to expand is done by its score)
 
     def has_state(self, state: GraphProblemState) -> bool:
-        return state in self._state_to_search_node_mapping
+        return state in self._nodes_queue
 
     def get_node_by_state(self, state: GraphProblemState) -> Optional[SearchNode]:
-        return self._state_to_search_node_mapping.get(state, None)
+        return self._nodes_queue.get(state, None)
 
     def push_node(self, node: SearchNode):
-        assert node.state not in self._state_to_search_node_mapping
-        self._nodes_queue[node] = node.expanding_priority
-        self._state_to_search_node_mapping[node.state] = node
+        self._nodes_queue.push(node.state, node, node.expanding_priority)
 
     def pop_next_node(self) -> SearchNode:
-        node, _ = self._nodes_queue.popitem()
-        del self._state_to_search_node_mapping[node.state]
+        _, node, _ = self._nodes_queue.pop()
+        return node
+
+    def peek_next_node(self) -> SearchNode:
+        _, node, _ = self._nodes_queue.peek()
         return node
 
+    def n_smallest_nodes(self, n: int) -> List[SearchNode]:
+        """Returns the (up to) `n` next nodes to be popped, in their order, without removing them."""
+        return [node for _, node, _ in self._nodes_queue.n_smallest(n)]
+
     def extract_node(self, node: SearchNode):
-        del self._state_to_search_node_mapping[node.state]
-        self._nodes_queue.pop(node)
+        self._nodes_queue.remove(node.state)
+
+    def decrease_priority(self, node: SearchNode, new_priority: float):
+        """
+        Lowers the priority of the node that represents `node.state` in the queue.
+        The given node replaces the node currently stored for this state. It may be
+         the same node, or a better node that has been found for the same state.
+        """
+        assert new_priority <= self._nodes_queue.priority_of(node.state)
+        node.expanding_priority = new_priority
+        self._nodes_queue.update(node.state, node, new_priority)
 
     def is_empty(self) -> bool:
-        return self._nodes_queue.empty()
+        return self._nodes_queue.is_empty()
+
+    def nodes(self) -> Iterator[SearchNode]:
+        """Iterates over the nodes in the queue, in an arbitrary order."""
+        return (node for _, node, _ in self._nodes_queue.items())
 
     def __len__(self):
         return len(self._nodes_queue)
@@ -69,6 +93,46 @@ class SearchNodesCollection:
     def get_node_by_state(self, state: GraphProblemState) -> Optional[SearchNode]:
         return self._state_to_search_node_mapping.get(state, None)
 
+    def nodes(self) -> Iterator[SearchNode]:
+        return iter(self._state_to_search_node_mapping.values())
+
+    def __len__(self):
+        return len(self._state_to_search_node_mapping)
+
+
+class ObservedSearchNodesPriorityQueue(SearchNodesPriorityQueue):
+    """The `open` queue of a search that has observers: notifies them whenever a node enters the queue."""
+
+    def __init__(self, solver: GraphProblemSolver, observers: Sequence[SearchObserver]):
+        super(ObservedSearchNodesPriorityQueue, self).__init__()
+        self._solver = solver
+        self._observers = observers
+
+    def push_node(self, node: SearchNode):
+        super(ObservedSearchNodesPriorityQueue, self).push_node(node)
+        for observer in self._observers:
+            observer.on_node_pushed(self._solver, node)
+
+    def decrease_priority(self, node: SearchNode, new_priority: float):
+        super(ObservedSearchNodesPriorityQueue, self).decrease_priority(node, new_priority)
+        for observer in self._observers:
+            observer.on_node_pushed(self._solver, node)
+
+
+class ObservedSearchNodesCollection(SearchNodesCollection):
+    """The `close` set of a search that has observers: notifies them whenever a closed state is reopened."""
+
+    def __init__(self, solver: GraphProblemSolver, observers: Sequence[SearchObserver]):
+        super(ObservedSearchNodesCollection, self).__init__()
+        self._solver = solver
+        self._observers = observers
+
+    def remove_node(self, node: SearchNode):
+        closed_node = self.get_node_by_state(node.state)
+        super(ObservedSearchNodesCollection, self).remove_node(node)
+        for observer in self._observers:
+            observer.on_node_reopened(self._solver, closed_node)
+
 
 class BestFirstSearch(GraphProblemSolver):
     """
@@ -98,14 +162,130 @@ class BestFirstSearch(GraphProblemSolver):
         self.open: SearchNodesPriorityQueue = None
         self.close: Optional[SearchNodesCollection] = None
         self.use_close = use_close
+        self.nr_expanded_states: int = 0
+        self.statistics: Optional[SearchStatistics] = None
+        self.observers: List[SearchObserver] = []
+        """The budget of each search, unless another budget is given to `solve_problem()`
+        (e.g., for the jobs of `solve_many()`). `None` is unlimited."""
+        self.budget: Optional[SearchBudget] = None
+        self.termination_reason: Optional[TerminationReason] = None
+        self.best_search_node: Optional[SearchNode] = None
+
+    def add_observer(self, observer: SearchObserver):
+        """
+        Registers an observer, that is notified on the events of the next searches of this solver.
+        When the solver has no observers, the search does not pay anything for this feature.
+        Notice: the observers are not pickled along with the solver (e.g., by `solve_many()`).
+        """
+        self.observers.append(observer)
 
-    def solve_problem(self, problem: object) -> object:
+    def remove_observer(self, observer: SearchObserver):
+        self.observers.remove(observer)
+
+    def __getstate__(self):
+        """
+        The data structures of the last search (and the heuristic created for it) are not pickled.
+        The solver is pickled when it is sent to (or returned from) a worker process by `solve_many()`.
+        """
+        state = self.__dict__.copy()
+        state['open'] = None
+        state['close'] = None
+        state['observers'] = []
+        state.pop('heuristic_function', None)
+        return state
+
+    def solve_problem(self, problem: GraphProblem, budget: Optional[SearchBudget] = None) -> SearchResult:
         """
         Implementation of the generic Best First Search algorithm.
+        :param budget: Limits on the resources of the search (overrides `self.budget`).
         """
 
         final_search_node = None
-        nr_expanded_states = 0
+        with Timer(print_title=False) as timer, \
+                closing(self._search_goal_nodes(problem, self.budget if budget is None else budget)) as goal_nodes:
+            for final_search_node in goal_nodes:
+                break
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=self.nr_expanded_states,
+            solving_time=timer.elapsed,
+            statistics=self.statistics,
+            termination_reason=self.termination_reason,
+            best_search_node=self.best_search_node if final_search_node is None else final_search_node
+        )
+
+    def solve_problem_for_all_goals(self, problem: MultiGoalGraphProblem,
+                                    budget: Optional[SearchBudget] = None) -> Dict[GraphProblemState, SearchResult]:
+        """
+        Solves the problem for each of its goal states, by a single search.
+        The search stops once the last goal state has been expanded (or when the open queue is exhausted,
+         or when the budget has run out).
+        :return: A mapping from each goal state to the result of the search for this goal. The number
+                 of expanded states and the solving time of each result are the ones counted until
+                 this goal has been found. Goals that have not been found have no final search node.
+        """
+        remaining_goal_states = set(problem.goal_states)
+        results: Dict[GraphProblemState, SearchResult] = {}
+        with Timer(print_title=False) as timer, \
+                closing(self._search_goal_nodes(problem, self.budget if budget is None else budget)) as goal_nodes:
+            for goal_node in goal_nodes:
+                if goal_node.state not in remaining_goal_states:
+                    continue  # A goal whose node has been reopened and expanded again.
+                remaining_goal_states.remove(goal_node.state)
+                results[goal_node.state] = SearchResult(
+                    solver=self,
+                    problem=problem,
+                    final_search_node=goal_node,
+                    nr_expanded_states=self.nr_expanded_states,
+                    solving_time=time.perf_counter() - timer.start,
+                    statistics=copy.copy(self.statistics),
+                    termination_reason=TerminationReason.GOAL_FOUND,
+                    best_search_node=goal_node
+                )
+                if not remaining_goal_states:
+                    break
+
+        for goal_state in remaining_goal_states:
+            results[goal_state] = SearchResult(
+                solver=self,
+                problem=problem,
+                final_search_node=None,
+                nr_expanded_states=self.nr_expanded_states,
+                solving_time=timer.elapsed,
+                statistics=self.statistics,
+                termination_reason=self.termination_reason,
+                best_search_node=self.best_search_node
+            )
+        return results
+
+    def _search_goal_nodes(self, problem: GraphProblem, budget: Optional[SearchBudget] = None) -> Iterator[SearchNode]:
+        """
+        The main loop of the generic Best First Search algorithm.
+        This is a generator. It yields each goal node at the moment it is extracted from
+         the open queue for expansion. If the caller resumes the generator, the search
+         continues and the goal node is expanded like any other node.
+        The number of expanded states is available in `self.nr_expanded_states` on each yield.
+        When the search is over, the reason is in `self.termination_reason`. If the budget has run out,
+         the most promising node found is in `self.best_search_node`.
+        """
+
+        if self.observers:
+            yield from self._search_goal_nodes_observed(problem, budget)
+            return
+
+        clock = time.perf_counter
+        self.statistics = SearchStatistics()
+        self.nr_expanded_states = 0
+        self.termination_reason = None
+        self.best_search_node = None
+        # The limits are compared on each expansion, so an unlimited budget is an infinite limit.
+        budget = SearchBudget() if budget is None else budget
+        max_expansions = math.inf if budget.max_expansions is None else budget.max_expansions
+        max_nodes = math.inf if budget.max_nodes is None else budget.max_nodes
+        deadline = math.inf if budget.time_limit is None else clock() + budget.time_limit
 
         self.open = SearchNodesPriorityQueue()
         if self.use_close:
@@ -113,37 +293,156 @@ class BestFirstSearch(GraphProblemSolver):
         else:
             self.close = None
         self._init_solver(problem)
+        open_queue, close = self.open, self.close
+
+        initial_search_node = SearchNode(problem.initial_state, None, 0)
+        initial_search_node.expanding_priority = self._calc_node_expanding_priority(initial_search_node)
+        open_queue.push_node(initial_search_node)
+
+        # The statistics are accumulated in local variables (which is cheaper), and stored on each yield.
+        # The time is measured per phase of each expansion (rather than per node): generating the
+        #  successors, creating their nodes, calculating their priorities, and opening them.
+        # The heuristic evaluations are counted by the inheritor algorithm (in `self.statistics`).
+        nr_expanded_states = nr_generated_nodes = max_open_size = max_close_size = 0
+        successors_generation_time = node_creation_time = heuristic_time = queue_operations_time = 0.
+        termination_reason = TerminationReason.OPEN_EXHAUSTED
+
+        def store_statistics():
+            statistics = self.statistics
+            statistics.nr_expanded_states = self.nr_expanded_states = nr_expanded_states
+            statistics.nr_generated_nodes = nr_generated_nodes
+            statistics.max_open_size = max(max_open_size, len(open_queue))
+            statistics.max_close_size = max_close_size
+            statistics.successors_generation_time = successors_generation_time
+            statistics.node_creation_time = node_creation_time
+            statistics.heuristic_time = heuristic_time
+            statistics.queue_operations_time = queue_operations_time
+
+        while True:
+            time_before_extraction = clock()
+            next_node_to_expand = self._extract_next_search_node_to_expand()
+            time_before_expanding = clock()
+            queue_operations_time += time_before_expanding - time_before_extraction
+            if next_node_to_expand is None:
+                break
+
+            # TODO: is it correct to increment here? maybe should be after the `is_goal` check?
+            nr_expanded_states += 1
+
+            if problem.is_goal(next_node_to_expand.state):
+                store_statistics()
+                self.termination_reason = TerminationReason.GOAL_FOUND
+                yield next_node_to_expand
+
+            # Iterate over next states and perform the update step for each.
+            time_before_expanding = clock()
+            successors = list(problem.expand_state_with_costs(next_node_to_expand.state))
+            time_before_nodes = clock()
+            successor_nodes = [SearchNode(successor_state, next_node_to_expand, operator_cost)
+                               for successor_state, operator_cost in successors]
+            time_before_priorities = clock()
+            for successor_node in successor_nodes:
+                successor_node.expanding_priority = self._calc_node_expanding_priority(successor_node)
+            time_before_opening = clock()
+            for successor_node in successor_nodes:
+                self._open_successor_node(problem, successor_node)
+            time_after_opening = clock()
+
+            nr_generated_nodes += len(successor_nodes)
+            successors_generation_time += time_before_nodes - time_before_expanding
+            node_creation_time += time_before_priorities - time_before_nodes
+            heuristic_time += time_before_opening - time_before_priorities
+            queue_operations_time += time_after_opening - time_before_opening
+            open_size = len(open_queue)
+            close_size = 0 if close is None else len(close)
+            if open_size > max_open_size:
+                max_open_size = open_size
+            if close_size > max_close_size:
+                max_close_size = close_size
+
+            if nr_expanded_states >= max_expansions or open_size + close_size > max_nodes \
+                    or time_after_opening > deadline:
+                if nr_expanded_states >= max_expansions:
+                    termination_reason = TerminationReason.MAX_EXPANSIONS
+                elif open_size + close_size > max_nodes:
+                    termination_reason = TerminationReason.MAX_NODES
+                else:
+                    termination_reason = TerminationReason.DEADLINE
+                break
+
+        store_statistics()
+        self.termination_reason = termination_reason
+        if termination_reason.is_budget_exhausted:
+            self.best_search_node = self._find_best_search_node(next_node_to_expand)
+
+    def _find_best_search_node(self, last_expanded_node: SearchNode) -> SearchNode:
+        """
+        The most promising node found by a search that has run out of its budget: the node with
+         the lowest heuristic estimate (see `_estimate_remaining_cost()`) in open and close.
+        For algorithms that do not estimate, it is the last expanded node.
+        """
+        if self._estimate_remaining_cost(last_expanded_node) is None:
+            return last_expanded_node
+        nodes = itertools.chain(self.open.nodes(), () if self.close is None else self.close.nodes())
+        return min(nodes, key=self._estimate_remaining_cost, default=last_expanded_node)
 
-        with Timer(print_title=False) as timer:
-            initial_search_node = SearchNode(problem.initial_state, None, 0)
-            initial_search_node.expanding_priority = self._calc_node_expanding_priority(initial_search_node)
-            self.open.push_node(initial_search_node)
-
-            while True:
-                next_node_to_expand = self._extract_next_search_node_to_expand()
-                if next_node_to_expand is None:
-                    break
-
-                # TODO: is it correct to increment here? maybe should be after the `is_goal` check?
-                nr_expanded_states += 1
-
-                if problem.is_goal(next_node_to_expand.state):
-                    final_search_node = next_node_to_expand
-                    break
-
-                # Iterate over next states and perform the update step for each.
-                for successor_state, operator_cost in problem.expand_state_with_costs(next_node_to_expand.state):
-                    successor_node = SearchNode(successor_state, next_node_to_expand, operator_cost)
-                    successor_node.expanding_priority = self._calc_node_expanding_priority(successor_node)
-                    self._open_successor_node(problem, successor_node)
+    def _estimate_remaining_cost(self, search_node: SearchNode) -> Optional[float]:
+        """
+        The heuristic estimate of the node, used for choosing the best node found by a search
+         that has run out of its budget. `None` for algorithms that do not use a heuristic.
+        This method should be overridden by the inheritor algorithm if it uses a heuristic.
+        """
+        return None
 
-        return SearchResult(
-            solver=self,
-            problem=problem,
-            final_search_node=final_search_node,
-            nr_expanded_states=nr_expanded_states,
-            solving_time=timer.elapsed
-        )
+    def _search_goal_nodes_observed(self, problem: GraphProblem, budget: Optional[SearchBudget]) -> Iterator[SearchNode]:
+        """
+        The main loop of the search, with notifications to the observers.
+        Rather than checking for observers in the main loop, the data structures and the extension
+         points the loop calls are replaced (for the duration of the search) by versions that notify
+         the observers. So, the main loop is the same, and a search without observers pays nothing.
+        """
+        observers = tuple(self.observers)
+        open_successor_node = self._open_successor_node
+        extract_next_search_node_to_expand = self._extract_next_search_node_to_expand
+
+        def observed_open_successor_node(problem_: GraphProblem, successor_node: SearchNode):
+            for observer in observers:
+                observer.on_node_generated(self, successor_node)
+            open_successor_node(problem_, successor_node)
+
+        def observed_extract_next_search_node_to_expand() -> Optional[SearchNode]:
+            node = extract_next_search_node_to_expand()
+            if node is not None:
+                for observer in observers:
+                    observer.on_node_expanded(self, node)
+            return node
+
+        def observed_init_solver(problem_: GraphProblem):
+            # Called by the main loop right after creating `open` and `close`.
+            self.open = ObservedSearchNodesPriorityQueue(self, observers)
+            if self.use_close:
+                self.close = ObservedSearchNodesCollection(self, observers)
+            type(self)._init_solver(self, problem_)
+            for observer in observers:
+                observer.on_search_started(self, problem_)
+
+        # Instance attributes take precedence over the methods of the class.
+        self._open_successor_node = observed_open_successor_node
+        self._extract_next_search_node_to_expand = observed_extract_next_search_node_to_expand
+        self._init_solver = observed_init_solver
+        observed_fields = ('_open_successor_node', '_extract_next_search_node_to_expand', '_init_solver')
+        observers_backup, self.observers = self.observers, []
+        try:
+            for goal_node in self._search_goal_nodes(problem, budget):
+                for observer in observers:
+                    observer.on_goal_found(self, goal_node)
+                yield goal_node
+        finally:
+            self.observers = observers_backup
+            for field in observed_fields:
+                self.__dict__.pop(field, None)
+            for observer in observers:
+                observer.on_search_finished(self, problem)
 
     def _init_solver(self, problem: GraphProblem):
         """
@@ -0,0 +1,127 @@
+from .graph_problem_interface import *
+from .best_first_search import SearchNodesPriorityQueue, SearchNodesCollection
+from .utils.timer import Timer
+from typing import Optional, Tuple
+
+
+class BidirectionalSearch(GraphProblemSolver):
+    """
+    This class implements the bidirectional A* search algorithm (with the null heuristic
+     it is the bidirectional Dijkstra / uniform-cost algorithm).
+    Two searches are performed at the same time: a forward search from the initial state
+     and a backward search from the goal state. The solution is found where they meet.
+
+    The searches are guided by the average of the forward and the backward heuristics:
+     p(s) = (h_forward(s) - h_backward(s)) / 2, where `h_forward` estimates the cost from `s`
+     to the goal and `h_backward` estimates the cost from the initial state to `s`.
+    The priority of a forward node is g(s) + p(s), and of a backward node is g(s) - p(s).
+    When both heuristics are consistent, these priorities are consistent for each direction,
+     so a state is never reopened, and the search may stop as soon as the sum of the two
+     smallest priorities reaches the cost of the best path found so far. The path found is optimal.
+    """
+
+    solver_name = 'Bidirectional'
+
+    def __init__(self, heuristic_function_type: HeuristicFunctionType = NullHeuristic):
+        """
+        :param heuristic_function_type: The type of the heuristic. It is instantiated twice
+                                        in each call to `solve_problem()`: once for the problem
+                                        and once for its reversed problem.
+        """
+        self.heuristic_function_type = heuristic_function_type
+        self.solver_name += ' (h={heuristic_name})'.format(heuristic_name=heuristic_function_type.heuristic_name)
+        self.nr_expanded_states = 0
+
+    def solve_problem(self, problem: BidirectionalGraphProblem) -> SearchResult:
+        assert isinstance(problem, BidirectionalGraphProblem)
+        with Timer(print_title=False) as timer:
+            final_search_node = self._search(problem)
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=self.nr_expanded_states,
+            solving_time=timer.elapsed
+        )
+
+    def _search(self, problem: BidirectionalGraphProblem) -> Optional[SearchNode]:
+        self.nr_expanded_states = 0
+        forward_heuristic = self.heuristic_function_type(problem)
+        backward_heuristic = self.heuristic_function_type(problem.make_reversed_problem())
+
+        def forward_potential(state: GraphProblemState) -> float:
+            return (forward_heuristic.estimate(state) - backward_heuristic.estimate(state)) / 2
+
+        def backward_potential(state: GraphProblemState) -> float:
+            return -forward_potential(state)
+
+        goal_state = problem.goal_state
+        if problem.initial_state == goal_state:
+            return SearchNode(problem.initial_state)
+
+        # Each direction is (open, close, expanding function, potential).
+        directions = [
+            (SearchNodesPriorityQueue(), SearchNodesCollection(), problem.expand_state_with_costs, forward_potential),
+            (SearchNodesPriorityQueue(), SearchNodesCollection(), problem.expand_state_backward_with_costs,
+             backward_potential),
+        ]
+        for (open_queue, _, _, potential), root_state in zip(directions, (problem.initial_state, goal_state)):
+            root_node = SearchNode(root_state)
+            root_node.expanding_priority = potential(root_state)
+            open_queue.push_node(root_node)
+
+        best_cost = float('inf')
+        meeting_nodes: Optional[Tuple[SearchNode, SearchNode]] = None  # (forward node, backward node)
+
+        while not directions[0][0].is_empty() and not directions[1][0].is_empty():
+            if directions[0][0].peek_next_node().expanding_priority + \
+                    directions[1][0].peek_next_node().expanding_priority >= best_cost:
+                break
+
+            # Expand from the side with the smaller open queue. This balances the two searches.
+            direction_idx = 0 if len(directions[0][0]) <= len(directions[1][0]) else 1
+            open_queue, close, expand, potential = directions[direction_idx]
+            other_open, other_close, _, _ = directions[1 - direction_idx]
+
+            node_to_expand = open_queue.pop_next_node()
+            close.add_node(node_to_expand)
+            self.nr_expanded_states += 1
+
+            for successor_state, operator_cost in expand(node_to_expand.state):
+                if close.has_state(successor_state):
+                    continue
+                successor_node = SearchNode(successor_state, node_to_expand, operator_cost)
+                old_node = open_queue.get_node_by_state(successor_state)
+                if old_node is not None:
+                    if successor_node.cost >= old_node.cost:
+                        continue
+                    open_queue.decrease_priority(successor_node, successor_node.cost + potential(successor_state))
+                else:
+                    successor_node.expanding_priority = successor_node.cost + potential(successor_state)
+                    open_queue.push_node(successor_node)
+
+                other_node = other_open.get_node_by_state(successor_state)
+                if other_node is None:
+                    other_node = other_close.get_node_by_state(successor_state)
+                if other_node is not None and successor_node.cost + other_node.cost < best_cost:
+                    best_cost = successor_node.cost + other_node.cost
+                    meeting_nodes = (successor_node, other_node) if direction_idx == 0 else (other_node, successor_node)
+
+        if meeting_nodes is None:
+            return None
+        return self._stitch_path(*meeting_nodes)
+
+    @staticmethod
+    def _stitch_path(forward_node: SearchNode, backward_node: SearchNode) -> SearchNode:
+        """
+        Concatenates the path of the forward search (initial state -> meeting state) with the
+         path of the backward search (meeting state -> goal state) into a chain of search nodes.
+        In the backward search, the operator cost of a node is the cost of the operator that
+         leads from the node's state to its parent's state.
+        """
+        node = forward_node
+        while backward_node.parent_search_node is not None:
+            node = SearchNode(backward_node.parent_search_node.state, node, backward_node.operator_cost)
+            backward_node = backward_node.parent_search_node
+        return node
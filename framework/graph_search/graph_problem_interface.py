@@ -1,5 +1,7 @@
 import abc
-from typing import Iterator, Tuple, Optional, Type, NamedTuple, Union, Callable
+import enum
+import json
+from typing import Iterator, Tuple, Optional, Type, NamedTuple, Union, Callable, FrozenSet, List, Dict
 
 
 """
@@ -7,8 +9,9 @@ We define `__all__` variable in order to set which names will be
 imported when writing (from another file):
 >>> from framework.graph_search.graph_problem_interface import *
 """
-__all__ = ['GraphProblemState', 'GraphProblem', 'GraphProblemStatesPath', 'SearchNode',
-           'SearchResult', 'GraphProblemSolver',
+__all__ = ['GraphProblemState', 'GraphProblem', 'MultiGoalGraphProblem', 'BidirectionalGraphProblem',
+           'GraphProblemStatesPath', 'SearchNode',
+           'SearchStatistics', 'SearchBudget', 'TerminationReason', 'SearchResult', 'GraphProblemSolver',
            'HeuristicFunction', 'HeuristicFunctionType', 'NullHeuristic']
 
 
@@ -17,8 +20,12 @@ class GraphProblemState(abc.ABC):
     This class defines an *interface* used to represent a state of a states-space, as learnt in class.
     Notice that this is an *abstract* class. It does not represent a concrete state.
     The inheritor class must implement the abstract methods defined by this class.
+    This class has no instance fields (`__slots__` is empty), so that an inheritor
+     may define `__slots__` of its own.
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def __eq__(self, other):
         """
@@ -90,6 +97,65 @@ class GraphProblem(abc.ABC):
         return ''
 
 
+class MultiGoalGraphProblem(GraphProblem):
+    """
+    This class defines an *interface* of a problem with an explicit finite set of goal states.
+    Such a problem can be solved for all of its goals by a single search
+     (see `BestFirstSearch.solve_problem_for_all_goals()`).
+    The inheritor class must implement `goal_states` (in addition to `expand_state_with_costs()`).
+    """
+
+    @property
+    @abc.abstractmethod
+    def goal_states(self) -> FrozenSet[GraphProblemState]:
+        """
+        This is an abstract property that must be implemented by the inheritor class.
+        It returns the set of all the goal states of the problem.
+        """
+        ...
+
+    def is_goal(self, state: GraphProblemState) -> bool:
+        return state in self.goal_states
+
+
+class BidirectionalGraphProblem(GraphProblem):
+    """
+    This class defines an *interface* of a problem with a single known goal state, whose
+     states-space can also be traversed backward (from a state to its predecessors).
+    Such a problem can be solved by searching from both ends (see `BidirectionalSearch`).
+    """
+
+    @property
+    @abc.abstractmethod
+    def goal_state(self) -> GraphProblemState:
+        """
+        This is an abstract property that must be implemented by the inheritor class.
+        It returns the single goal state of the problem.
+        """
+        ...
+
+    @abc.abstractmethod
+    def expand_state_backward_with_costs(self, state_to_expand: GraphProblemState) \
+            -> Iterator[Tuple[GraphProblemState, float]]:
+        """
+        This is an abstract method that must be implemented by the inheritor class.
+        This method represents the inverse of the `Succ` function: it iterates over the
+         predecessor states of the given state. For each predecessor, a pair of the
+         predecessor state and the cost of the operator from it to the given state is yielded.
+        """
+        ...
+
+    @abc.abstractmethod
+    def make_reversed_problem(self) -> 'GraphProblem':
+        """
+        This is an abstract method that must be implemented by the inheritor class.
+        It returns the problem of getting from this problem's goal state back to its
+         initial state. It is used for estimating distances *to* the initial state
+         (by a heuristic created for the reversed problem).
+        """
+        ...
+
+
 class GraphProblemStatesPath(Tuple[GraphProblemState]):
     """
     This class represents a path of states.
@@ -113,8 +179,12 @@ class SearchNode:
     A node basically has a state that it represents, and potentially a parent node.
     A node may also have its cost, the cost of the operator performed to reach this node,
     and the f-score of this node (expanding_priority) when needed.
+    A search creates many nodes, so the fields of a node are stored in `__slots__`
+     (without a per-node `__dict__`).
     """
 
+    __slots__ = ('state', 'parent_search_node', 'operator_cost', 'cost', 'expanding_priority')
+
     def __init__(self, state: GraphProblemState,
                  parent_search_node: Optional['SearchNode'] = None,
                  operator_cost: float = 0,
@@ -122,12 +192,8 @@ class SearchNode:
         self.state: GraphProblemState = state
         self.parent_search_node: SearchNode = parent_search_node
         self.operator_cost: float = operator_cost
-        self.cost: Optional[float] = None
         self.expanding_priority: Optional[float] = expanding_priority
-
-        self.cost = operator_cost
-        if self.parent_search_node is not None:
-            self.cost += self.parent_search_node.cost
+        self.cost: float = operator_cost if parent_search_node is None else operator_cost + parent_search_node.cost
 
     def traverse_back_to_root(self) -> Iterator['SearchNode']:
         """
@@ -140,6 +206,15 @@ class SearchNode:
             yield node
             node = node.parent_search_node
 
+    def __reduce__(self):
+        """
+        A node is pickled together with its path from the root, as a flat list (rather than
+         recursively through the parents), so that long paths do not exceed the recursion limit.
+        """
+        path = [(node.state, node.operator_cost, node.expanding_priority) for node in self.traverse_back_to_root()]
+        path.reverse()
+        return _make_search_nodes_path, (path,)
+
     def make_states_path(self) -> GraphProblemStatesPath:
         """
         :return: A path of *states* represented by the nodes
@@ -150,6 +225,87 @@ class SearchNode:
         return GraphProblemStatesPath(path)
 
 
+def _make_search_nodes_path(path: List[Tuple[GraphProblemState, float, Optional[float]]]) -> SearchNode:
+    """This function is for local use only (unpickling). Returns the last node of the path."""
+    node = None
+    for state, operator_cost, expanding_priority in path:
+        node = SearchNode(state, node, operator_cost, expanding_priority)
+    return node
+
+
+class SearchStatistics:
+    """
+    Counters and timers collected by a search (see `BestFirstSearch`), attached to its `SearchResult`.
+    The times are in seconds. Collecting them costs a few clock reads per expanded state,
+     so the statistics are always collected.
+    """
+
+    __slots__ = ('nr_expanded_states', 'nr_generated_nodes', 'nr_pruned_duplicates', 'nr_reopened_nodes',
+                 'nr_heuristic_evaluations', 'max_open_size', 'max_close_size',
+                 'successors_generation_time', 'node_creation_time', 'heuristic_time', 'queue_operations_time')
+
+    def __init__(self):
+        """The number of states extracted from open for expansion."""
+        self.nr_expanded_states: int = 0
+        """The number of successor nodes created."""
+        self.nr_generated_nodes: int = 0
+        """The number of successor nodes dropped because their state already had a node that is as good (in open or close)."""
+        self.nr_pruned_duplicates: int = 0
+        """The number of states that have been moved from close back to open (with a better node)."""
+        self.nr_reopened_nodes: int = 0
+        """The number of calls to `HeuristicFunction.estimate()` (zero for a solver without a heuristic)."""
+        self.nr_heuristic_evaluations: int = 0
+        self.max_open_size: int = 0
+        self.max_close_size: int = 0
+        """The time spent in `problem.expand_state_with_costs()`."""
+        self.successors_generation_time: float = 0.
+        """The time spent in creating the successor nodes."""
+        self.node_creation_time: float = 0.
+        """The time spent in calculating the priorities of the successor nodes (which includes the heuristic)."""
+        self.heuristic_time: float = 0.
+        """The time spent in extracting nodes from open, and in opening nodes (open / close operations)."""
+        self.queue_operations_time: float = 0.
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def to_json(self, **json_dumps_kwargs) -> str:
+        return json.dumps(self.to_dict(), **json_dumps_kwargs)
+
+    def __repr__(self):
+        return 'SearchStatistics({})'.format(', '.join('{}={}'.format(*item) for item in self.to_dict().items()))
+
+
+class SearchBudget(NamedTuple):
+    """
+    Limits on the resources of a single search (see `BestFirstSearch.solve_problem()`). A `None` limit is unlimited.
+    The limits are checked after each expansion. When a limit is reached, the search stops cleanly, and
+     returns a result with no final node, the reason (`SearchResult.termination_reason`) and the best
+     node found so far (`SearchResult.best_search_node`).
+    """
+
+    """The maximal number of expanded states."""
+    max_expansions: Optional[int] = None
+    """The maximal number of nodes in `open` and `close` together (bounds the memory of the search)."""
+    max_nodes: Optional[int] = None
+    """The maximal wall-clock time (in seconds) since the search has started."""
+    time_limit: Optional[float] = None
+
+
+class TerminationReason(enum.Enum):
+    """Why a search has stopped (see `SearchResult.termination_reason`)."""
+
+    GOAL_FOUND = 'goal found'
+    OPEN_EXHAUSTED = 'open exhausted'
+    MAX_EXPANSIONS = 'max expansions'
+    MAX_NODES = 'max nodes'
+    DEADLINE = 'deadline'
+
+    @property
+    def is_budget_exhausted(self) -> bool:
+        return self in (TerminationReason.MAX_EXPANSIONS, TerminationReason.MAX_NODES, TerminationReason.DEADLINE)
+
+
 class SearchResult(NamedTuple):
     """
     It is the type of the object that is returned by `solver.solve_problem()`.
@@ -166,6 +322,13 @@ class SearchResult(NamedTuple):
     nr_expanded_states: int
     """The time (in seconds) took to solve."""
     solving_time: float
+    """Detailed counters and timers of the search, if collected by the solver."""
+    statistics: Optional[SearchStatistics] = None
+    """Why the search has stopped, if reported by the solver."""
+    termination_reason: Optional[TerminationReason] = None
+    """The final node if found. Otherwise, the most promising node found before the search has run out
+    of its budget (see `BestFirstSearch._find_best_search_node()`), if any."""
+    best_search_node: Optional[SearchNode] = None
 
     def __str__(self):
         """
@@ -184,6 +347,8 @@ class SearchResult(NamedTuple):
 
         # no solution found by solver
         if self.final_search_node is None:
+            if self.termination_reason is not None and self.termination_reason.is_budget_exhausted:
+                return res_str + '   NO SOLUTION FOUND ({}) !!!'.format(self.termination_reason.value)
             return res_str + '   NO SOLUTION FOUND !!!'
 
         path = self.make_path()
@@ -234,6 +399,14 @@ class HeuristicFunction(abc.ABC):
     def __init__(self, problem: GraphProblem):
         self.problem = problem
 
+    @classmethod
+    def configured(cls, **params) -> 'HeuristicFunctionType':
+        """
+        Solvers receive the heuristic type, and create the heuristic with the problem only. Returns
+         a heuristic type (a picklable factory) that creates the heuristic with the given parameters as well.
+        """
+        return _ConfiguredHeuristicType(cls, params)
+
     @abc.abstractmethod
     def estimate(self, state: GraphProblemState) -> float:
         """
@@ -249,6 +422,18 @@ already-created instance of the heuristic."""
 HeuristicFunctionType = Union[Type[HeuristicFunction], Callable[[GraphProblem], HeuristicFunction]]
 
 
+class _ConfiguredHeuristicType:
+    """A heuristic type, whose instances are created with the given parameters (see `HeuristicFunction.configured()`)."""
+
+    def __init__(self, heuristic_type: Type[HeuristicFunction], params: dict):
+        self.heuristic_type = heuristic_type
+        self.params = params
+        self.heuristic_name = heuristic_type.heuristic_name
+
+    def __call__(self, problem: GraphProblem) -> HeuristicFunction:
+        return self.heuristic_type(problem, **self.params)
+
+
 class NullHeuristic(HeuristicFunction):
     """
     This is a simple implementation of the null heuristic.
@@ -26,14 +26,17 @@ class GreedyStochastic(BestFirstSearch):
         """
         if self.close.has_state(successor_node.state):
             if self.close.get_node_by_state(successor_node.state).expanding_priority <= successor_node.expanding_priority:
+                self.statistics.nr_pruned_duplicates += 1
                 return
             else:
                 self.close.remove_node(self.close.get_node_by_state(successor_node.state));
+                self.statistics.nr_reopened_nodes += 1
         if self.open.has_state(successor_node.state):
             if successor_node.expanding_priority < self.open.get_node_by_state(successor_node.state).expanding_priority:
-                self.open.extract_node(self.open.get_node_by_state(successor_node.state))
+                self.open.decrease_priority(successor_node, successor_node.expanding_priority)
             else:
-                return
+                self.statistics.nr_pruned_duplicates += 1
+            return
         self.open.push_node(successor_node)
 
 
@@ -42,69 +45,42 @@ class GreedyStochastic(BestFirstSearch):
         TODO: implement this method!
         Remember: `GreedyStochastic` is greedy.
         """
+        self.statistics.nr_heuristic_evaluations += 1
         return self.heuristic_function.estimate(search_node.state);
 
+    def _estimate_remaining_cost(self, search_node: SearchNode) -> Optional[float]:
+        return search_node.expanding_priority
+
     def _extract_next_search_node_to_expand(self) -> Optional[SearchNode]:
         """
         Extracts the next node to expand from the open queue,
          using the stochastic method to choose out of the N
          best items from open.
-        TODO: implement this method!
+        The N best nodes are peeked at (see `SearchNodesPriorityQueue.n_smallest_nodes()`),
+         so choosing costs O(N log N) rather than draining the whole open queue.
+        If some of these nodes have a zero priority, one of them is chosen uniformly.
+        Otherwise, the probability of a node with priority x is proportional to x^(-1/T).
         Use `np.random.choice(...)` whenever you need to randomly choose
          an item from an array of items given a probabilities array `p`.
-        You can read the documentation of `np.random.choice(...)` and
-         see usage examples by searching it in Google.
-        Notice: You might want to pop min(N, len(open) items from the
-                `open` priority queue, and then choose an item out
-                of these popped items. The other items have to be
-                pushed again into that queue.
         """
         if self.open.is_empty():
-            return
-        bestFiveList = []
-        toreturnQ = []
+            return None
 
-        while  not self.open.is_empty():
-            popedFromOpen = self.open.pop_next_node()
-            if len(bestFiveList) < self.N:
-                bestFiveList.append(popedFromOpen)
-            else:
-                i_replace = 0
-                max = bestFiveList[i_replace].expanding_priority
-                for i in range (1, len(bestFiveList)):
-                    if bestFiveList[i].expanding_priority > max:
-                        i_replace = i
-                        max = bestFiveList[i].expanding_priority
-                if popedFromOpen.expanding_priority < max:
-                    bestFiveList[i_replace] = popedFromOpen
-
-            toreturnQ.append(popedFromOpen)
-
-        for retrunNode in toreturnQ:
-            self.open.push_node(retrunNode)
-
-        bestFiveArr = np.empty(shape=0, dtype=SearchNode)
-        bestFiveArrCheck = np.empty(shape=0, dtype=SearchNode)
-        costArr = []
-        pArr = np.empty(shape=0, dtype=float)
-        for node in bestFiveList:
-            bestFiveArr = np.append(bestFiveArr,node)
-            costArr.append(node.expanding_priority)
-        if costArr.count(0) != 0:
-            for node in bestFiveArr:
-                if node.expanding_priority == 0:
-                    bestFiveArrCheck = np.append(bestFiveArrCheck,node)
-            pArr = None
+        best_nodes = self.open.n_smallest_nodes(self.N)
+        priorities = np.array([node.expanding_priority for node in best_nodes], dtype=np.float64)
+        is_zero = priorities == 0
+        if is_zero.any():
+            best_nodes = [node for node, node_is_zero in zip(best_nodes, is_zero) if node_is_zero]
+            probabilities = None
         else:
-            bestFiveArrCheck = bestFiveArr
-            denominator = 0
-            for x_mechane in costArr:
-                denominator += (x_mechane ** (-1 / self.T))
-            for cost in costArr:
-                pArr = np.append(pArr, ((cost ** (-1 / self.T)) / denominator))
-        chosenNode = np.random.choice(bestFiveArrCheck,None,True,pArr)
-        self.open.extract_node(chosenNode)
-        self.close.add_node(chosenNode)
-        self.T = self.T *0.95
+            # Dividing by the smallest priority does not change the distribution, but keeps
+            #  the powers from underflowing to zero as the temperature decreases.
+            scores = (priorities / priorities.min()) ** (-1 / self.T)
+            probabilities = scores / scores.sum()
+        chosen_node = best_nodes[np.random.choice(len(best_nodes), None, True, probabilities)]
+
+        self.open.extract_node(chosen_node)
+        self.close.add_node(chosen_node)
+        self.T = self.T * self.T_scale_factor
 
-        return chosenNode
+        return chosen_node
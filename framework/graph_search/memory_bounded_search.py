@@ -0,0 +1,470 @@
+from .graph_problem_interface import *
+from .utils.timer import Timer
+from typing import Dict, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+import math
+import time
+
+__all__ = ['IDAStar', 'SMAStar']
+
+
+class _SearchLimits:
+    """The expansions and time limits of a search (see `SearchBudget`), checked after each expansion."""
+
+    def __init__(self, budget: Optional[SearchBudget]):
+        budget = SearchBudget() if budget is None else budget
+        self.max_expansions = math.inf if budget.max_expansions is None else budget.max_expansions
+        self.deadline = math.inf if budget.time_limit is None else time.perf_counter() + budget.time_limit
+
+    def exhausted(self, nr_expanded_states: int) -> Optional[TerminationReason]:
+        if nr_expanded_states >= self.max_expansions:
+            return TerminationReason.MAX_EXPANSIONS
+        if time.perf_counter() > self.deadline:
+            return TerminationReason.DEADLINE
+        return None
+
+
+class IDAStar(GraphProblemSolver):
+    """
+    This class implements the Iterative-Deepening A* (IDA*) search algorithm.
+    IDA* runs a series of depth-first searches, each of which prunes the nodes whose
+     f-score (g + h) exceeds a threshold. The first threshold is the f-score of the initial
+     state, and each next threshold is the smallest f-score that has been pruned by the former
+     search. Hence, with an admissible heuristic, the first goal found is optimal.
+    The memory is linear in the depth of the solution: only the current path (with the
+     successors that are yet to be visited) is kept. As a depth-first search cannot tell
+     that it reaches a state by two different paths, the same states may be expanded many
+     times; the optional transposition table remembers the cheapest cost each state has been
+     reached with in the current search, and prunes the nodes that are not cheaper.
+    When the operator costs are real numbers, each search may pass the former threshold
+     by very little. `min_threshold_growth` makes each threshold at least this factor larger
+     than the former, at the price of a solution that may be up to this factor costlier than
+     the optimal one.
+    The budget (see `SearchBudget`) may limit the expansions and the time. The memory
+     is bounded by the algorithm itself, so `SearchBudget.max_nodes` is not used.
+    """
+
+    solver_name = 'IDA*'
+
+    def __init__(self, heuristic_function_type: HeuristicFunctionType,
+                 transposition_table_size: Optional[int] = None, min_threshold_growth: float = 0.):
+        """
+        :param heuristic_function_type: The type of the heuristic. In each call to `solve_problem()`
+                                        a heuristic instance is created.
+        :param transposition_table_size: The max #states in the transposition table (once it is full,
+                                         states are no longer added). `None` means no transposition table.
+        :param min_threshold_growth: Each threshold is at least (1 + min_threshold_growth) times the former.
+        """
+        assert transposition_table_size is None or transposition_table_size >= 0
+        assert min_threshold_growth >= 0
+        self.heuristic_function_type = heuristic_function_type
+        self.transposition_table_size = transposition_table_size
+        self.min_threshold_growth = min_threshold_growth
+        self.solver_name += ' (h={heuristic_name}{tt})'.format(
+            heuristic_name=heuristic_function_type.heuristic_name,
+            tt='' if transposition_table_size is None else ', tt={}'.format(transposition_table_size))
+        """The budget of each search, unless another budget is given to `solve_problem()`. `None` is unlimited."""
+        self.budget: Optional[SearchBudget] = None
+        self.nr_expanded_states = 0
+        self.nr_iterations = 0
+        self.statistics: Optional[SearchStatistics] = None
+        self.termination_reason: Optional[TerminationReason] = None
+
+    def solve_problem(self, problem: GraphProblem, budget: Optional[SearchBudget] = None) -> SearchResult:
+        """
+        :param budget: Limits on the resources of the whole search (overrides `self.budget`).
+        """
+        with Timer(print_title=False) as timer:
+            final_search_node = self._search(problem, self.budget if budget is None else budget)
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=self.nr_expanded_states,
+            solving_time=timer.elapsed,
+            statistics=self.statistics,
+            termination_reason=self.termination_reason,
+            best_search_node=final_search_node
+        )
+
+    def _search(self, problem: GraphProblem, budget: Optional[SearchBudget]) -> Optional[SearchNode]:
+        limits = _SearchLimits(budget)
+        heuristic_function = self.heuristic_function_type(problem)
+        self.statistics = statistics = SearchStatistics()
+        self.nr_expanded_states = self.nr_iterations = 0
+        self.termination_reason = None
+
+        root_node = SearchNode(problem.initial_state)
+        statistics.nr_heuristic_evaluations += 1
+        threshold = heuristic_function.estimate(root_node.state)
+        if problem.is_goal(root_node.state):
+            self.termination_reason = TerminationReason.GOAL_FOUND
+            return root_node
+
+        final_search_node = None
+        while final_search_node is None and self.termination_reason is None:
+            self.nr_iterations += 1
+            final_search_node, next_threshold = self._depth_first_search(
+                problem, heuristic_function, root_node, threshold, limits)
+            if final_search_node is not None:
+                self.termination_reason = TerminationReason.GOAL_FOUND
+            elif self.termination_reason is None and next_threshold == math.inf:
+                self.termination_reason = TerminationReason.OPEN_EXHAUSTED
+            threshold = max(next_threshold, threshold * (1 + self.min_threshold_growth))
+
+        statistics.nr_expanded_states = self.nr_expanded_states
+        return final_search_node
+
+    def _depth_first_search(self, problem: GraphProblem, heuristic_function: HeuristicFunction,
+                            root_node: SearchNode, threshold: float,
+                            limits: _SearchLimits) -> Tuple[Optional[SearchNode], float]:
+        """
+        A depth-first search that prunes the nodes whose f-score exceeds the threshold.
+        The successors of each node are visited in the order of their f-scores.
+        :return: The goal node (or `None`), and the smallest f-score that has been pruned.
+        """
+        statistics = self.statistics
+        transposition_table: Optional[Dict[GraphProblemState, float]] = \
+            None if self.transposition_table_size is None else {}
+        next_threshold = math.inf
+        path_states = {root_node.state}
+        stack: List[Tuple[SearchNode, Iterator[Tuple[float, int, SearchNode]]]] = \
+            [(root_node, self._expand(problem, heuristic_function, root_node))]
+
+        while stack:
+            node, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                stack.pop()
+                path_states.discard(node.state)
+                continue
+            successor_f, _, successor_node = successor
+            if successor_f > threshold:
+                # The successors are sorted, so the rest of them are pruned as well.
+                next_threshold = min(next_threshold, successor_f)
+                stack.pop()
+                path_states.discard(node.state)
+                continue
+            if problem.is_goal(successor_node.state):
+                return successor_node, next_threshold
+            if successor_node.state in path_states:
+                statistics.nr_pruned_duplicates += 1
+                continue
+            if transposition_table is not None:
+                best_cost = transposition_table.get(successor_node.state)
+                if best_cost is not None and best_cost <= successor_node.cost:
+                    statistics.nr_pruned_duplicates += 1
+                    continue
+                if best_cost is not None or len(transposition_table) < self.transposition_table_size:
+                    transposition_table[successor_node.state] = successor_node.cost
+
+            stack.append((successor_node, self._expand(problem, heuristic_function, successor_node)))
+            path_states.add(successor_node.state)
+            statistics.max_open_size = max(statistics.max_open_size, len(stack))
+            if transposition_table is not None:
+                statistics.max_close_size = max(statistics.max_close_size, len(transposition_table))
+            self.termination_reason = limits.exhausted(self.nr_expanded_states)
+            if self.termination_reason is not None:
+                break
+
+        return None, next_threshold
+
+    def _expand(self, problem: GraphProblem, heuristic_function: HeuristicFunction,
+                node: SearchNode) -> Iterator[Tuple[float, int, SearchNode]]:
+        """Expands the node, and returns its successors (f-score, index, node) sorted by their f-scores."""
+        self.nr_expanded_states += 1
+        successors = []
+        for successor_state, operator_cost in problem.expand_state_with_costs(node.state):
+            successor_node = SearchNode(successor_state, node, operator_cost)
+            successor_f = successor_node.cost + heuristic_function.estimate(successor_state)
+            successors.append((successor_f, len(successors), successor_node))
+        self.statistics.nr_generated_nodes += len(successors)
+        self.statistics.nr_heuristic_evaluations += len(successors)
+        successors.sort()
+        return iter(successors)
+
+
+class _SMAStarNode:
+    """A node of the search tree that `SMAStar` keeps in memory."""
+
+    __slots__ = ('search_node', 'parent', 'depth', 'f', 'successors', 'next_successor_idx', 'successors_f',
+                 'children', 'forgotten_f', 'version', 'in_memory')
+
+    def __init__(self, search_node: SearchNode, parent: Optional['_SMAStarNode'], f: float):
+        self.search_node = search_node
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        """A lower bound of the cost of the solutions through this node."""
+        self.f = f
+        """The successors (state, operator cost) to generate, from the last expansion of the state, until all
+        of them have been generated (then, it is emptied)."""
+        self.successors: Optional[List[Tuple[GraphProblemState, float]]] = None
+        """The successors before this index have been generated."""
+        self.next_successor_idx = 0
+        """A lower bound of the cost of the solutions through the successors to generate."""
+        self.successors_f = f
+        self.children: Dict[GraphProblemState, '_SMAStarNode'] = {}
+        """The smallest lower bound (f-score) of the successors that have been removed from memory."""
+        self.forgotten_f = math.inf
+        """Bumped whenever the priorities of the node change (the older heap entries of the node are stale)."""
+        self.version = 0
+        self.in_memory = True
+
+    @property
+    def state(self) -> GraphProblemState:
+        return self.search_node.state
+
+    def is_fully_expanded(self) -> bool:
+        """Whether all the successors have been generated (at least once)."""
+        return self.successors is not None and self.next_successor_idx == len(self.successors)
+
+    def has_successors_to_generate(self) -> bool:
+        return not self.is_fully_expanded() or self.forgotten_f < math.inf
+
+    def priority(self) -> float:
+        """A lower bound of the cost of the solutions through the successors that are not in memory."""
+        if not self.is_fully_expanded():
+            return self.successors_f
+        return self.forgotten_f
+
+
+class SMAStar(GraphProblemSolver):
+    """
+    This class implements the Simplified Memory-bounded A* (SMA*) search algorithm.
+    SMA* is an A* tree search that keeps at most `max_nodes` nodes in memory. It generates one
+     successor at a time (of the node whose f-score is the smallest, the deepest among equals),
+     and when the memory is full, it removes the leaf whose f-score is the largest (the shallowest
+     among equals). The f-score of a removed node is remembered by its parent, as a lower bound
+     of the solutions through the removed node, so that the parent regenerates it once the other
+     nodes turn out to be worse. The f-scores are made monotone along the paths (pathmax).
+    With an admissible heuristic, SMA* finds an optimal solution if the path to it fits in the
+     memory (its depth is smaller than `max_nodes`), and it behaves like A* if the whole search
+     fits in the memory. A successor whose state has a node in memory that is as cheap is dropped.
+    The budget (see `SearchBudget`) may limit the expansions and the time. The memory
+     is bounded by `max_nodes`, so `SearchBudget.max_nodes` is not used.
+    """
+
+    solver_name = 'SMA*'
+
+    def __init__(self, heuristic_function_type: HeuristicFunctionType, max_nodes: int = 100000):
+        """
+        :param heuristic_function_type: The type of the heuristic. In each call to `solve_problem()`
+                                        a heuristic instance is created.
+        :param max_nodes: The max #nodes kept in memory.
+        """
+        assert max_nodes >= 2
+        self.heuristic_function_type = heuristic_function_type
+        self.max_nodes = max_nodes
+        self.solver_name += ' (h={heuristic_name}, max_nodes={max_nodes})'.format(
+            heuristic_name=heuristic_function_type.heuristic_name, max_nodes=max_nodes)
+        """The budget of each search, unless another budget is given to `solve_problem()`. `None` is unlimited."""
+        self.budget: Optional[SearchBudget] = None
+        self.nr_expanded_states = 0
+        """The number of nodes that have been removed from memory to make room for others."""
+        self.nr_forgotten_nodes = 0
+        self.statistics: Optional[SearchStatistics] = None
+        self.termination_reason: Optional[TerminationReason] = None
+
+    def solve_problem(self, problem: GraphProblem, budget: Optional[SearchBudget] = None) -> SearchResult:
+        """
+        :param budget: Limits on the resources of the whole search (overrides `self.budget`).
+        """
+        with Timer(print_title=False) as timer:
+            final_search_node = self._search(problem, self.budget if budget is None else budget)
+
+        return SearchResult(
+            solver=self,
+            problem=problem,
+            final_search_node=final_search_node,
+            nr_expanded_states=self.nr_expanded_states,
+            solving_time=timer.elapsed,
+            statistics=self.statistics,
+            termination_reason=self.termination_reason,
+            best_search_node=final_search_node
+        )
+
+    def _search(self, problem: GraphProblem, budget: Optional[SearchBudget]) -> Optional[SearchNode]:
+        limits = _SearchLimits(budget)
+        heuristic_function = self.heuristic_function_type(problem)
+        self.statistics = statistics = SearchStatistics()
+        self.nr_expanded_states = self.nr_forgotten_nodes = 0
+        self.termination_reason = None
+
+        # Both heaps are lazily invalidated: an entry is stale once the version of its node has changed.
+        open_heap: List[Tuple[float, int, int, int, _SMAStarNode]] = []  # (priority, -depth, -sequence, version, node)
+        leaves_heap: List[Tuple[float, int, int, int, _SMAStarNode]] = []  # (-priority, depth, sequence, version, node)
+        sequence = itertools.count()
+        nr_nodes_in_memory = 0
+        # The cheapest node in memory of each state. A successor that is not cheaper than it is dropped: the
+        #  solutions through the successor are matched by the solutions through that node (if that node is
+        #  removed from memory later, its parent remembers it, and regenerates it when needed).
+        best_node_by_state: Dict[GraphProblemState, _SMAStarNode] = {}
+
+        def refresh(node: _SMAStarNode):
+            """Pushes the entries of the node, after its priority (or whether it is a leaf) has changed."""
+            node.version += 1
+            priority = node.priority()
+            node_sequence = next(sequence)
+            if node.has_successors_to_generate():
+                heapq.heappush(open_heap, (priority, -node.depth, -node_sequence, node.version, node))
+            if not node.children:
+                heapq.heappush(leaves_heap, (-priority, node.depth, node_sequence, node.version, node))
+            if len(open_heap) + len(leaves_heap) > 4 * nr_nodes_in_memory + 64:
+                compact_heaps()
+
+        def compact_heaps():
+            open_heap[:] = [entry for entry in open_heap if is_open_entry_valid(entry)]
+            heapq.heapify(open_heap)
+            leaves_heap[:] = [entry for entry in leaves_heap if is_leaf_entry_valid(entry)]
+            heapq.heapify(leaves_heap)
+
+        def is_open_entry_valid(entry) -> bool:
+            node = entry[-1]
+            return node.in_memory and node.version == entry[-2] and node.has_successors_to_generate()
+
+        def is_leaf_entry_valid(entry) -> bool:
+            node = entry[-1]
+            return node.in_memory and node.version == entry[-2] and not node.children
+
+        def peek_best_node() -> Optional[_SMAStarNode]:
+            while open_heap and not is_open_entry_valid(open_heap[0]):
+                heapq.heappop(open_heap)
+            return open_heap[0][-1] if open_heap else None
+
+        def remove_worst_leaf(node_to_keep: _SMAStarNode) -> bool:
+            """Removes the worst leaf (other than the root and `node_to_keep`) from memory."""
+            nonlocal nr_nodes_in_memory
+            kept_entries = []
+            removed = False
+            while leaves_heap:
+                entry = heapq.heappop(leaves_heap)
+                if not is_leaf_entry_valid(entry):
+                    continue
+                leaf = entry[-1]
+                if leaf is node_to_keep or leaf.parent is None:
+                    kept_entries.append(entry)
+                    continue
+                leaf.in_memory = False
+                nr_nodes_in_memory -= 1
+                if best_node_by_state.get(leaf.state) is leaf:
+                    del best_node_by_state[leaf.state]
+                parent = leaf.parent
+                del parent.children[leaf.state]
+                parent.forgotten_f = min(parent.forgotten_f, max(parent.f, leaf.f, leaf.priority()))
+                refresh(parent)
+                self.nr_forgotten_nodes += 1
+                removed = True
+                break
+            for entry in kept_entries:
+                heapq.heappush(leaves_heap, entry)
+            return removed
+
+        def ancestor_states(node: _SMAStarNode) -> Iterator[GraphProblemState]:
+            while node is not None:
+                yield node.state
+                node = node.parent
+
+        def generate_successor(node: _SMAStarNode) -> Optional[Tuple[GraphProblemState, float, float]]:
+            """Picks the next successor of the node to generate: (state, operator cost, lower bound)."""
+            if node.is_fully_expanded():
+                if node.forgotten_f == math.inf:
+                    return None
+                # The state is expanded again, to regenerate the successors that have been removed from memory.
+                node.successors = None
+                node.successors_f, node.forgotten_f = node.forgotten_f, math.inf
+            if node.successors is None:
+                path_states = set(ancestor_states(node))
+                node.successors = []
+                node.next_successor_idx = 0
+                for successor_state, operator_cost in problem.expand_state_with_costs(node.state):
+                    # Tree search: a path that goes back to a state of itself is never the cheapest.
+                    if successor_state in path_states:
+                        statistics.nr_pruned_duplicates += 1
+                        continue
+                    if successor_state not in node.children:
+                        node.successors.append((successor_state, operator_cost))
+                self.nr_expanded_states += 1
+                if node.is_fully_expanded():
+                    return None
+            successor_state, operator_cost = node.successors[node.next_successor_idx]
+            node.next_successor_idx += 1
+            if node.is_fully_expanded():
+                # The successors are not kept: the forgotten ones are regenerated by expanding the state again.
+                node.successors, node.next_successor_idx = [], 0
+            return successor_state, operator_cost, node.successors_f
+
+        root_search_node = SearchNode(problem.initial_state)
+        statistics.nr_heuristic_evaluations += 1
+        root = _SMAStarNode(root_search_node, None, heuristic_function.estimate(root_search_node.state))
+        nr_nodes_in_memory = 1
+        best_node_by_state[root.state] = root
+        refresh(root)
+
+        final_search_node = None
+        while True:
+            node = peek_best_node()
+            if node is None or node.priority() == math.inf:
+                self.termination_reason = TerminationReason.OPEN_EXHAUSTED
+                break
+            if problem.is_goal(node.state):
+                final_search_node = node.search_node
+                self.termination_reason = TerminationReason.GOAL_FOUND
+                break
+
+            successor = generate_successor(node)
+            if successor is None:
+                self._backup(node, refresh)
+                refresh(node)
+                continue
+            successor_state, operator_cost, lower_bound = successor
+            successor_search_node = SearchNode(successor_state, node.search_node, operator_cost)
+            statistics.nr_generated_nodes += 1
+            best_node = best_node_by_state.get(successor_state)
+            if best_node is not None and best_node.search_node.cost <= successor_search_node.cost:
+                statistics.nr_pruned_duplicates += 1
+                self._backup(node, refresh)
+                refresh(node)
+                continue
+            statistics.nr_heuristic_evaluations += 1
+            successor_f = max(lower_bound, successor_search_node.cost + heuristic_function.estimate(successor_state))
+            if node.depth + 1 >= self.max_nodes - 1 and not problem.is_goal(successor_state):
+                # The path cannot be extended any further within the memory.
+                successor_f = math.inf
+
+            if nr_nodes_in_memory >= self.max_nodes and not remove_worst_leaf(node):
+                # The memory is full with the path to the node: the successor is dropped.
+                self._backup(node, refresh)
+                refresh(node)
+                continue
+            successor_node = _SMAStarNode(successor_search_node, node, successor_f)
+            node.children[successor_state] = successor_node
+            nr_nodes_in_memory += 1
+            best_node_by_state[successor_state] = successor_node
+            refresh(successor_node)
+            self._backup(node, refresh)
+            refresh(node)
+
+            statistics.max_open_size = max(statistics.max_open_size, nr_nodes_in_memory)
+            self.termination_reason = limits.exhausted(self.nr_expanded_states)
+            if self.termination_reason is not None:
+                break
+
+        statistics.nr_expanded_states = self.nr_expanded_states
+        return final_search_node
+
+    @staticmethod
+    def _backup(node: _SMAStarNode, refresh):
+        """
+        Once all the successors of the node have been generated, raises the f-scores of the node
+         and of its ancestors to the smallest f-score of their successors.
+        """
+        while node is not None and node.is_fully_expanded():
+            backed_up_f = min((child.f for child in node.children.values()), default=math.inf)
+            backed_up_f = min(backed_up_f, node.forgotten_f)
+            if backed_up_f <= node.f:
+                break
+            node.f = backed_up_f
+            refresh(node)
+            node = node.parent
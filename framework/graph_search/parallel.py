@@ -0,0 +1,69 @@
+from .graph_problem_interface import *
+from ..consts import Consts
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Tuple
+import copy
+import os
+import random
+import numpy as np
+
+__all__ = ['SolveJob', 'solve_many']
+
+"""A job is a solver and a problem to solve with it."""
+SolveJob = Tuple[GraphProblemSolver, GraphProblem]
+
+
+def _solve_job(job_index: int, solver: GraphProblemSolver, problem: GraphProblem, seed: int) \
+        -> Tuple[int, SearchResult]:
+    """This function is for local use only. It runs in the worker processes (or in this process)."""
+    np.random.seed(seed)
+    random.seed(seed)
+    return job_index, solver.solve_problem(problem)
+
+
+def solve_many(jobs: Iterable[SolveJob], workers: Optional[int] = None,
+               ordered: bool = False, seed: int = Consts.SEED) -> Iterator[Tuple[int, SearchResult]]:
+    """
+    Solves independent (solver, problem) jobs in parallel, by a pool of worker processes.
+    This is a generator. It yields a pair of (job index, search result) for each job, as
+     soon as the job is done (or in the order of the jobs, if `ordered` is set).
+
+    The random generators (`np.random` and `random`) are seeded by `seed + job index` before
+     each job is solved, so the result of each job does not depend on the number of workers
+     or on the order in which the jobs are executed. The random generators of this process are
+     not affected (also when the jobs are solved in this process).
+    Each job is solved by its own copy of the solver. Hence, the same solver object may be
+     used in several jobs (and its state is not shared between them).
+
+    The jobs (and the results) are pickled. A map loaded by `load_map_from_csv()` is pickled
+     by reference, so it is loaded at most once per worker (see `Roads.__reduce__`).
+
+    :param workers: The number of worker processes (default: the number of CPUs).
+                    With a single worker, the jobs are solved in this process.
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    if workers == 1:
+        for job_index, (solver, problem) in enumerate(jobs):
+            # The jobs run in this process, so the state of its random generators is restored after each job.
+            np_random_state, random_state = np.random.get_state(), random.getstate()
+            try:
+                result = _solve_job(job_index, copy.deepcopy(solver), problem, seed + job_index)
+            finally:
+                np.random.set_state(np_random_state)
+                random.setstate(random_state)
+            yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_solve_job, job_index, solver, problem, seed + job_index)
+                   for job_index, (solver, problem) in enumerate(jobs)]
+        if ordered:
+            for future in futures:
+                yield future.result()
+        else:
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,40 @@
+from .graph_problem_interface import *
+
+__all__ = ['SearchObserver']
+
+
+class SearchObserver:
+    """
+    An observer of the searches of a `BestFirstSearch` solver (see `BestFirstSearch.add_observer()`).
+    Used to attach instrumentation (progress logging, metrics export, frontier sampling, ...)
+     to any of the best first search solvers, without subclassing them.
+    Each method is called on the corresponding event of the search, and does nothing by default.
+    The inheritor observer overrides the methods of the events it is interested in.
+    """
+
+    def on_search_started(self, solver: GraphProblemSolver, problem: GraphProblem):
+        """Called once, after the search data structures have been created and before the initial node is pushed."""
+
+    def on_node_generated(self, solver: GraphProblemSolver, node: SearchNode):
+        """Called for each successor node created by the expansion, before it is (possibly) opened."""
+
+    def on_node_pushed(self, solver: GraphProblemSolver, node: SearchNode):
+        """
+        Called whenever a node enters the open queue: either as a new node, or as a better node
+         that replaces the node of the same state in open (with a lower priority).
+        """
+
+    def on_node_expanded(self, solver: GraphProblemSolver, node: SearchNode):
+        """Called whenever a node is extracted from the open queue in order to be expanded."""
+
+    def on_node_reopened(self, solver: GraphProblemSolver, closed_node: SearchNode):
+        """
+        Called whenever a better node is found for a closed state. The closed node is removed
+         from the close set (the better node is pushed into open right after).
+        """
+
+    def on_goal_found(self, solver: GraphProblemSolver, node: SearchNode):
+        """Called whenever a goal node is extracted from the open queue (before it is returned)."""
+
+    def on_search_finished(self, solver: GraphProblemSolver, problem: GraphProblem):
+        """Called once, when the search is over (after the goal has been found, or when open is exhausted)."""
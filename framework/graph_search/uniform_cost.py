@@ -16,15 +16,18 @@ class UniformCost(BestFirstSearch):
 
     def _open_successor_node(self, problem: GraphProblem, successor_node: SearchNode):
         if self.close.has_state(successor_node.state):
+            self.statistics.nr_pruned_duplicates += 1
             return
 
         if self.open.has_state(successor_node.state):
             already_found_node_with_same_state = self.open.get_node_by_state(successor_node.state)
             if already_found_node_with_same_state.expanding_priority > successor_node.expanding_priority:
-                self.open.extract_node(already_found_node_with_same_state)
+                self.open.decrease_priority(successor_node, successor_node.expanding_priority)
+            else:
+                self.statistics.nr_pruned_duplicates += 1
+            return
 
-        if not self.open.has_state(successor_node.state):
-            self.open.push_node(successor_node)
+        self.open.push_node(successor_node)
 
     def _calc_node_expanding_priority(self, search_node: SearchNode) -> float:
         assert(search_node.cost is not None)
@@ -0,0 +1,117 @@
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+__all__ = ['KeyedPriorityQueue']
+
+
+class KeyedPriorityQueue:
+    """
+    A min-priority queue of items, indexed by a (hashable) key.
+    Each key appears in the queue at most once.
+
+    Implemented over `heapq` with lazy invalidation: changing the priority of a key
+     pushes a fresh heap entry, and the previous entry of that key is left in the heap
+     as a stale entry, which is skipped when it reaches the top. The heap is compacted
+     whenever the stale entries outnumber the live ones.
+
+    Ties are broken deterministically by insertion order (FIFO): an item that was
+     pushed earlier (or whose priority was updated earlier) is popped first.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable, Any]] = []  # (priority, sequence number, key, item)
+        self._entry_by_key: Dict[Hashable, Tuple[float, int, Hashable, Any]] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entry_by_key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entry_by_key
+
+    def is_empty(self) -> bool:
+        return not self._entry_by_key
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entry_by_key.get(key)
+        return default if entry is None else entry[3]
+
+    def priority_of(self, key: Hashable) -> float:
+        return self._entry_by_key[key][0]
+
+    def push(self, key: Hashable, item: Any, priority: float):
+        assert key not in self._entry_by_key
+        entry = (priority, next(self._sequence), key, item)
+        self._entry_by_key[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def update(self, key: Hashable, item: Any, priority: float):
+        """
+        Replaces the item stored for an existing key, and sets its priority.
+        This is the decrease-key operation (increasing the priority is supported as well).
+        """
+        assert key in self._entry_by_key
+        entry = (priority, next(self._sequence), key, item)
+        self._entry_by_key[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact_if_needed()
+
+    def remove(self, key: Hashable) -> Any:
+        """Removes the given key from the queue and returns its item."""
+        entry = self._entry_by_key.pop(key)
+        self._compact_if_needed()
+        return entry[3]
+
+    def pop(self) -> Tuple[Hashable, Any, float]:
+        """Removes and returns the (key, item, priority) with the lowest priority."""
+        heap = self._heap
+        entry_by_key = self._entry_by_key
+        while heap:
+            entry = heapq.heappop(heap)
+            if entry_by_key.get(entry[2]) is entry:
+                del entry_by_key[entry[2]]
+                return entry[2], entry[3], entry[0]
+        raise IndexError('pop from an empty priority queue')
+
+    def peek(self) -> Tuple[Hashable, Any, float]:
+        """Returns the (key, item, priority) with the lowest priority, without removing it."""
+        heap = self._heap
+        entry_by_key = self._entry_by_key
+        while heap:
+            entry = heap[0]
+            if entry_by_key.get(entry[2]) is entry:
+                return entry[2], entry[3], entry[0]
+            heapq.heappop(heap)
+        raise IndexError('peek at an empty priority queue')
+
+    def n_smallest(self, n: int) -> List[Tuple[Hashable, Any, float]]:
+        """
+        Returns the (key, item, priority) triplets of the `n` lowest priorities (or fewer, if the
+         queue is shorter), in the order they would be popped, without modifying the queue.
+        Only the top of the heap is visited: a heap node is reached only after its parent.
+        """
+        heap = self._heap
+        entry_by_key = self._entry_by_key
+        smallest = []
+        if n <= 0 or not heap:
+            return smallest
+        candidates = [(heap[0], 0)]  # (heap entry, its index in the heap)
+        while candidates and len(smallest) < n:
+            entry, idx = heapq.heappop(candidates)
+            if entry_by_key.get(entry[2]) is entry:
+                smallest.append((entry[2], entry[3], entry[0]))
+            # The children of a stale entry may be live, so they are visited as well.
+            for child_idx in (2 * idx + 1, 2 * idx + 2):
+                if child_idx < len(heap):
+                    heapq.heappush(candidates, (heap[child_idx], child_idx))
+        return smallest
+
+    def items(self) -> Iterator[Tuple[Hashable, Any, float]]:
+        """Iterates over the (key, item, priority) triplets in the queue, in an arbitrary order."""
+        return ((key, entry[3], entry[0]) for key, entry in self._entry_by_key.items())
+
+    def _compact_if_needed(self):
+        if len(self._heap) > 2 * len(self._entry_by_key) + 64:
+            self._heap = list(self._entry_by_key.values())
+            heapq.heapify(self._heap)
@@ -3,7 +3,7 @@ lists the names you will need and what you can import with:
 >>> from framework import
 """
 
-from .graph import load_map_from_csv, Junction, Roads, Link
+from .graph import load_map_from_csv, Junction, Roads, Link, RoadsArrays
 from .tools import compute_distance
 
-__all__ = ['load_map_from_csv', 'Junction', 'Roads', 'Link', 'compute_distance']
+__all__ = ['load_map_from_csv', 'Junction', 'Roads', 'Link', 'RoadsArrays', 'compute_distance']
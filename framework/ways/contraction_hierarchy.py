@@ -0,0 +1,366 @@
+"""
+ Contraction hierarchies (CH) of a map, for answering many shortest-path queries quickly.
+ The preprocessing orders the junctions by importance, and contracts them one by one from the least
+  important: contracting a junction removes it from the graph, and adds a shortcut edge u -> w (via the
+  junction) for each pair of its neighbours u -> junction -> w whose shortest path goes through it
+  (a local "witness" search looks for another path that is as short). The rank of a junction is its
+  position in the contraction order.
+ A query is a bidirectional Dijkstra search in which both searches only go up in rank: the forward
+  search from the source over the edges to higher-ranked junctions, and the backward search from the
+  target over the reversed edges from higher-ranked junctions. On road maps, both searches settle only a few
+  hundreds of junctions, even on large maps. The last junctions of the order are densely connected by shortcuts,
+  so they are not contracted (the core, see `CORE_AVERAGE_DEGREE`): the searches go over all the
+  edges between them, in both directions. A shortcut is unpacked back to the original links through the
+  junctions it bypasses (`middle`), recursively.
+ The edge weights are the operator costs of `MapProblem` (the air distances of the links; the shortest
+  link of each pair of junctions), so the distances are the same as `UniformCost` finds.
+ The hierarchy of a map is stored next to its csv file (`tlv.ch.npz` next to `tlv.csv`), and is
+  recomputed whenever the csv file changes.
+
+ Usage (the hierarchy is also created automatically by `Roads.contraction_hierarchy()`):
+     python -m framework.ways.contraction_hierarchy framework/db/tlv.csv
+"""
+
+from .graph import Roads
+from . import sidecar_cache
+
+import heapq
+import math
+import os
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+__all__ = ['ContractionHierarchy', 'ShortestPath', 'build_contraction_hierarchy', 'contraction_hierarchy_path',
+           'store_contraction_hierarchy', 'load_contraction_hierarchy']
+
+CONTRACTION_HIERARCHY_FORMAT_VERSION = 1
+
+# The witness searches are local: they give up after settling this many junctions (and a shortcut is
+#  added, which keeps the hierarchy correct, but may add an unnecessary shortcut).
+WITNESS_SEARCH_SETTLE_LIMIT = 60
+IMPORTANCE_WITNESS_SETTLE_LIMIT = 20
+# The last junctions to contract are densely connected by shortcuts, and contracting them takes most
+#  of the preprocessing time. The contraction stops once the remaining graph has this many edges per
+#  junction on average, and the remaining junctions are left as an uncontracted core.
+CORE_AVERAGE_DEGREE = 16.
+
+
+class ShortestPath(NamedTuple):
+    """The result of a query on a `ContractionHierarchy`."""
+
+    """The junction positions of the path (see `Roads.position_of()`), from the source to the target.
+    Empty if there is no path."""
+    positions: List[int]
+    """The weights of the links of the path (one less than the positions)."""
+    link_weights: List[float]
+    """The number of junctions settled by the two searches."""
+    nr_settled: int
+
+    @property
+    def distance(self) -> float:
+        if not self.positions:
+            return math.inf
+        distance = 0.
+        for link_weight in self.link_weights:
+            distance += link_weight
+        return distance
+
+
+class ContractionHierarchy(NamedTuple):
+    """
+    The contraction hierarchy of a map: the rank of each junction, and the upward edges (the original
+     links and the shortcuts) of each junction in CSR form, by junction position.
+    `forward_*[forward_offsets[v]:forward_offsets[v + 1]]` are the edges v -> head where `head` is
+     ranked higher than v, and `backward_*[backward_offsets[v]:backward_offsets[v + 1]]` are the edges
+     head -> v where `head` is ranked higher than v. The middle of a shortcut is the junction it
+     bypasses (-1 for an original link).
+    The junctions of the core are ranked above all the others, and the forward and backward edges of
+     each of them are all its edges to and from the other junctions of the core.
+    """
+
+    ranks: np.ndarray
+    forward_offsets: np.ndarray
+    forward_heads: np.ndarray
+    forward_weights: np.ndarray
+    forward_middles: np.ndarray
+    backward_offsets: np.ndarray
+    backward_heads: np.ndarray
+    backward_weights: np.ndarray
+    backward_middles: np.ndarray
+
+    @property
+    def nr_junctions(self) -> int:
+        return len(self.ranks)
+
+    @property
+    def nr_shortcuts(self) -> int:
+        return int(np.count_nonzero(self.forward_middles >= 0) + np.count_nonzero(self.backward_middles >= 0))
+
+    def shortest_path(self, source_position: int, target_position: int) -> ShortestPath:
+        """Finds a shortest path between the junctions at the given positions, and unpacks it to the original links."""
+        if source_position == target_position:
+            return ShortestPath([source_position], [], 0)
+
+        forward = (self.forward_offsets, self.forward_heads, self.forward_weights)
+        backward = (self.backward_offsets, self.backward_heads, self.backward_weights)
+        # The distance and the parent (junction, edge index) of each reached junction, of each search.
+        distances: Tuple[Dict[int, float], Dict[int, float]] = ({source_position: 0.}, {target_position: 0.})
+        parents: Tuple[Dict[int, Tuple[int, int]], Dict[int, Tuple[int, int]]] = ({}, {})
+        heaps: Tuple[List[Tuple[float, int]], List[Tuple[float, int]]] = \
+            ([(0., source_position)], [(0., target_position)])
+        best_distance = math.inf
+        meeting_position = -1
+        nr_settled = 0
+
+        while True:
+            # Continues the search whose next junction is closer. Once both are at least as far as
+            #  the best path found, no better path can be found.
+            forward_top = heaps[0][0][0] if heaps[0] else math.inf
+            backward_top = heaps[1][0][0] if heaps[1] else math.inf
+            if min(forward_top, backward_top) >= best_distance:
+                break
+            direction = 0 if forward_top <= backward_top else 1
+            distance, position = heapq.heappop(heaps[direction])
+            if distance > distances[direction][position]:
+                continue
+            nr_settled += 1
+            other_distance = distances[1 - direction].get(position)
+            if other_distance is not None and distance + other_distance < best_distance:
+                best_distance = distance + other_distance
+                meeting_position = position
+
+            offsets, heads, weights = forward if direction == 0 else backward
+            begin, end = offsets.item(position), offsets.item(position + 1)
+            search_distances, search_parents, heap = distances[direction], parents[direction], heaps[direction]
+            for edge_idx, head, weight in zip(range(begin, end), heads[begin:end].tolist(),
+                                              weights[begin:end].tolist()):
+                head_distance = distance + weight
+                if head_distance < search_distances.get(head, math.inf):
+                    search_distances[head] = head_distance
+                    search_parents[head] = (position, edge_idx)
+                    heapq.heappush(heap, (head_distance, head))
+
+        if meeting_position < 0:
+            return ShortestPath([], [], nr_settled)
+
+        # The edges of the path (as (tail, head, middle, weight)), from the source to the target.
+        edges = []
+        position = meeting_position
+        while position != source_position:
+            tail, edge_idx = parents[0][position]
+            edges.append((tail, position, self.forward_middles.item(edge_idx), self.forward_weights.item(edge_idx)))
+            position = tail
+        edges.reverse()
+        position = meeting_position
+        while position != target_position:
+            head, edge_idx = parents[1][position]
+            edges.append((position, head, self.backward_middles.item(edge_idx), self.backward_weights.item(edge_idx)))
+            position = head
+
+        positions = [source_position]
+        link_weights = []
+        for edge in edges:
+            for _, head, weight in self._unpack_edge(*edge):
+                positions.append(head)
+                link_weights.append(weight)
+        return ShortestPath(positions, link_weights, nr_settled)
+
+    def _unpack_edge(self, tail: int, head: int, middle: int, weight: float) -> List[Tuple[int, int, float]]:
+        """The original links (tail, head, weight) of an edge, in their order along the path."""
+        links = []
+        stack = [(tail, head, middle, weight)]
+        while stack:
+            tail, head, middle, weight = stack.pop()
+            if middle < 0:
+                links.append((tail, head, weight))
+                continue
+            # The middle junction was contracted before both ends: the edge tail -> middle is a backward edge
+            #  of the middle, and the edge middle -> head is a forward edge of it.
+            first_edge = self._find_edge(self.backward_offsets, self.backward_heads, middle, tail)
+            second_edge = self._find_edge(self.forward_offsets, self.forward_heads, middle, head)
+            # Pushed in reverse, so that the first edge is unpacked first.
+            stack.append((middle, head, self.forward_middles.item(second_edge), self.forward_weights.item(second_edge)))
+            stack.append((tail, middle, self.backward_middles.item(first_edge), self.backward_weights.item(first_edge)))
+        return links
+
+    @staticmethod
+    def _find_edge(offsets: np.ndarray, heads: np.ndarray, position: int, head: int) -> int:
+        begin, end = offsets.item(position), offsets.item(position + 1)
+        return begin + heads[begin:end].tolist().index(head)
+
+
+def _witness_distances(out_weights: List[Dict[int, float]], source: int, excluded: int,
+                       max_distance: float, targets: set, settle_limit: int) -> Dict[int, float]:
+    """
+    A local Dijkstra search from the source that avoids the excluded junction, and stops once all the
+     targets are settled, or beyond the max distance, or after settling `settle_limit` junctions.
+    """
+    heappush, heappop = heapq.heappush, heapq.heappop
+    distances = {source: 0.}
+    heap = [(0., source)]
+    nr_settled = 0
+    nr_targets_left = len(targets)
+    while heap:
+        distance, position = heappop(heap)
+        if distance > distances[position]:
+            continue
+        if distance > max_distance or nr_settled >= settle_limit:
+            break
+        nr_settled += 1
+        if position in targets:
+            nr_targets_left -= 1
+            if nr_targets_left == 0:
+                break
+        for head, weight in out_weights[position].items():
+            head_distance = distance + weight
+            if head != excluded and (head not in distances or head_distance < distances[head]):
+                distances[head] = head_distance
+                heappush(heap, (head_distance, head))
+    return distances
+
+
+def _shortcuts_of(out_weights: List[Dict[int, float]], in_weights: List[Dict[int, float]],
+                  position: int, settle_limit: int) -> List[Tuple[int, int, float]]:
+    """The shortcuts (tail, head, weight) that contracting the junction requires."""
+    shortcuts = []
+    heads = out_weights[position]
+    if not heads:
+        return shortcuts
+    for tail, in_weight in in_weights[position].items():
+        targets = {head for head in heads if head != tail}
+        if not targets:
+            continue
+        max_distance = in_weight + max(heads[head] for head in targets)
+        witness_distances = _witness_distances(out_weights, tail, position, max_distance, targets, settle_limit)
+        for head in targets:
+            shortcut_weight = in_weight + heads[head]
+            if witness_distances.get(head, math.inf) > shortcut_weight:
+                shortcuts.append((tail, head, shortcut_weight))
+    return shortcuts
+
+
+def build_contraction_hierarchy(roads: Roads, core_average_degree: float = CORE_AVERAGE_DEGREE) -> ContractionHierarchy:
+    """
+    Contracts the junctions by the order of their importance, which is estimated by the edge difference
+     (#shortcuts that contracting the junction adds minus #edges that it removes) plus the number of
+     its neighbours that have been contracted already and its level (the length of the longest chain of
+     contracted junctions below it), which spread the contractions over the map.
+    The importance of a junction changes as its neighbours are contracted, so it is updated lazily:
+     the least important junction is re-evaluated before it is contracted, and it is contracted only
+     if it is still the least important one.
+    Stops once the remaining graph has `core_average_degree` edges per junction on average.
+    """
+    graph = roads.to_sparse_matrix('air_distance')
+    nr_junctions = graph.shape[0]
+    tails = np.repeat(np.arange(nr_junctions), np.diff(graph.indptr)).tolist()
+    # The remaining graph: the weights of the edges between the junctions that have not been contracted yet.
+    out_weights: List[Dict[int, float]] = [{} for _ in range(nr_junctions)]
+    in_weights: List[Dict[int, float]] = [{} for _ in range(nr_junctions)]
+    middles: Dict[Tuple[int, int], int] = {}  # Of the shortcuts.
+    for tail, head, weight in zip(tails, graph.indices.tolist(), graph.data.tolist()):
+        if tail != head:
+            out_weights[tail][head] = in_weights[head][tail] = weight
+
+    nr_contracted_neighbours = [0] * nr_junctions
+    levels = [0] * nr_junctions
+
+    def importance_of(position: int) -> int:
+        nr_shortcuts = len(_shortcuts_of(out_weights, in_weights, position, IMPORTANCE_WITNESS_SETTLE_LIMIT))
+        return 2 * (nr_shortcuts - len(out_weights[position]) - len(in_weights[position])) + \
+            nr_contracted_neighbours[position] + levels[position]
+
+    heap = [(importance_of(position), position) for position in range(nr_junctions)]
+    heapq.heapify(heap)
+    ranks = np.full(nr_junctions, -1, dtype=np.int64)
+    upward_forward: List[List[Tuple[int, float, int]]] = [[] for _ in range(nr_junctions)]
+    upward_backward: List[List[Tuple[int, float, int]]] = [[] for _ in range(nr_junctions)]
+    nr_remaining_edges = sum(len(heads) for heads in out_weights)
+    next_rank = 0
+    while heap:
+        if nr_remaining_edges > core_average_degree * len(heap):
+            break
+        _, position = heapq.heappop(heap)
+        importance = importance_of(position)
+        if heap and importance > heap[0][0]:
+            heapq.heappush(heap, (importance, position))
+            continue
+
+        for tail, head, weight in _shortcuts_of(out_weights, in_weights, position, WITNESS_SEARCH_SETTLE_LIMIT):
+            if head not in out_weights[tail]:
+                nr_remaining_edges += 1
+            elif weight >= out_weights[tail][head]:
+                continue
+            out_weights[tail][head] = in_weights[head][tail] = weight
+            middles[tail, head] = position
+        ranks[position] = next_rank
+        next_rank += 1
+        upward_forward[position] = [(head, weight, middles.get((position, head), -1))
+                                    for head, weight in out_weights[position].items()]
+        upward_backward[position] = [(tail, weight, middles.get((tail, position), -1))
+                                     for tail, weight in in_weights[position].items()]
+        for head in out_weights[position]:
+            del in_weights[head][position]
+        for tail in in_weights[position]:
+            del out_weights[tail][position]
+        for neighbour in out_weights[position].keys() | in_weights[position].keys():
+            nr_contracted_neighbours[neighbour] += 1
+            levels[neighbour] = max(levels[neighbour], levels[position] + 1)
+        nr_remaining_edges -= len(out_weights[position]) + len(in_weights[position])
+        out_weights[position] = {}
+        in_weights[position] = {}
+
+    # The core: the junctions that were not contracted are ranked above all the contracted ones,
+    #  and keep all the edges between them in both directions.
+    for _, position in sorted(heap):
+        ranks[position] = next_rank
+        next_rank += 1
+        upward_forward[position] = [(head, weight, middles.get((position, head), -1))
+                                    for head, weight in out_weights[position].items()]
+        upward_backward[position] = [(tail, weight, middles.get((tail, position), -1))
+                                     for tail, weight in in_weights[position].items()]
+
+    def to_csr(upward_edges: List[List[Tuple[int, float, int]]]) -> Tuple[np.ndarray, ...]:
+        offsets = np.zeros(nr_junctions + 1, dtype=np.int64)
+        np.cumsum([len(edges) for edges in upward_edges], out=offsets[1:])
+        flat_edges = [edge for edges in upward_edges for edge in edges]
+        heads = np.array([head for head, _, _ in flat_edges], dtype=np.int64)
+        weights = np.array([weight for _, weight, _ in flat_edges], dtype=np.float64)
+        middles = np.array([middle for _, _, middle in flat_edges], dtype=np.int64)
+        return offsets, heads, weights, middles
+
+    return ContractionHierarchy(ranks, *to_csr(upward_forward), *to_csr(upward_backward))
+
+
+def contraction_hierarchy_path(csv_filename: str) -> str:
+    """The hierarchy of `some/dir/tlv.csv` is `some/dir/tlv.ch.npz`."""
+    return os.path.splitext(csv_filename)[0] + '.ch.npz'
+
+
+def store_contraction_hierarchy(csv_filename: str, hierarchy: ContractionHierarchy):
+    """Writes the hierarchy of the given csv file (see `contraction_hierarchy_path()`)."""
+    sidecar_cache.store_npz(csv_filename, contraction_hierarchy_path(csv_filename), hierarchy,
+                            format_version=CONTRACTION_HIERARCHY_FORMAT_VERSION)
+
+
+def load_contraction_hierarchy(csv_filename: str) -> Optional[ContractionHierarchy]:
+    """
+    Loads the hierarchy of the given csv file.
+    Returns `None` if there is no hierarchy, or if it is stale (the csv file has changed,
+     or the hierarchy was written with another format version).
+    """
+    return sidecar_cache.load_npz(csv_filename, contraction_hierarchy_path(csv_filename), ContractionHierarchy,
+                                  format_version=CONTRACTION_HIERARCHY_FORMAT_VERSION)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from .graph import load_map_from_csv
+
+    for filename in sys.argv[1:]:
+        start = time.perf_counter()
+        contraction_hierarchy = build_contraction_hierarchy(load_map_from_csv(filename))
+        store_contraction_hierarchy(filename, contraction_hierarchy)
+        print('{} -> {} ({} shortcuts, {:.1f}s)'.format(filename, contraction_hierarchy_path(filename),
+                                                        contraction_hierarchy.nr_shortcuts,
+                                                        time.perf_counter() - start))
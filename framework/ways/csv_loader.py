@@ -0,0 +1,242 @@
+"""
+ Loading maps from their csv files (one junction per line: `index,lat,lon,target@distance@highway_type,...`).
+ The file is split into byte ranges that start at line boundaries (chunks), and each chunk is parsed
+  into `RoadsArrays` at once: the fields of all its lines are converted by NumPy (rather than by an
+  `int()` / `float()` call per field). The chunks are parsed in parallel by worker processes, and their
+  arrays are concatenated in the order of the file.
+ A line whose links are malformed is parsed by itself, with the same semantics as `_make_junction()`:
+  it has no links at all. Links of non-positive distance are dropped.
+ The traffic parameters of the links are not computed while parsing (see `RoadsArrays.with_traffic_params()`).
+ `iter_junctions_from_csv()` streams the junctions of a file one at a time, in bounded memory.
+
+ Usually this module is used through `load_map_from_csv()`, whose report (`Roads.load_report`)
+  tells where the map was loaded from and how long it took.
+"""
+
+from .graph import RoadsArrays, Junction, _make_junction
+
+import os
+import re
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+__all__ = ['LoadReport', 'chunk_byte_ranges', 'parse_csv_lines', 'load_arrays_from_csv', 'iter_junctions_from_csv']
+
+# A file is split into chunks of at least this size, so that small maps are parsed in a single chunk
+#  (in this process), where starting worker processes would cost more than it saves.
+MIN_CHUNK_BYTES = 1 << 20
+# The number of chunks per worker: smaller chunks balance the work between the workers.
+CHUNKS_PER_WORKER = 4
+
+# The links field of a line whose links all have exactly three fields.
+_LINKS_PATTERN = re.compile(r'[^,@]+@[^,@]+@[^,@]+(?:,[^,@]+@[^,@]+@[^,@]+)*')
+
+
+class LoadReport(NamedTuple):
+    """How a map has been loaded by `load_map_from_csv()` (see `Roads.load_report`). The times are in seconds."""
+
+    filename: str
+    """'cache' if the map has been memory-mapped from its binary cache (see `map_cache.py`), otherwise 'csv'."""
+    source: str
+    nr_junctions: int
+    nr_links: int
+    """The number of chunks the csv file has been parsed in, and the number of processes that parsed them."""
+    nr_chunks: int = 0
+    nr_workers: int = 0
+    parse_time: float = 0.
+    merge_time: float = 0.
+    """The time it took to write the binary cache (zero if it has not been written)."""
+    cache_store_time: float = 0.
+    """The time it took to compute the traffic parameters of all the links (zero if they are computed on access)."""
+    traffic_params_time: float = 0.
+    total_time: float = 0.
+
+    def __str__(self):
+        if self.source == 'cache':
+            details = 'from the binary cache'
+        else:
+            details = 'parsed in {} chunk(s) by {} process(es): parse {:.2f}s, merge {:.2f}s'.format(
+                self.nr_chunks, self.nr_workers, self.parse_time, self.merge_time)
+            if self.cache_store_time > 0:
+                details += ', cache store {:.2f}s'.format(self.cache_store_time)
+        if self.traffic_params_time > 0:
+            details += ', traffic parameters {:.2f}s'.format(self.traffic_params_time)
+        return '{}: {} junctions, {} links, {:.2f}s ({})'.format(
+            os.path.basename(self.filename), self.nr_junctions, self.nr_links, self.total_time, details)
+
+
+def chunk_byte_ranges(filename: str, nr_chunks: int) -> List[Tuple[int, int]]:
+    """Splits the file into (up to) `nr_chunks` byte ranges [begin, end) of about the same size, at line boundaries."""
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, 'rb') as f:
+        for chunk_idx in range(1, nr_chunks):
+            offset = size * chunk_idx // nr_chunks
+            if offset <= boundaries[-1]:
+                continue
+            # The chunk ends after the line that contains the last byte before the offset.
+            f.seek(offset - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _parse_links(link_row: Sequence[str]) -> List[Tuple[int, int, int]]:
+    """This function is for local use only.
+    Same semantics as `_make_junction()`: a malformed row has no links at all."""
+    try:
+        links = [tuple(int(x) for x in lnk.split("@")) for lnk in link_row]
+    except ValueError:
+        return []
+    assert all(len(lnk) == 3 for lnk in links)
+    return [lnk for lnk in links if lnk[1] > 0]
+
+
+def _filter_links_to_loaded_junctions(arrays: RoadsArrays) -> RoadsArrays:
+    """This function is for local use only. Drops links that lead to junctions out of the loaded slice."""
+    keep = np.isin(arrays.link_targets, arrays.junction_ids)
+    nr_kept_links_before = np.zeros(arrays.nr_links + 1, dtype=np.int64)
+    np.cumsum(keep, out=nr_kept_links_before[1:])
+    link_offsets = nr_kept_links_before[arrays.link_offsets]
+    return RoadsArrays(arrays.junction_ids, arrays.lats, arrays.lons, link_offsets,
+                       *(None if arr is None else arr[keep] for arr in arrays[4:]))
+
+
+def _empty_arrays() -> RoadsArrays:
+    return RoadsArrays(
+        junction_ids=np.zeros(0, dtype=np.int32), lats=np.zeros(0), lons=np.zeros(0),
+        link_offsets=np.zeros(1, dtype=np.int64), link_targets=np.zeros(0, dtype=np.int32),
+        link_distances=np.zeros(0, dtype=np.int32), link_highway_types=np.zeros(0, dtype=np.int16))
+
+
+def parse_csv_lines(lines: Sequence[str]) -> RoadsArrays:
+    """Parses the lines of a map csv file into the arrays of their junctions (in their order)."""
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return _empty_arrays()
+    rows = [line.rstrip('\r\n').split(',', 3) for line in lines]
+    junction_fields = np.array([row[:3] for row in rows])
+    junction_ids = junction_fields[:, 0].astype(np.int64)
+
+    # The links of the well-formed lines are converted together: `a@b@c,d@e@f` -> [a, b, c, d, e, f].
+    link_strings = [row[3] if len(row) > 3 else '' for row in rows]
+    nr_links_per_line = [link_string.count(',') + 1 if link_string else 0 for link_string in link_strings]
+    well_formed = [_LINKS_PATTERN.fullmatch(link_string) is not None for link_string in link_strings]
+    try:
+        joined_links = ','.join(link_string for link_string, is_well_formed in zip(link_strings, well_formed)
+                                if is_well_formed and link_string)
+        link_fields = np.array(joined_links.replace('@', ',').split(','), dtype=np.int64).reshape(-1, 3) \
+            if joined_links else np.zeros((0, 3), dtype=np.int64)
+    except ValueError:
+        # Some field is not a number: each line is converted by itself (below).
+        well_formed = [False] * len(rows)
+        link_fields = np.zeros((0, 3), dtype=np.int64)
+    line_of_links = np.repeat(np.arange(len(rows)), [nr_links if is_well_formed else 0 for nr_links, is_well_formed
+                                                     in zip(nr_links_per_line, well_formed)])
+
+    malformed_lines = [line_idx for line_idx, is_well_formed in enumerate(well_formed)
+                       if not is_well_formed and link_strings[line_idx]]
+    if malformed_lines:
+        malformed_links = [(line_idx, link) for line_idx in malformed_lines
+                           for link in _parse_links(link_strings[line_idx].split(','))]
+        if malformed_links:
+            link_fields = np.concatenate([link_fields, np.array([link for _, link in malformed_links], dtype=np.int64)])
+            line_of_links = np.concatenate([line_of_links, [line_idx for line_idx, _ in malformed_links]])
+        # Puts the links back in the order of the lines (the order within each line is kept).
+        order = np.argsort(line_of_links, kind='stable')
+        link_fields, line_of_links = link_fields[order], line_of_links[order]
+
+    keep = link_fields[:, 1] > 0
+    link_fields, line_of_links = link_fields[keep], line_of_links[keep]
+    link_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(line_of_links, minlength=len(rows)), out=link_offsets[1:])
+
+    return RoadsArrays(
+        junction_ids=junction_ids.astype(np.int32),
+        lats=junction_fields[:, 1].astype(np.float64),
+        lons=junction_fields[:, 2].astype(np.float64),
+        link_offsets=link_offsets,
+        link_targets=link_fields[:, 0].astype(np.int32),
+        link_distances=link_fields[:, 1].astype(np.int32),
+        link_highway_types=link_fields[:, 2].astype(np.int16))
+
+
+def _parse_chunk(filename: str, begin: int, end: int) -> RoadsArrays:
+    """This function is for local use only. It runs in the worker processes."""
+    with open(filename, 'rb') as f:
+        f.seek(begin)
+        text = f.read(end - begin).decode()
+    return parse_csv_lines(text.splitlines())
+
+
+def _merge_chunks(chunks: Sequence[RoadsArrays]) -> RoadsArrays:
+    """Concatenates the arrays of consecutive chunks of a file."""
+    if len(chunks) == 1:
+        return chunks[0]
+    link_offsets = [np.zeros(1, dtype=np.int64)]
+    nr_links_before = 0
+    for chunk in chunks:
+        link_offsets.append(chunk.link_offsets[1:] + nr_links_before)
+        nr_links_before += chunk.nr_links
+    merged = {field: np.concatenate([getattr(chunk, field) for chunk in chunks])
+              for field in RoadsArrays._fields if field != 'link_offsets' and getattr(chunks[0], field) is not None}
+    return RoadsArrays(link_offsets=np.concatenate(link_offsets), **merged)
+
+
+def load_arrays_from_csv(filename: str, start: int = 0, count: int = sys.maxsize,
+                         workers: Optional[int] = None) -> Tuple[RoadsArrays, LoadReport]:
+    """
+    Parses the map csv file into arrays. The arrays are sorted as in the file.
+    A slice of the file (`count` lines from line `start`) is read sequentially and parsed as a single
+     chunk. If `count` is given, the links to junctions out of the slice are dropped (as by the
+     former loader, a slice that only skips the first lines keeps all of its links).
+    :param workers: The number of worker processes (default: the number of CPUs).
+                    With a single worker (or a single chunk), the file is parsed in this process.
+    """
+    start_time = time.perf_counter()
+    if start != 0 or count != sys.maxsize:
+        from itertools import islice
+        with open(filename, 'rt') as f:
+            arrays = parse_csv_lines(list(islice(f, start, min(start + count, sys.maxsize))))
+        parse_time = time.perf_counter() - start_time
+        if count < sys.maxsize:
+            arrays = _filter_links_to_loaded_junctions(arrays)
+        return arrays, LoadReport(filename, 'csv', arrays.nr_junctions, arrays.nr_links, nr_chunks=1, nr_workers=1,
+                                  parse_time=parse_time, merge_time=time.perf_counter() - start_time - parse_time)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    nr_chunks = max(1, min(workers * CHUNKS_PER_WORKER, os.path.getsize(filename) // MIN_CHUNK_BYTES))
+    byte_ranges = chunk_byte_ranges(filename, nr_chunks) if workers > 1 else [(0, os.path.getsize(filename))]
+    workers = max(1, min(workers, len(byte_ranges)))
+    if workers == 1:
+        chunks = [_parse_chunk(filename, begin, end) for begin, end in byte_ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_parse_chunk, *zip(*((filename, begin, end) for begin, end in byte_ranges))))
+    parse_time = time.perf_counter() - start_time
+    arrays = _merge_chunks(chunks)
+    return arrays, LoadReport(filename, 'csv', arrays.nr_junctions, arrays.nr_links, nr_chunks=len(byte_ranges),
+                              nr_workers=workers, parse_time=parse_time,
+                              merge_time=time.perf_counter() - start_time - parse_time)
+
+
+def iter_junctions_from_csv(filename: str, start: int = 0, count: int = sys.maxsize) -> Iterator[Junction]:
+    """
+    Streams the junctions of the map csv file (or of a slice of it, as `load_map_from_csv()`),
+     reading a line at a time, so the memory does not grow with the size of the map.
+    Unlike `load_map_from_csv()`, the links of a slice to junctions out of it are kept (they are
+     not known when the junction is yielded).
+    """
+    import csv
+    from itertools import islice
+    with open(filename, 'rt') as f:
+        for row in csv.reader(islice(f, start, min(start + count, sys.maxsize))):
+            if row:
+                yield _make_junction(*row)
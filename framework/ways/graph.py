@@ -1,11 +1,15 @@
 """
- A set of utilities for using israel.csv 
+ A set of utilities for using israel.csv
  The map is extracted from the openstreetmap project
 """
 
 from . import tools
+import os
 import sys
-from typing import List, Tuple, Dict, Iterator, Set, NamedTuple
+import time
+import weakref
+import numpy as np
+from typing import Any, List, Tuple, Dict, Iterator, Set, NamedTuple, Mapping, Sequence, Union, Optional
 
 
 # Some additional parameters for a link
@@ -26,7 +30,7 @@ class Junction(NamedTuple):
     index: int
     lat: float
     lon: float
-    links: List[Link]
+    links: Sequence[Link]
 
     @property
     def coordinates(self) -> Tuple[float, float]:
@@ -45,9 +49,152 @@ class Junction(NamedTuple):
         return tools.compute_distance(self.coordinates, other_junction.coordinates)
 
 
-class Roads(Dict[int, Junction]):
+class RoadsArrays(NamedTuple):
     """
-    The graph is a dictionary Junction_id->Junction, with some methods to help.
+    The compressed-sparse-row (CSR) representation of the map.
+    Junctions are stored sorted by their index. The outgoing links of the
+     junction at position `i` are the links in the range
+     `link_offsets[i]:link_offsets[i + 1]` of the `link_*` arrays.
+    Notice that `link_targets` holds junction *indices* (not positions).
+    The traffic parameters of the links (`link_cos_frequencies`, `link_sin_frequencies`) are derived
+     from the junction indices of the link (see `tools.generate_traffic_noise_params()`), so they are
+     not stored unless they were given explicitly (`None`). `with_traffic_params()` computes them.
+    """
+
+    junction_ids: np.ndarray  # int32[nr_junctions]
+    lats: np.ndarray  # float64[nr_junctions]
+    lons: np.ndarray  # float64[nr_junctions]
+    link_offsets: np.ndarray  # int64[nr_junctions + 1]
+    link_targets: np.ndarray  # int32[nr_links]
+    link_distances: np.ndarray  # int32[nr_links]
+    link_highway_types: np.ndarray  # int16[nr_links]
+    link_cos_frequencies: Optional[np.ndarray] = None  # float64[nr_links]
+    link_sin_frequencies: Optional[np.ndarray] = None  # float64[nr_links]
+
+    @property
+    def nr_junctions(self) -> int:
+        return len(self.junction_ids)
+
+    @property
+    def nr_links(self) -> int:
+        return len(self.link_targets)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self if arr is not None)
+
+    @property
+    def link_sources(self) -> np.ndarray:
+        """The junction index of the source of each link."""
+        return np.repeat(self.junction_ids, np.diff(self.link_offsets))
+
+    def with_traffic_params(self) -> 'RoadsArrays':
+        """The same arrays, with the traffic parameters of all the links (computed in one vectorized pass if missing)."""
+        if self.link_cos_frequencies is not None and self.link_sin_frequencies is not None:
+            return self
+        cos_frequencies, sin_frequencies = tools.generate_traffic_noise_params_array(self.link_sources,
+                                                                                     self.link_targets)
+        return self._replace(link_cos_frequencies=cos_frequencies, link_sin_frequencies=sin_frequencies)
+
+    def sorted_by_junction_id(self) -> 'RoadsArrays':
+        """Returns the same graph, with the junctions (and their link ranges) ordered by index."""
+        if np.all(np.diff(self.junction_ids) > 0):
+            return self
+        order = np.argsort(self.junction_ids, kind='stable')
+        links_per_junction = np.diff(self.link_offsets)[order]
+        new_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(links_per_junction, out=new_offsets[1:])
+        # For each link in the new order, its position in the old order.
+        links_order = np.arange(new_offsets[-1], dtype=np.int64) + \
+            np.repeat(self.link_offsets[:-1][order] - new_offsets[:-1], links_per_junction)
+        return RoadsArrays(
+            self.junction_ids[order], self.lats[order], self.lons[order], new_offsets,
+            *(None if arr is None else arr[links_order] for arr in self[4:]))
+
+    @staticmethod
+    def from_junctions(junctions: Mapping[int, Junction]) -> 'RoadsArrays':
+        """Builds the CSR arrays out of `Junction` objects (each holding its own list of links)."""
+        ordered = sorted(junctions.values(), key=lambda j: j.index)
+        links = [link for junction in ordered for link in junction.links]
+        link_offsets = np.zeros(len(ordered) + 1, dtype=np.int64)
+        np.cumsum([len(junction.links) for junction in ordered], out=link_offsets[1:])
+        return RoadsArrays(
+            junction_ids=np.array([j.index for j in ordered], dtype=np.int32),
+            lats=np.array([j.lat for j in ordered], dtype=np.float64),
+            lons=np.array([j.lon for j in ordered], dtype=np.float64),
+            link_offsets=link_offsets,
+            link_targets=np.array([lnk.target for lnk in links], dtype=np.int32),
+            link_distances=np.array([lnk.distance for lnk in links], dtype=np.int32),
+            link_highway_types=np.array([lnk.highway_type for lnk in links], dtype=np.int16),
+            link_cos_frequencies=np.array([lnk.link_params.cos_frequency for lnk in links], dtype=np.float64),
+            link_sin_frequencies=np.array([lnk.link_params.sin_frequency for lnk in links], dtype=np.float64))
+
+
+class JunctionLinks(Sequence[Link]):
+    """
+    A read-only view over the outgoing links of a single junction.
+    `Link` objects are created only when the view is accessed.
+    """
+
+    __slots__ = ('_arrays', '_source', '_begin', '_end')
+
+    def __init__(self, arrays: RoadsArrays, source: int, begin: int, end: int):
+        self._arrays = arrays
+        self._source = source
+        self._begin = begin
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._begin
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return list(self)[item]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('link index out of range')
+        return self._make_links(self._begin + item, self._begin + item + 1)[0]
+
+    def __iter__(self) -> Iterator[Link]:
+        return iter(self._make_links(self._begin, self._end))
+
+    def __eq__(self, other):
+        if not isinstance(other, (JunctionLinks, list, tuple)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        # Pickled as a plain list of links, rather than with the arrays of the whole map.
+        return list, (list(self),)
+
+    def _make_links(self, begin: int, end: int) -> List[Link]:
+        arrays = self._arrays
+        source = self._source
+        targets = arrays.link_targets[begin:end].tolist()
+        if arrays.link_cos_frequencies is None or arrays.link_sin_frequencies is None:
+            # Computed on access, only for the links of this junction (see `Roads.compute_traffic_params()`).
+            traffic_params = [tools.generate_traffic_noise_params(source, target) for target in targets]
+        else:
+            traffic_params = zip(arrays.link_cos_frequencies[begin:end].tolist(),
+                                 arrays.link_sin_frequencies[begin:end].tolist())
+        return [Link(source, target, distance, highway_type, LinkTrafficParams(cos_frequency, sin_frequency))
+                for target, distance, highway_type, (cos_frequency, sin_frequency) in zip(
+                    targets,
+                    arrays.link_distances[begin:end].tolist(),
+                    arrays.link_highway_types[begin:end].tolist(),
+                    traffic_params)]
+
+
+class Roads(Mapping[int, Junction]):
+    """
+    The graph is a mapping Junction_id->Junction, with some methods to help.
+    Internally the graph is stored as NumPy arrays in a compressed-sparse-row
+     layout (see `RoadsArrays`). The `Junction` and `Link` objects are thin
+     views that are created on access.
     To change the generation, simply assign to it:
     g.generation = 5
     """
@@ -55,13 +202,260 @@ class Roads(Dict[int, Junction]):
     def junctions(self) -> List[Junction]:
         return list(self.values())
 
-    def __init__(self, junction_list: Dict[int, Junction]):
-        super(Roads, self).__init__(junction_list)
+    def __init__(self, junction_list: Union[Mapping[int, Junction], RoadsArrays]):
+        if not isinstance(junction_list, RoadsArrays):
+            junction_list = RoadsArrays.from_junctions(junction_list)
+        self.arrays: RoadsArrays = junction_list.sorted_by_junction_id()
         """to change the generation, simply assign to it"""
         self.generation = 0
         self.base_traffic = tools.base_traffic_pattern()
-        tmp = [(n.lat, n.lon) for n in junction_list.values()]
-        self.mean_lat_lon = (sum([i[0] for i in tmp]) / len(tmp), sum([i[1] for i in tmp]) / len(tmp))
+        self.mean_lat_lon = (float(self.arrays.lats.mean()), float(self.arrays.lons.mean()))
+
+        # When the junction ids are consecutive (which is the common case), the position of
+        #  a junction in the arrays is found by a subtraction rather than a binary search.
+        junction_ids = self.arrays.junction_ids
+        self._nr_junctions = len(junction_ids)
+        self._first_junction_id = int(junction_ids[0]) if len(junction_ids) > 0 else 0
+        self._consecutive_ids = len(junction_ids) == 0 or \
+            int(junction_ids[-1]) - self._first_junction_id == len(junction_ids) - 1
+        self._geodesic_terms: Optional[tools.GeodesicTerms] = None
+        self._link_air_distances: Optional[np.ndarray] = None
+        self._reverse_adjacency: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._landmarks_tables: Dict[Tuple[int, str], Any] = {}
+        self._contraction_hierarchy: Optional[Any] = None
+        self._spatial_index: Optional[Any] = None
+        """The (csv filename, start, count) the map has been loaded from, if loaded by `load_map_from_csv()`."""
+        self.source: Optional[Tuple[str, int, int]] = None
+        """How the map has been loaded, if loaded by `load_map_from_csv()` (a `csv_loader.LoadReport`)."""
+        self.load_report: Optional[Any] = None
+
+    def __reduce__(self):
+        """
+        A map that has been loaded from a file is pickled by reference: only its source is
+         pickled, and unpickling it returns the map that has already been loaded from this
+         source in the unpickling process, or loads it (once per process).
+        This way, search problems that refer to the map can be sent to worker processes cheaply.
+        Other maps are pickled by their arrays.
+        """
+        if self.source is not None:
+            return _load_roads_by_reference, (self.source, self.generation)
+        return _make_roads, (self.arrays, self.generation)
+
+    def position_of(self, junction_id: int) -> int:
+        """Returns the position of the given junction in the arrays. Raises `KeyError` if it does not exist."""
+        if self._consecutive_ids:
+            pos = junction_id - self._first_junction_id
+            if 0 <= pos < self._nr_junctions:
+                return pos
+            raise KeyError(junction_id)
+        pos = int(np.searchsorted(self.arrays.junction_ids, junction_id))
+        if pos < self._nr_junctions and self.arrays.junction_ids.item(pos) == junction_id:
+            return pos
+        raise KeyError(junction_id)
+
+    def positions_of(self, junction_ids: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """Vectorized version of `position_of()`. Raises `KeyError` if any of the junctions does not exist."""
+        positions, exists = self._find_positions(junction_ids)
+        if not np.all(exists):
+            raise KeyError(np.asarray(junction_ids)[~exists][0].item())
+        return positions
+
+    def _find_positions(self, junction_ids: Union[Sequence[int], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the positions of the given junctions, and a mask of whether each of them exists.
+        The positions of non-existing junctions are arbitrary (but valid) positions."""
+        junction_ids = np.asarray(junction_ids, dtype=np.int64)
+        if self._consecutive_ids:
+            positions = junction_ids - self._first_junction_id
+            exists = (positions >= 0) & (positions < self._nr_junctions)
+        else:
+            positions = np.searchsorted(self.arrays.junction_ids, junction_ids)
+            exists = positions < self._nr_junctions
+            exists[exists] = self.arrays.junction_ids[positions[exists]] == junction_ids[exists]
+        positions[~exists] = 0
+        return positions, exists
+
+    def __getitem__(self, junction_id: int) -> Junction:
+        pos = self.position_of(junction_id)
+        arrays = self.arrays
+        # Notice: `ndarray.item(i)` is considerably faster than `ndarray[i].item()`.
+        return Junction(junction_id, arrays.lats.item(pos), arrays.lons.item(pos),
+                        JunctionLinks(arrays, junction_id,
+                                      arrays.link_offsets.item(pos), arrays.link_offsets.item(pos + 1)))
+
+    def __contains__(self, junction_id) -> bool:
+        try:
+            self.position_of(junction_id)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.arrays.junction_ids.tolist())
+
+    def __len__(self) -> int:
+        return self._nr_junctions
+
+    def coordinates_of(self, junction_id: int) -> Tuple[float, float]:
+        """Same as `roads[junction_id].coordinates`, without creating the `Junction` view."""
+        pos = self.position_of(junction_id)
+        return self.arrays.lats.item(pos), self.arrays.lons.item(pos)
+
+    def successor_ids(self, junction_id: int) -> List[int]:
+        """Returns the indices of the junctions reachable from the given junction by a single link."""
+        pos = self.position_of(junction_id)
+        link_offsets = self.arrays.link_offsets
+        return self.arrays.link_targets[link_offsets.item(pos):link_offsets.item(pos + 1)].tolist()
+
+    @property
+    def geodesic_terms(self) -> tools.GeodesicTerms:
+        """The terms of `tools.compute_distance()` for all the junctions (by position). Computed once."""
+        if self._geodesic_terms is None:
+            self._geodesic_terms = tools.GeodesicTerms.of(self.arrays.lats, self.arrays.lons)
+        return self._geodesic_terms
+
+    def air_distance(self, junction_id1: int, junction_id2: int) -> float:
+        """Same as `roads[junction_id1].calc_air_distance_from(roads[junction_id2])`."""
+        terms = self.geodesic_terms
+        return tools.compute_distance_from_terms(terms.point(self.position_of(junction_id1)),
+                                                 terms.point(self.position_of(junction_id2)))
+
+    def air_distances_from(self, junction_id: int, junction_ids: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """One-to-many air distances: from the given junction to each of the given junctions."""
+        terms = self.geodesic_terms
+        return tools.compute_distances(terms.take(self.position_of(junction_id)),
+                                       terms.take(self.positions_of(junction_ids)))
+
+    def air_distances_matrix(self, junction_ids1: Union[Sequence[int], np.ndarray],
+                             junction_ids2: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """Many-to-many air distances: entry [i, j] is the distance between `junction_ids1[i]` and `junction_ids2[j]`."""
+        terms = self.geodesic_terms
+        return tools.compute_distances(terms.take(self.positions_of(junction_ids1)).reshape(-1, 1),
+                                       terms.take(self.positions_of(junction_ids2)).reshape(1, -1))
+
+    @property
+    def link_air_distances(self) -> np.ndarray:
+        """
+        The air distance between the source and the target of each link (by link position). Computed once.
+        Links to junctions that are not in the map (there are no such links when the map is loaded
+         with `count`) are assigned an infinite distance.
+        """
+        if self._link_air_distances is None:
+            terms = self.geodesic_terms
+            sources_positions = np.repeat(np.arange(self._nr_junctions), np.diff(self.arrays.link_offsets))
+            targets_positions, targets_exist = self._find_positions(self.arrays.link_targets)
+            self._link_air_distances = tools.compute_distances(terms.take(sources_positions),
+                                                               terms.take(targets_positions))
+            self._link_air_distances[~targets_exist] = np.inf
+        return self._link_air_distances
+
+    def successors_with_air_distances(self, junction_id: int) -> List[Tuple[int, float]]:
+        """The (target index, air distance to the target) of each outgoing link of the given junction."""
+        pos = self.position_of(junction_id)
+        begin, end = self.arrays.link_offsets.item(pos), self.arrays.link_offsets.item(pos + 1)
+        return list(zip(self.arrays.link_targets[begin:end].tolist(), self.link_air_distances[begin:end].tolist()))
+
+    def _get_reverse_adjacency(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The incoming links of each junction, in CSR form (computed once):
+         (offsets by target position, source junction ids, link positions).
+        Links to junctions that are not in the map are omitted.
+        """
+        if self._reverse_adjacency is None:
+            sources_ids = np.repeat(self.arrays.junction_ids, np.diff(self.arrays.link_offsets))
+            targets_positions, targets_exist = self._find_positions(self.arrays.link_targets)
+            link_positions = np.flatnonzero(targets_exist)
+            # A stable sort keeps the incoming links of each junction ordered by their source.
+            order = np.argsort(targets_positions[link_positions], kind='stable')
+            link_positions = link_positions[order]
+            offsets = np.zeros(self._nr_junctions + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets_positions[link_positions], minlength=self._nr_junctions), out=offsets[1:])
+            self._reverse_adjacency = (offsets, sources_ids[link_positions], link_positions)
+        return self._reverse_adjacency
+
+    def predecessors_with_air_distances(self, junction_id: int) -> List[Tuple[int, float]]:
+        """The (source index, air distance from the source) of each incoming link of the given junction."""
+        offsets, sources_ids, link_positions = self._get_reverse_adjacency()
+        pos = self.position_of(junction_id)
+        begin, end = offsets.item(pos), offsets.item(pos + 1)
+        return list(zip(sources_ids[begin:end].tolist(),
+                        self.link_air_distances[link_positions[begin:end]].tolist()))
+
+    def _whole_csv_filename(self) -> Optional[str]:
+        """The csv file of the map, if the map has been loaded as a whole from it (see `sidecar_cache.py`)."""
+        if self.source is not None and self.source[1:] == (0, sys.maxsize):
+            return self.source[0]
+        return None
+
+    def landmarks_table(self, nr_landmarks: int = 16, strategy: str = 'avoid'):
+        """
+        The `LandmarksTable` of the map (see `landmarks.py`), for the ALT heuristic. Computed once.
+        The table of a map that has been loaded as a whole from a csv file is stored next to the
+         file, and is loaded from there the next time (unless the csv file has changed).
+        """
+        key = (nr_landmarks, strategy)
+        if key not in self._landmarks_tables:
+            from . import landmarks, sidecar_cache
+            self._landmarks_tables[key] = sidecar_cache.load_or_build(
+                self._whole_csv_filename(),
+                lambda csv_filename: landmarks.load_landmarks_table(csv_filename, nr_landmarks, strategy),
+                lambda: landmarks.compute_landmarks_table(self, nr_landmarks, strategy),
+                lambda csv_filename, table: landmarks.store_landmarks_table(csv_filename, table, nr_landmarks,
+                                                                            strategy))
+        return self._landmarks_tables[key]
+
+    def contraction_hierarchy(self):
+        """
+        The `ContractionHierarchy` of the map (see `contraction_hierarchy.py`), for fast shortest-path
+         queries. Built once, and stored next to the csv file like `landmarks_table()`.
+        """
+        if self._contraction_hierarchy is None:
+            from . import contraction_hierarchy, sidecar_cache
+            self._contraction_hierarchy = sidecar_cache.load_or_build(
+                self._whole_csv_filename(), contraction_hierarchy.load_contraction_hierarchy,
+                lambda: contraction_hierarchy.build_contraction_hierarchy(self),
+                contraction_hierarchy.store_contraction_hierarchy)
+        return self._contraction_hierarchy
+
+    def spatial_index(self):
+        """
+        The `SpatialIndex` of the junctions (see `spatial_index.py`), for nearest-junction, radius and
+         bounding-box queries by coordinates. Built once (it takes a fraction of a second even for large maps).
+        """
+        if self._spatial_index is None:
+            from .spatial_index import SpatialIndex
+            self._spatial_index = SpatialIndex(self.arrays.junction_ids, self.geodesic_terms)
+        return self._spatial_index
+
+    def to_sparse_matrix(self, weights: str = 'air_distance'):
+        """
+        Exports the map as a `scipy.sparse.csr_matrix` adjacency matrix, for `scipy.sparse.csgraph`.
+        Rows and columns are junction positions (see `position_of()`).
+        :param weights: 'air_distance' (the operator cost of `MapProblem`) or 'distance' (`Link.distance`).
+        When several links connect the same pair of junctions, the shortest one is kept.
+        Notice: zero-weight links are kept as explicitly stored zeros.
+        """
+        from scipy.sparse import csr_matrix
+
+        if weights == 'air_distance':
+            link_weights = self.link_air_distances
+        elif weights == 'distance':
+            link_weights = self.arrays.link_distances.astype(np.float64)
+        else:
+            raise ValueError('Unknown weights `{}`.'.format(weights))
+        sources = np.repeat(np.arange(self._nr_junctions), np.diff(self.arrays.link_offsets))
+        targets, targets_exist = self._find_positions(self.arrays.link_targets)
+        sources, targets, link_weights = sources[targets_exist], targets[targets_exist], link_weights[targets_exist]
+
+        # Keep the lightest link of each (source, target) pair. The links are sorted by source already.
+        order = np.lexsort((link_weights, targets, sources))
+        sources, targets, link_weights = sources[order], targets[order], link_weights[order]
+        first_of_pair = np.ones(len(sources), dtype=bool)
+        first_of_pair[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, link_weights = sources[first_of_pair], targets[first_of_pair], link_weights[first_of_pair]
+
+        indptr = np.zeros(self._nr_junctions + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self._nr_junctions), out=indptr[1:])
+        return csr_matrix((link_weights, targets, indptr), shape=(self._nr_junctions, self._nr_junctions))
 
     def return_focus(self, start_junction_id: int) -> Set[Link]:
         found = set()
@@ -76,6 +470,14 @@ class Roads(Dict[int, Junction]):
                 break
         return found
 
+    def compute_traffic_params(self):
+        """
+        Computes the traffic parameters of all the links at once (a vectorized pass over the link arrays).
+        Otherwise, they are computed on access, for the links of each accessed junction. The values are the same.
+        Worth it before going over many of the links (e.g., by `iterlinks()`).
+        """
+        self.arrays = self.arrays.with_traffic_params()
+
     def iterlinks(self) -> Iterator[Link]:
         """chain all the links in the graph.
         use: for link in roads.iterlinks(): ... """
@@ -104,20 +506,70 @@ def _make_junction(idx_str: str, lat_str: str, lon_str: str, *link_row: str) ->
     return Junction(idx, lat, lon, links)
 
 
-@tools.timed
-def load_map_from_csv(filename: str, start=0, count=sys.maxsize) -> Roads:
+"""The maps loaded in this process, by their source (see `Roads.__reduce__`)."""
+_roads_by_source: 'weakref.WeakValueDictionary[Tuple[str, int, int], Roads]' = weakref.WeakValueDictionary()
+"""The maps that have been loaded only for unpickling. They are kept for the lifetime of the process."""
+_roads_loaded_by_reference: Dict[Tuple[str, int, int], Roads] = {}
+
+
+def _make_roads(arrays: RoadsArrays, generation: int) -> Roads:
+    """This function is for local use only (unpickling)."""
+    roads = Roads(arrays)
+    roads.generation = generation
+    return roads
+
+
+def _load_roads_by_reference(source: Tuple[str, int, int], generation: int) -> Roads:
+    """This function is for local use only (unpickling)."""
+    roads = _roads_by_source.get(source)
+    if roads is None:
+        filename, start, count = source
+        roads = load_map_from_csv(filename, start, count)
+        _roads_loaded_by_reference[source] = roads
+    roads.generation = generation
+    return roads
+
+
+def load_map_from_csv(filename: str, start=0, count=sys.maxsize, use_cache: bool = True,
+                      workers: Optional[int] = None, eager_traffic_params: bool = False, verbose: bool = False) -> Roads:
     """
     returns graph, encoded as an adjacency list
     @param slice_params can be used to cut part of the file
     example: load_map_from_csv(start=50000, count=50000))
+    When loading a whole map, a binary cache of it is memory-mapped (see `map_cache.py`).
+    The cache is (re)created from the csv file whenever it is missing or stale. The csv file is
+     parsed in chunks by `workers` processes (default: the number of CPUs, see `csv_loader.py`).
+    The traffic parameters of the links are computed when the links are accessed, or for all the
+     links while loading if `eager_traffic_params` is set (see `Roads.compute_traffic_params()`).
+    How the map has been loaded and how long it took is reported in `roads.load_report`
+     (and printed if `verbose` is set).
     """
+    from . import csv_loader
+    start_time = time.perf_counter()
+    if not use_cache or start != 0 or count != sys.maxsize:
+        arrays, report = csv_loader.load_arrays_from_csv(filename, start, count, workers)
+    else:
+        from . import map_cache
+        arrays = map_cache.load_map_cache(filename)
+        if arrays is not None:
+            report = csv_loader.LoadReport(filename, 'cache', arrays.nr_junctions, arrays.nr_links)
+        else:
+            arrays, report = csv_loader.load_arrays_from_csv(filename, start, count, workers)
+            cache_store_start_time = time.perf_counter()
+            try:
+                map_cache.store_map_cache(filename, arrays)
+            except OSError:
+                pass  # e.g. a read-only data directory. We just don't get the faster loading next time.
+            report = report._replace(cache_store_time=time.perf_counter() - cache_store_start_time)
+    if eager_traffic_params:
+        traffic_params_start_time = time.perf_counter()
+        arrays = arrays.with_traffic_params()
+        report = report._replace(traffic_params_time=time.perf_counter() - traffic_params_start_time)
 
-    import csv
-    from itertools import islice
-    with open(filename, 'rt') as f:
-        it = islice(f, start, min(start + count, sys.maxsize))
-        lst = {int(row[0]): _make_junction(*row) for row in csv.reader(it)}
-        if count < sys.maxsize:
-            lst = {i: Junction(i, j.lat, j.lon, [lnk for lnk in j.links if lnk.target in lst])
-                   for i, j in lst.items()}
-    return Roads(lst)
+    roads = Roads(arrays)
+    roads.source = (os.path.abspath(filename), start, count)
+    _roads_by_source[roads.source] = roads
+    roads.load_report = report._replace(total_time=time.perf_counter() - start_time)
+    if verbose:
+        print(roads.load_report)
+    return roads
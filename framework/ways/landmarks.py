@@ -0,0 +1,212 @@
+"""
+ Landmark tables for the ALT (A*, Landmarks, Triangle inequality) heuristic.
+ For a few selected junctions (the landmarks), the road distances from each landmark to every
+  junction and from every junction to each landmark are computed upfront (the distance is the
+  operator cost of `MapProblem`: the sum of the air distances of the links).
+ By the triangle inequality, for each landmark L and any two junctions v, t:
+     d(v, t) >= d(v, L) - d(t, L)    and    d(v, t) >= d(L, t) - d(L, v)
+  so the largest of these differences is an admissible (and consistent) estimate of d(v, t).
+ The table of a map is stored next to its csv file (`tlv.avoid-16.landmarks.npz` next to `tlv.csv`),
+  and is recomputed whenever the csv file changes.
+
+ Landmark selection strategies:
+     `farthest`: each landmark is the junction that is farthest from the landmarks selected so far.
+     `avoid`: (Goldberg & Harrelson) grows the shortest-paths tree of a random junction, and picks
+              a leaf of the subtree whose distances are the worst covered by the landmarks selected
+              so far (the subtrees that contain a landmark are avoided).
+
+ Usage (the table is also created automatically by `Roads.landmarks_table()`):
+     python -m framework.ways.landmarks framework/db/tlv.csv [--landmarks 16] [--strategy avoid]
+"""
+
+from ..consts import Consts
+from .graph import Roads
+from . import sidecar_cache
+
+import os
+import numpy as np
+from typing import List, NamedTuple, Optional
+
+__all__ = ['LANDMARK_STRATEGIES', 'LandmarksTable', 'compute_landmarks_table', 'landmarks_table_path',
+           'store_landmarks_table', 'load_landmarks_table']
+
+LANDMARKS_TABLE_FORMAT_VERSION = 1
+LANDMARK_STRATEGIES = ('farthest', 'avoid')
+
+
+class LandmarksTable(NamedTuple):
+    """
+    The road distances between the landmarks and all the junctions of a map.
+    The junctions are indexed by their positions (see `Roads.position_of()`), and the table of
+     each junction is a contiguous row, so the distances of a junction to all the landmarks are
+     read at once. Unreachable junctions are at an infinite distance.
+    """
+
+    """The junction ids of the landmarks, shape (K,)."""
+    landmark_ids: np.ndarray
+    """`distances_from[v, i]` is the road distance from landmark i to the junction at position v, shape (N, K)."""
+    distances_from: np.ndarray
+    """`distances_to[v, i]` is the road distance from the junction at position v to landmark i, shape (N, K)."""
+    distances_to: np.ndarray
+
+    @property
+    def nr_landmarks(self) -> int:
+        return len(self.landmark_ids)
+
+    def lower_bound(self, source_position: int, target_position: int) -> float:
+        """A lower bound of the road distance between the junctions at the given positions."""
+        with np.errstate(invalid='ignore'):
+            # Both distances are infinite when neither junction is connected to a landmark (nan): no bound.
+            bound = np.fmax(np.fmax.reduce(self.distances_to[source_position] - self.distances_to[target_position]),
+                            np.fmax.reduce(self.distances_from[target_position] - self.distances_from[source_position]))
+        return float(bound) if bound > 0 else 0.
+
+
+def _shortest_path_distances(graph, positions, return_predecessors: bool = False):
+    from scipy.sparse.csgraph import dijkstra
+    return dijkstra(graph, directed=True, indices=positions, return_predecessors=return_predecessors)
+
+
+def _lower_bounds_from(source_position: int, nr_junctions: int, distances_from: List[np.ndarray],
+                       distances_to: List[np.ndarray]) -> np.ndarray:
+    """The landmark lower bounds of the distances from the given junction to all the junctions."""
+    bounds = np.zeros(nr_junctions)
+    with np.errstate(invalid='ignore'):
+        for landmark_from, landmark_to in zip(distances_from, distances_to):
+            np.fmax(bounds, landmark_from - landmark_from[source_position], out=bounds)
+            np.fmax(bounds, landmark_to[source_position] - landmark_to, out=bounds)
+    return bounds
+
+
+def _select_farthest(distances_from: List[np.ndarray], distances_to: List[np.ndarray],
+                     rng: np.random.RandomState, graph, reversed_graph) -> int:
+    """The junction whose (round trip) distance to the closest landmark is the largest."""
+    if not distances_from:
+        # The first landmark is the farthest junction from a random junction.
+        start_position = rng.randint(graph.shape[0])
+        round_trip = _shortest_path_distances(graph, start_position) + \
+            _shortest_path_distances(reversed_graph, start_position)
+    else:
+        round_trip = np.min(np.add(distances_from, distances_to), axis=0)
+    round_trip[~np.isfinite(round_trip)] = -1
+    return int(np.argmax(round_trip))
+
+
+def _select_avoid(distances_from: List[np.ndarray], distances_to: List[np.ndarray],
+                  rng: np.random.RandomState, graph, reversed_graph, landmark_positions: List[int]) -> int:
+    """
+    Grows the shortest-paths tree of a random root. The weight of a junction is how much its distance
+     from the root exceeds its landmark lower bound, and the size of a subtree is the sum of its weights
+     (zero if it contains a landmark). Descends from the root to the child of the largest size, until a leaf.
+    """
+    nr_junctions = graph.shape[0]
+    root = rng.randint(nr_junctions)
+    distances, predecessors = _shortest_path_distances(graph, root, return_predecessors=True)
+    reachable = np.flatnonzero(np.isfinite(distances))
+    sizes = np.zeros(nr_junctions)
+    sizes[reachable] = distances[reachable] - _lower_bounds_from(root, nr_junctions, distances_from, distances_to)[reachable]
+    has_landmark = np.zeros(nr_junctions, dtype=bool)
+    has_landmark[landmark_positions] = True
+
+    # Accumulates the subtrees bottom-up: a junction is farther from the root than its predecessor.
+    order = reachable[np.argsort(distances[reachable], kind='stable')[::-1]]
+    sizes_list, has_landmark_list, predecessors_list = sizes.tolist(), has_landmark.tolist(), predecessors.tolist()
+    for position in order.tolist():
+        predecessor = predecessors_list[position]
+        if predecessor >= 0:
+            sizes_list[predecessor] += sizes_list[position]
+            has_landmark_list[predecessor] = has_landmark_list[predecessor] or has_landmark_list[position]
+    sizes = np.where(has_landmark_list, 0., sizes_list)
+
+    # The children of each junction in the tree, in CSR form.
+    children_positions = np.flatnonzero(predecessors >= 0)
+    children_positions = children_positions[np.argsort(predecessors[children_positions], kind='stable')]
+    children_offsets = np.zeros(nr_junctions + 1, dtype=np.int64)
+    np.cumsum(np.bincount(predecessors[children_positions], minlength=nr_junctions), out=children_offsets[1:])
+
+    position = root
+    while True:
+        children = children_positions[children_offsets[position]:children_offsets[position + 1]]
+        if len(children) == 0 or sizes[children].max() <= 0:
+            break
+        position = int(children[np.argmax(sizes[children])])
+    if has_landmark[position] or sizes[position] <= 0:
+        # The whole tree is covered by the landmarks: falls back to the farthest junction.
+        return _select_farthest(distances_from, distances_to, rng, graph, reversed_graph)
+    return position
+
+
+def compute_landmarks_table(roads: Roads, nr_landmarks: int = 16, strategy: str = 'avoid',
+                            seed: int = Consts.SEED) -> LandmarksTable:
+    """
+    Selects the landmarks (see the strategies above), and computes their distances to and from all
+     the junctions: two one-to-all Dijkstra searches per landmark, over the map exported as a sparse matrix.
+    """
+    if strategy not in LANDMARK_STRATEGIES:
+        raise ValueError('Unknown landmark selection strategy `{}` (expected one of {}).'.format(
+            strategy, ', '.join(LANDMARK_STRATEGIES)))
+    nr_landmarks = min(nr_landmarks, len(roads))
+    graph = roads.to_sparse_matrix('air_distance')
+    reversed_graph = graph.transpose().tocsr()
+    rng = np.random.RandomState(seed)
+
+    landmark_positions: List[int] = []
+    distances_from: List[np.ndarray] = []
+    distances_to: List[np.ndarray] = []
+    while len(landmark_positions) < nr_landmarks:
+        if strategy == 'farthest':
+            position = _select_farthest(distances_from, distances_to, rng, graph, reversed_graph)
+        else:
+            position = _select_avoid(distances_from, distances_to, rng, graph, reversed_graph, landmark_positions)
+        if position in landmark_positions:
+            break  # Every junction is as close to the landmarks as can be (a tiny map).
+        landmark_positions.append(position)
+        distances_from.append(_shortest_path_distances(graph, position))
+        distances_to.append(_shortest_path_distances(reversed_graph, position))
+
+    return LandmarksTable(landmark_ids=roads.arrays.junction_ids[landmark_positions].astype(np.int64),
+                          distances_from=np.ascontiguousarray(np.transpose(distances_from)),
+                          distances_to=np.ascontiguousarray(np.transpose(distances_to)))
+
+
+def landmarks_table_path(csv_filename: str, nr_landmarks: int, strategy: str) -> str:
+    """The table of `some/dir/tlv.csv` is `some/dir/tlv.<strategy>-<nr_landmarks>.landmarks.npz`."""
+    return '{}.{}-{}.landmarks.npz'.format(os.path.splitext(csv_filename)[0], strategy, nr_landmarks)
+
+
+def store_landmarks_table(csv_filename: str, table: LandmarksTable, nr_landmarks: int, strategy: str,
+                          seed: int = Consts.SEED):
+    """
+    Writes the table of the given csv file (see `landmarks_table_path()`), that has been computed
+     with the given parameters. It is stored under the requested number of landmarks (which the table
+     may have less of, on a small map), so that it is found by a lookup with the same parameters.
+    """
+    sidecar_cache.store_npz(csv_filename, landmarks_table_path(csv_filename, nr_landmarks, strategy), table,
+                            format_version=LANDMARKS_TABLE_FORMAT_VERSION, seed=seed)
+
+
+def load_landmarks_table(csv_filename: str, nr_landmarks: int, strategy: str,
+                         seed: int = Consts.SEED) -> Optional[LandmarksTable]:
+    """
+    Loads the table of the given csv file.
+    Returns `None` if there is no table, or if it is stale (the csv file has changed, or
+     the table was written with another format version or seed).
+    """
+    return sidecar_cache.load_npz(csv_filename, landmarks_table_path(csv_filename, nr_landmarks, strategy),
+                                  LandmarksTable, format_version=LANDMARKS_TABLE_FORMAT_VERSION, seed=seed)
+
+
+if __name__ == '__main__':
+    import argparse
+    from .graph import load_map_from_csv
+
+    parser = argparse.ArgumentParser(description='Computes the landmark tables of maps.')
+    parser.add_argument('filenames', nargs='+', metavar='map.csv')
+    parser.add_argument('--landmarks', type=int, default=16)
+    parser.add_argument('--strategy', choices=LANDMARK_STRATEGIES, default='avoid')
+    parser.add_argument('--seed', type=int, default=Consts.SEED)
+    args = parser.parse_args()
+    for filename in args.filenames:
+        landmarks_table = compute_landmarks_table(load_map_from_csv(filename), args.landmarks, args.strategy, args.seed)
+        store_landmarks_table(filename, landmarks_table, args.landmarks, args.strategy, args.seed)
+        print('{} -> {}'.format(filename, landmarks_table_path(filename, args.landmarks, args.strategy)))
@@ -0,0 +1,101 @@
+"""
+ A versioned binary cache of a map, stored next to its csv file.
+ The cache holds the `RoadsArrays` of the map (without the traffic parameters of the links, which are
+ derived from the junction indices) and is memory-mapped when loaded,
+ so loading takes milliseconds and all the processes that load the same map
+ share the same pages.
+
+ Usage (the cache is also created automatically by `load_map_from_csv()`):
+     python -m framework.ways.map_cache framework/db/tlv.csv
+"""
+
+from .graph import RoadsArrays
+from .sidecar_cache import source_signature, atomic_output
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Optional
+
+__all__ = ['MAP_CACHE_FORMAT_VERSION', 'map_cache_path', 'store_map_cache', 'load_map_cache']
+
+MAP_CACHE_FORMAT_VERSION = 2
+
+_MAGIC = b'ROADSMAP'
+_PREAMBLE = struct.Struct('<8sII')  # magic, format version, header length
+_ALIGNMENT = 64
+# The optional fields (the traffic parameters) are stored only if they are given.
+_REQUIRED_FIELDS = [field for field in RoadsArrays._fields if field not in RoadsArrays._field_defaults]
+
+
+def map_cache_path(csv_filename: str) -> str:
+    """The cache of `some/dir/tlv.csv` is `some/dir/tlv.roads`."""
+    return os.path.splitext(csv_filename)[0] + '.roads'
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def store_map_cache(csv_filename: str, arrays: RoadsArrays):
+    """Writes the cache of the given csv file (see `map_cache_path()`)."""
+    header = dict(source_signature(csv_filename), arrays=[])
+    offset = 0
+    for name, arr in zip(arrays._fields, arrays):
+        if arr is None:
+            continue
+        header['arrays'].append({'name': name, 'dtype': arr.dtype.str, 'length': len(arr), 'offset': offset})
+        offset = _aligned(offset + arr.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header_bytes))
+
+    with atomic_output(map_cache_path(csv_filename)) as tmp_filename, open(tmp_filename, 'wb') as f:
+        f.write(_PREAMBLE.pack(_MAGIC, MAP_CACHE_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for array_header in header['arrays']:
+            arr = getattr(arrays, array_header['name'])
+            f.seek(data_start + array_header['offset'])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.truncate(data_start + offset)
+
+
+def load_map_cache(csv_filename: str) -> Optional[RoadsArrays]:
+    """
+    Memory-maps the cache of the given csv file.
+    Returns `None` if there is no cache, or if it is stale (the csv file has
+     changed, or the cache was written with another format version).
+    """
+    cache_filename = map_cache_path(csv_filename)
+    if not os.path.isfile(cache_filename) or not os.path.isfile(csv_filename):
+        return None
+    with open(cache_filename, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            return None
+        magic, version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != _MAGIC or version != MAP_CACHE_FORMAT_VERSION:
+            return None
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        if any(header.get(key) != value for key, value in source_signature(csv_filename).items()):
+            return None
+        data_start = _aligned(_PREAMBLE.size + header_length)
+        # The mapping stays alive as long as the arrays that refer to it.
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {array_header['name']: np.frombuffer(buffer, dtype=np.dtype(array_header['dtype']),
+                                                  count=array_header['length'],
+                                                  offset=data_start + array_header['offset'])
+              for array_header in header['arrays']}
+    if not set(_REQUIRED_FIELDS) <= set(arrays) <= set(RoadsArrays._fields):
+        return None
+    return RoadsArrays(**arrays)
+
+
+if __name__ == '__main__':
+    import sys
+    from .graph import load_map_from_csv
+    for filename in sys.argv[1:]:
+        store_map_cache(filename, load_map_from_csv(filename, use_cache=False).arrays)
+        print('{} -> {}'.format(filename, map_cache_path(filename)))
@@ -0,0 +1,308 @@
+"""
+ A generator of synthetic road maps, for testing how the loading, `Roads` and the solvers
+ scale with the size of the map (`tlv.csv` has a single, fixed, size).
+ The maps are written in the csv format of `load_map_from_csv()`:
+     junction_index,lat,lon,target_index@distance@highway_type,...
+
+ Topologies:
+     `grid`: a jittered street grid, with arterial roads every few blocks.
+     `geometric`: a random geometric graph (each junction is linked to its nearest junctions).
+     `city`: dense clusters of streets (cities of varying sizes) in a sparse countryside,
+             where the cities are connected by highways.
+ The junctions are placed in a local plane (in meters) around an origin, with a realistic
+  spacing (~100m between neighbour junctions), and then converted to lat/lon.
+ The distance of a link is its air distance stretched by a random detour factor (>= 1),
+  so the air-distance heuristics stay admissible.
+ By default, only the largest strongly connected component is kept (and the junctions are
+  re-indexed), so any two junctions of the map are connected.
+
+ Usage:
+     python -m framework.ways.map_generator {grid,geometric,city} nr_junctions output.csv [--seed SEED]
+"""
+
+from . import tools
+
+import math
+import sys
+import numpy as np
+from typing import NamedTuple, Optional, Tuple
+
+__all__ = ['SyntheticMap', 'generate_grid_map', 'generate_geometric_map', 'generate_city_map',
+           'generate_map', 'write_map_csv', 'TOPOLOGIES']
+
+# The highway types of the generated links (by the order of the OSM highway tags).
+HIGHWAY_TYPE_MOTORWAY = 0
+HIGHWAY_TYPE_PRIMARY = 2
+HIGHWAY_TYPE_SECONDARY = 3
+HIGHWAY_TYPE_RESIDENTIAL = 5
+
+DEFAULT_ORIGIN = (32.0, 34.8)  # (lat, lon) of the south-west corner of the map.
+DEFAULT_SPACING = 100.  # Meters between neighbour junctions.
+_METERS_PER_LAT_DEGREE = 40000 * 1000 / 360  # The earth model of `tools.compute_distance()`.
+_LINKS_CHUNK_SIZE = 1 << 20  # The distances of the links are computed a chunk at a time (bounds the memory).
+
+
+class SyntheticMap(NamedTuple):
+    """
+    A generated map: the junctions are indexed 0..n-1 (by their positions in `lats` / `lons`),
+     and the links are sorted by their sources.
+    """
+    lats: np.ndarray  # float64[nr_junctions]
+    lons: np.ndarray  # float64[nr_junctions]
+    link_sources: np.ndarray  # int32[nr_links]
+    link_targets: np.ndarray  # int32[nr_links]
+    link_distances: np.ndarray  # int32[nr_links]
+    link_highway_types: np.ndarray  # int16[nr_links]
+
+    @property
+    def nr_junctions(self) -> int:
+        return len(self.lats)
+
+    @property
+    def nr_links(self) -> int:
+        return len(self.link_targets)
+
+
+def _grid_edges(nr_rows: int, nr_cols: int, nr_junctions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The (undirected) edges between horizontal and vertical neighbours of a row-major grid of junctions."""
+    positions = np.arange(nr_junctions, dtype=np.int32)
+    rows, cols = positions // nr_cols, positions % nr_cols
+    has_right = (cols + 1 < nr_cols) & (positions + 1 < nr_junctions)
+    has_up = (rows + 1 < nr_rows) & (positions + nr_cols < nr_junctions)
+    sources = np.concatenate((positions[has_right], positions[has_up]))
+    targets = np.concatenate((positions[has_right] + 1, positions[has_up] + nr_cols))
+    return sources, targets
+
+
+def _nearest_neighbours_edges(xs: np.ndarray, ys: np.ndarray, nr_neighbours: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The (undirected, unique) edges between each point and its `nr_neighbours` nearest points."""
+    from scipy.spatial import cKDTree
+    points = np.column_stack((xs, ys))
+    _, neighbours = cKDTree(points).query(points, k=nr_neighbours + 1)
+    sources = np.repeat(np.arange(len(points), dtype=np.int64), nr_neighbours)
+    targets = neighbours[:, 1:].reshape(-1).astype(np.int64)
+    # Each edge is keyed by its (smaller, larger) endpoints, so the duplicates can be dropped by a 1-D `unique`.
+    edge_keys = np.unique(np.minimum(sources, targets) * len(points) + np.maximum(sources, targets))
+    return edge_keys // len(points), edge_keys % len(points)
+
+
+def _largest_strongly_connected_component(nr_junctions: int, sources: np.ndarray,
+                                          targets: np.ndarray) -> np.ndarray:
+    """A boolean mask of the junctions of the largest strongly connected component (the links are sorted by source)."""
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    link_offsets = np.searchsorted(sources, np.arange(nr_junctions + 1, dtype=sources.dtype))
+    graph = csr_matrix((np.ones(len(sources), dtype=np.int8), targets, link_offsets), shape=(nr_junctions, nr_junctions))
+    _, labels = connected_components(graph, directed=True, connection='strong')
+    return labels == np.argmax(np.bincount(labels))
+
+
+def _make_synthetic_map(xs: np.ndarray, ys: np.ndarray, edge_sources: np.ndarray, edge_targets: np.ndarray,
+                        edge_highway_types: np.ndarray, rng: np.random.RandomState,
+                        origin: Tuple[float, float], one_way_fraction: float,
+                        max_detour: float, largest_component_only: bool) -> SyntheticMap:
+    """
+    Turns the (undirected) edges between the points (in meters) into the links of a map:
+     each edge becomes a link in each direction, except for `one_way_fraction` of them (one-way streets).
+    Motorways are never one-way.
+    """
+    nr_edges = len(edge_sources)
+    one_way = (rng.random_sample(nr_edges) < one_way_fraction) & (edge_highway_types != HIGHWAY_TYPE_MOTORWAY)
+    forward = ~one_way | (rng.random_sample(nr_edges) < 0.5)
+    backward = ~one_way | ~forward
+    sources = np.concatenate((edge_sources[forward], edge_targets[backward])).astype(np.int32)
+    targets = np.concatenate((edge_targets[forward], edge_sources[backward])).astype(np.int32)
+    highway_types = np.concatenate((edge_highway_types[forward], edge_highway_types[backward])).astype(np.int16)
+    order = np.argsort(sources, kind='stable')
+    sources, targets, highway_types = sources[order], targets[order], highway_types[order]
+    del order
+
+    nr_junctions = len(xs)
+    if largest_component_only:
+        in_component = _largest_strongly_connected_component(nr_junctions, sources, targets)
+        # The re-indexing keeps the order of the junctions, so the links stay sorted by source.
+        new_positions = np.cumsum(in_component, dtype=np.int32) - 1
+        links_in_component = in_component[sources] & in_component[targets]
+        sources = new_positions[sources[links_in_component]]
+        targets = new_positions[targets[links_in_component]]
+        highway_types = highway_types[links_in_component]
+        xs, ys = xs[in_component], ys[in_component]
+
+    origin_lat, origin_lon = origin
+    lats = origin_lat + ys / _METERS_PER_LAT_DEGREE
+    lons = origin_lon + xs / (_METERS_PER_LAT_DEGREE * math.cos(math.radians(origin_lat)))
+
+    terms = tools.GeodesicTerms.of(lats, lons)
+    distances = np.empty(len(sources), dtype=np.int32)
+    for chunk_start in range(0, len(sources), _LINKS_CHUNK_SIZE):
+        chunk = slice(chunk_start, chunk_start + _LINKS_CHUNK_SIZE)
+        air_distances = tools.compute_distances(terms.take(sources[chunk]), terms.take(targets[chunk]))
+        detours = 1 + rng.random_sample(len(air_distances)) * (max_detour - 1)
+        # Rounded up (with a margin for the rounding errors of the distance kernels): never shorter than the air distance.
+        distances[chunk] = np.maximum(np.ceil(air_distances * detours + 0.01), 1)
+
+    return SyntheticMap(lats=lats, lons=lons, link_sources=sources, link_targets=targets,
+                        link_distances=distances, link_highway_types=highway_types)
+
+
+def generate_grid_map(nr_junctions: int, seed: int = 0, spacing: float = DEFAULT_SPACING,
+                      arterial_every: int = 10, missing_streets_fraction: float = 0.05,
+                      one_way_fraction: float = 0.1, max_detour: float = 1.1,
+                      origin: Tuple[float, float] = DEFAULT_ORIGIN,
+                      largest_component_only: bool = True) -> SyntheticMap:
+    """
+    A (nearly square) street grid: the junctions are jittered grid points, each one is linked to its
+     horizontal and vertical neighbours. Every `arterial_every`-th row and column is an arterial road.
+    """
+    rng = np.random.RandomState(seed)
+    nr_cols = int(math.ceil(math.sqrt(nr_junctions)))
+    nr_rows = int(math.ceil(nr_junctions / nr_cols))
+    positions = np.arange(nr_junctions, dtype=np.int32)
+    rows, cols = positions // nr_cols, positions % nr_cols
+    xs = (cols + rng.uniform(-0.2, 0.2, nr_junctions)) * spacing
+    ys = (rows + rng.uniform(-0.2, 0.2, nr_junctions)) * spacing
+
+    sources, targets = _grid_edges(nr_rows, nr_cols, nr_junctions)
+    kept = rng.random_sample(len(sources)) >= missing_streets_fraction
+    sources, targets = sources[kept], targets[kept]
+    is_horizontal = targets == sources + 1
+    is_arterial = np.where(is_horizontal, rows[sources] % arterial_every == 0, cols[sources] % arterial_every == 0)
+    highway_types = np.where(is_arterial, HIGHWAY_TYPE_PRIMARY, HIGHWAY_TYPE_RESIDENTIAL)
+    return _make_synthetic_map(xs, ys, sources, targets, highway_types, rng, origin,
+                               one_way_fraction, max_detour, largest_component_only)
+
+
+def generate_geometric_map(nr_junctions: int, seed: int = 0, spacing: float = DEFAULT_SPACING,
+                           nr_neighbours: int = 3, one_way_fraction: float = 0.1, max_detour: float = 1.2,
+                           origin: Tuple[float, float] = DEFAULT_ORIGIN,
+                           largest_component_only: bool = True) -> SyntheticMap:
+    """
+    A random geometric graph: the junctions are uniformly distributed in a square (with `spacing`
+     meters between neighbour junctions on average), each one is linked to its `nr_neighbours` nearest junctions.
+    """
+    rng = np.random.RandomState(seed)
+    side = spacing * math.sqrt(nr_junctions)
+    xs = rng.uniform(0, side, nr_junctions)
+    ys = rng.uniform(0, side, nr_junctions)
+    sources, targets = _nearest_neighbours_edges(xs, ys, nr_neighbours)
+    lengths = np.hypot(xs[sources] - xs[targets], ys[sources] - ys[targets])
+    highway_types = np.where(lengths > 1.5 * spacing, HIGHWAY_TYPE_SECONDARY, HIGHWAY_TYPE_RESIDENTIAL)
+    return _make_synthetic_map(xs, ys, sources, targets, highway_types, rng, origin,
+                               one_way_fraction, max_detour, largest_component_only)
+
+
+def generate_city_map(nr_junctions: int, seed: int = 0, spacing: float = DEFAULT_SPACING,
+                      junctions_per_city: int = 20000, countryside_fraction: float = 0.1,
+                      nr_neighbours: int = 3, highway_junctions_spacing: float = 1000.,
+                      one_way_fraction: float = 0.1, max_detour: float = 1.2,
+                      origin: Tuple[float, float] = DEFAULT_ORIGIN,
+                      largest_component_only: bool = True) -> SyntheticMap:
+    """
+    Cities in a countryside: the cities are dense (normally distributed) clusters of junctions, of
+     heavy-tailed sizes (`junctions_per_city` on average). The rest of the junctions (`countryside_fraction`)
+     are scattered uniformly. The streets link each junction to its `nr_neighbours` nearest junctions,
+     and highways (with a junction every `highway_junctions_spacing` meters) connect the centers of the
+     cities along the minimum spanning tree of the cities.
+    """
+    from scipy.sparse.csgraph import minimum_spanning_tree
+    rng = np.random.RandomState(seed)
+    nr_cities = max(1, int(round(nr_junctions * (1 - countryside_fraction) / junctions_per_city)))
+    city_sizes = rng.pareto(1.5, nr_cities) + 1
+    city_sizes = np.floor(city_sizes / city_sizes.sum() * nr_junctions * (1 - countryside_fraction)).astype(np.int64)
+    city_sizes = np.maximum(city_sizes, 1)
+    nr_countryside_junctions = max(0, nr_junctions - int(city_sizes.sum()))
+
+    # The countryside is ~10 times sparser than the average city.
+    side = spacing * math.sqrt(10 * nr_junctions)
+    city_centers = rng.uniform(0.1 * side, 0.9 * side, (nr_cities, 2))
+    city_radiuses = spacing * np.sqrt(city_sizes) / 2
+    city_of_junction = np.repeat(np.arange(nr_cities), city_sizes)
+    xs = np.concatenate((rng.normal(city_centers[city_of_junction, 0], city_radiuses[city_of_junction]),
+                         rng.uniform(0, side, nr_countryside_junctions)))
+    ys = np.concatenate((rng.normal(city_centers[city_of_junction, 1], city_radiuses[city_of_junction]),
+                         rng.uniform(0, side, nr_countryside_junctions)))
+    sources, targets = _nearest_neighbours_edges(xs, ys, nr_neighbours)
+    lengths = np.hypot(xs[sources] - xs[targets], ys[sources] - ys[targets])
+    highway_types = np.where(lengths > 3 * spacing, HIGHWAY_TYPE_SECONDARY, HIGHWAY_TYPE_RESIDENTIAL)
+
+    # The highways: a chain of junctions between the central junctions of each two cities along the tree.
+    first_junction_of_city = np.concatenate(([0], np.cumsum(city_sizes)[:-1]))
+    city_hubs = [first + int(np.argmin(np.hypot(xs[first:first + size] - center[0], ys[first:first + size] - center[1])))
+                 for first, size, center in zip(first_junction_of_city, city_sizes, city_centers)]
+    centers_distances = np.hypot(*(city_centers[:, np.newaxis, :] - city_centers[np.newaxis, :, :]).transpose(2, 0, 1))
+    tree = minimum_spanning_tree(centers_distances).tocoo()
+    highway_xs, highway_ys, highway_sources, highway_targets = [], [], [], []
+    next_junction = len(xs)
+    for city1, city2 in zip(tree.row.tolist(), tree.col.tolist()):
+        hub1, hub2 = city_hubs[city1], city_hubs[city2]
+        nr_segments = max(1, int(math.hypot(xs[hub2] - xs[hub1], ys[hub2] - ys[hub1]) // highway_junctions_spacing))
+        fractions = np.arange(1, nr_segments) / nr_segments
+        highway_xs.append(xs[hub1] + fractions * (xs[hub2] - xs[hub1]))
+        highway_ys.append(ys[hub1] + fractions * (ys[hub2] - ys[hub1]))
+        chain = np.concatenate(([hub1], np.arange(next_junction, next_junction + nr_segments - 1), [hub2]))
+        highway_sources.append(chain[:-1])
+        highway_targets.append(chain[1:])
+        next_junction += nr_segments - 1
+    if highway_sources:
+        xs = np.concatenate([xs] + highway_xs)
+        ys = np.concatenate([ys] + highway_ys)
+        nr_highway_edges = sum(len(chain_sources) for chain_sources in highway_sources)
+        sources = np.concatenate([sources] + highway_sources)
+        targets = np.concatenate([targets] + highway_targets)
+        highway_types = np.concatenate((highway_types, np.full(nr_highway_edges, HIGHWAY_TYPE_MOTORWAY)))
+    return _make_synthetic_map(xs, ys, sources, targets, highway_types, rng, origin,
+                               one_way_fraction, max_detour, largest_component_only)
+
+
+TOPOLOGIES = {
+    'grid': generate_grid_map,
+    'geometric': generate_geometric_map,
+    'city': generate_city_map,
+}
+
+
+def generate_map(topology: str, nr_junctions: int, seed: int = 0, **params) -> SyntheticMap:
+    """Generates a map of the given topology (see `TOPOLOGIES`), with the generator's `params`."""
+    if topology not in TOPOLOGIES:
+        raise ValueError('Unknown topology `{}` (expected one of: {}).'.format(topology, ', '.join(TOPOLOGIES)))
+    return TOPOLOGIES[topology](nr_junctions, seed=seed, **params)
+
+
+def write_map_csv(synthetic_map: SyntheticMap, filename: str, chunk_size: int = 100000):
+    """Writes the map in the csv format of `load_map_from_csv()`, a chunk of junctions at a time."""
+    link_offsets = np.searchsorted(synthetic_map.link_sources, np.arange(synthetic_map.nr_junctions + 1))
+    with open(filename, 'wt') as f:
+        for chunk_start in range(0, synthetic_map.nr_junctions, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, synthetic_map.nr_junctions)
+            links_begin, links_end = link_offsets[chunk_start], link_offsets[chunk_end]
+            links = ['{}@{}@{}'.format(target, distance, highway_type) for target, distance, highway_type in zip(
+                synthetic_map.link_targets[links_begin:links_end].tolist(),
+                synthetic_map.link_distances[links_begin:links_end].tolist(),
+                synthetic_map.link_highway_types[links_begin:links_end].tolist())]
+            offsets = (link_offsets[chunk_start:chunk_end + 1] - links_begin).tolist()
+            lines = []
+            for position, (lat, lon) in enumerate(zip(synthetic_map.lats[chunk_start:chunk_end].tolist(),
+                                                      synthetic_map.lons[chunk_start:chunk_end].tolist())):
+                junction_links = links[offsets[position]:offsets[position + 1]]
+                lines.append(','.join([str(chunk_start + position), repr(lat), repr(lon)] + junction_links))
+            f.write('\n'.join(lines))
+            f.write('\n')
+
+
+def _main(argv=None) -> Optional[int]:
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m framework.ways.map_generator',
+                                     description='Generates a synthetic road map csv file.')
+    parser.add_argument('topology', choices=sorted(TOPOLOGIES))
+    parser.add_argument('nr_junctions', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    synthetic_map = generate_map(args.topology, args.nr_junctions, seed=args.seed)
+    write_map_csv(synthetic_map, args.output)
+    print('{}: {} junctions, {} links'.format(args.output, synthetic_map.nr_junctions, synthetic_map.nr_links))
+
+
+if __name__ == '__main__':
+    sys.exit(_main())
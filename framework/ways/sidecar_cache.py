@@ -0,0 +1,86 @@
+"""
+ Files that are derived from the csv file of a map, and are stored next to it (the map cache, the
+  landmark tables, the contraction hierarchy), so that they are computed once per map.
+ Such a file records the signature of the csv file it was derived from (see `source_signature()`),
+  and is stale once the csv file changes. It is written atomically (see `atomic_output()`).
+ The files of NumPy arrays are `.npz` archives of the fields of a `NamedTuple` of arrays, with the
+  signature as a JSON `header` entry (see `store_npz()` and `load_npz()`).
+"""
+
+import contextlib
+import json
+import os
+import numpy as np
+from typing import Callable, Iterator, NamedTuple, Optional, Type, TypeVar
+
+__all__ = ['source_signature', 'atomic_output', 'store_npz', 'load_npz', 'load_or_build']
+
+T = TypeVar('T')
+ArraysType = TypeVar('ArraysType')
+
+
+def source_signature(csv_filename: str, **params) -> dict:
+    """
+    Anything that, when changed, makes a file derived from the given csv file stale: the size and the
+     modification time of the csv file, and the given parameters (e.g. a format version).
+    """
+    stat = os.stat(csv_filename)
+    return dict(source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns, **params)
+
+
+@contextlib.contextmanager
+def atomic_output(filename: str, suffix: str = '') -> Iterator[str]:
+    """
+    Yields a temporary filename to write the given file to. When the block ends, the temporary file is
+     renamed to the given file (or removed, if the block raised), so that a concurrent reader never
+     sees a partially written file.
+    :param suffix: The extension of the temporary file (e.g. '.npz', which `np.savez()` would add otherwise).
+    """
+    tmp_filename = '{}.{}.tmp{}'.format(filename, os.getpid(), suffix)
+    try:
+        yield tmp_filename
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def store_npz(csv_filename: str, npz_filename: str, arrays: NamedTuple, **signature_params):
+    """Writes the arrays derived from the given csv file (with the given parameters) as an `.npz` archive."""
+    header = json.dumps(source_signature(csv_filename, **signature_params))
+    with atomic_output(npz_filename, '.npz') as tmp_filename:
+        np.savez(tmp_filename, header=np.array(header), **arrays._asdict())
+
+
+def load_npz(csv_filename: str, npz_filename: str, arrays_type: Type[ArraysType],
+             **signature_params) -> Optional[ArraysType]:
+    """
+    Loads the arrays derived from the given csv file (see `store_npz()`).
+    Returns `None` if there is no such file, or if it is stale (the csv file has changed, or the
+     arrays were stored with other parameters or other fields).
+    """
+    if not os.path.isfile(npz_filename) or not os.path.isfile(csv_filename):
+        return None
+    with np.load(npz_filename, allow_pickle=False) as npz_file:
+        if set(npz_file.files) != set(arrays_type._fields) | {'header'}:
+            return None
+        if json.loads(str(npz_file['header'])) != source_signature(csv_filename, **signature_params):
+            return None
+        return arrays_type(**{name: npz_file[name] for name in arrays_type._fields})
+
+
+def load_or_build(csv_filename: Optional[str], load: Callable[[str], Optional[T]], build: Callable[[], T],
+                  store: Callable[[str, T], None]) -> T:
+    """
+    Loads the file derived from the given csv file, or builds it (and stores it for the next time).
+    Without a csv file (e.g. a map that is not loaded as a whole from a csv file), it is only built.
+    """
+    result = None if csv_filename is None else load(csv_filename)
+    if result is None:
+        result = build()
+        if csv_filename is not None:
+            try:
+                store(csv_filename, result)
+            except OSError:
+                pass  # e.g. a read-only data directory. It is built again next time.
+    return result
@@ -0,0 +1,94 @@
+"""
+ A spatial index of the junctions of a map, for finding the junctions near a coordinate without
+  scanning all of them.
+ The junctions are indexed by a KD-tree (`scipy.spatial.cKDTree`) of their points on the unit sphere:
+  the straight-line (chord) distance between two points grows with their air distance, so the nearest
+  points by chord are the nearest by air distance, and a radius in meters is a chord radius.
+  The air distances of the results are then computed exactly as `tools.compute_distance()` does
+  (the dot product of the unit vectors is the cosine of the arc in its formula).
+ Bounding-box queries use the junctions sorted by latitude: a binary search for the latitude band,
+  and a vectorized filter of the longitudes in it.
+
+ Usage (the index is built once per map by `Roads.spatial_index()`):
+     >>> roads.spatial_index().nearest(32.0853, 34.7818, k=5)
+     [(junction_id, air_distance_in_meters), ...]
+"""
+
+from . import tools
+
+import math
+import numpy as np
+from typing import List, Tuple
+
+__all__ = ['SpatialIndex']
+
+# The radius (in meters) of the sphere of `tools.compute_distance()`.
+EARTH_RADIUS_METERS = 40000 / (2 * math.pi) * 1000
+
+
+def _unit_vectors(terms: tools.GeodesicTerms) -> np.ndarray:
+    """The points on the unit sphere (x, y, z), of shape (n, 3)."""
+    return np.column_stack((terms.sin_phis * np.cos(terms.lons_radians),
+                            terms.sin_phis * np.sin(terms.lons_radians),
+                            terms.cos_phis))
+
+
+def _chord_length(meters: float) -> float:
+    """The chord (on the unit sphere) of an arc of the given air distance."""
+    return 2 * math.sin(min(meters / EARTH_RADIUS_METERS, math.pi) / 2)
+
+
+class SpatialIndex:
+    """
+    Nearest-junction, radius and bounding-box queries over the junctions of a map.
+    The results are junction ids (and their air distances from the query point, in meters, as
+     `tools.compute_distance()` computes them), sorted by the air distance.
+    """
+
+    def __init__(self, junction_ids: np.ndarray, terms: tools.GeodesicTerms):
+        from scipy.spatial import cKDTree
+
+        self.junction_ids = np.asarray(junction_ids)
+        self.terms = terms
+        self._tree = cKDTree(_unit_vectors(terms))
+        self._lat_order = np.argsort(terms.lats, kind='stable')
+        self._sorted_lats = terms.lats[self._lat_order]
+
+    def __len__(self) -> int:
+        return len(self.junction_ids)
+
+    def _with_air_distances(self, lat: float, lon: float, positions: np.ndarray) -> List[Tuple[int, float]]:
+        distances = tools.compute_distances(tools.GeodesicTerms.of([lat], [lon]), self.terms.take(positions))
+        order = np.argsort(distances, kind='stable')
+        return list(zip(self.junction_ids[positions[order]].tolist(), distances[order].tolist()))
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[int, float]]:
+        """The k junctions nearest to the given coordinate (fewer if the map is smaller)."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        _, positions = self._tree.query(_unit_vectors(tools.GeodesicTerms.of([lat], [lon]))[0], k=k)
+        return self._with_air_distances(lat, lon, np.atleast_1d(positions).astype(np.int64))
+
+    def within_radius(self, lat: float, lon: float, meters: float) -> List[Tuple[int, float]]:
+        """The junctions whose air distance from the given coordinate is at most the given radius."""
+        # The chord radius is slightly enlarged against rounding errors; the exact distances are filtered below.
+        chord = _chord_length(meters) * (1 + 1e-9) + 1e-12
+        positions = self._tree.query_ball_point(_unit_vectors(tools.GeodesicTerms.of([lat], [lon]))[0], chord)
+        results = self._with_air_distances(lat, lon, np.asarray(positions, dtype=np.int64))
+        return [(junction_id, distance) for junction_id, distance in results if distance <= meters]
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """
+        The junctions in the given bounding box (inclusive), sorted by their ids.
+        A box with `min_lon > max_lon` crosses the antimeridian (180 degrees).
+        """
+        begin = np.searchsorted(self._sorted_lats, min_lat, side='left')
+        end = np.searchsorted(self._sorted_lats, max_lat, side='right')
+        positions = self._lat_order[begin:end]
+        lons = self.terms.lons[positions]
+        if min_lon <= max_lon:
+            positions = positions[(lons >= min_lon) & (lons <= max_lon)]
+        else:
+            positions = positions[(lons >= min_lon) | (lons <= max_lon)]
+        return np.sort(self.junction_ids[positions]).tolist()
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from time import clock
+from time import perf_counter
 import zlib
+import math
 from math import acos, radians, pi
-from numpy import ones, cos, array, sin
+import numpy as np
+from numpy import ones, cos, array
 from typing import Tuple, NamedTuple
 
 'General tools'
@@ -55,12 +57,104 @@ def compute_distance(pnt1: Tuple[float, float], pnt2: Tuple[float, float]) -> fl
     phi1 = radians(90 - lat1)
     phi2 = radians(90 - lat2)
 
+    # Notice: `math` functions are much faster than NumPy functions on scalars.
     meter_units_factor = 40000 / (2 * pi)
-    arc = acos(sin(phi1) * sin(phi2) * cos(radians(lon1) - radians(lon2))
-               + cos(phi1) * cos(phi2))
+    arc = acos(math.sin(phi1) * math.sin(phi2) * math.cos(radians(lon1) - radians(lon2))
+               + math.cos(phi1) * math.cos(phi2))
     return max(0.0, arc * meter_units_factor * 1000)
 
 
+class GeodesicTerms(NamedTuple):
+    """
+    The per-point terms used by `compute_distance()`, for an array of points.
+    These depend on a single point, so they can be computed once per point
+     (rather than once per pair of points) and reused by `compute_distances()`.
+    """
+    lats: np.ndarray
+    lons: np.ndarray
+    sin_phis: np.ndarray  # sin(radians(90 - lat))
+    cos_phis: np.ndarray  # cos(radians(90 - lat))
+    lons_radians: np.ndarray
+
+    @staticmethod
+    def of(lats, lons) -> 'GeodesicTerms':
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        phis = np.radians(90 - lats)
+        return GeodesicTerms(lats, lons, np.sin(phis), np.cos(phis), np.radians(lons))
+
+    def take(self, indices) -> 'GeodesicTerms':
+        """The terms of a subset of the points (any NumPy index, e.g. an array of positions)."""
+        return GeodesicTerms(*(arr[indices] for arr in self))
+
+    def reshape(self, *shape) -> 'GeodesicTerms':
+        return GeodesicTerms(*(arr.reshape(*shape) for arr in self))
+
+    def point(self, index: int) -> Tuple[float, float, float, float, float]:
+        """The terms of a single point, as Python floats (see `compute_distance_from_terms()`)."""
+        return (self.lats.item(index), self.lons.item(index), self.sin_phis.item(index),
+                self.cos_phis.item(index), self.lons_radians.item(index))
+
+
+def compute_distance_from_terms(terms1: Tuple[float, float, float, float, float],
+                                terms2: Tuple[float, float, float, float, float]) -> float:
+    """
+    Same as `compute_distance()` (in Meters), for two points given by their terms
+     (as returned by `GeodesicTerms.point()`). Saves the per-point trigonometry.
+    """
+    lat1, lon1, sin_phi1, cos_phi1, lon_radians1 = terms1
+    lat2, lon2, sin_phi2, cos_phi2, lon_radians2 = terms2
+    if (lat1, lon1) == (lat2, lon2):
+        return 0.0
+    if max(abs(lat1 - lat2), abs(lon1 - lon2)) < 0.00001:
+        return 0.001
+    arc = acos(sin_phi1 * sin_phi2 * math.cos(lon_radians1 - lon_radians2) + cos_phi1 * cos_phi2)
+    return max(0.0, arc * (40000 / (2 * pi)) * 1000)
+
+
+def compute_distances(terms1: GeodesicTerms, terms2: GeodesicTerms) -> np.ndarray:
+    """
+    Vectorized `compute_distance()` (in Meters), over the points given by their terms.
+    The terms are broadcast against each other (NumPy rules), hence:
+    one-to-many: `compute_distances(terms.take([i]), terms.take(js))`
+    many-to-many: `compute_distances(terms.take(is_).reshape(-1, 1), terms.take(js))`
+    The results are the same as of `compute_distance()` (including its special
+     cases for identical / very close points), up to the last bit of `acos`.
+    """
+    cos_arc = terms1.sin_phis * terms2.sin_phis * np.cos(terms1.lons_radians - terms2.lons_radians) \
+        + terms1.cos_phis * terms2.cos_phis
+    distances = np.maximum(np.arccos(np.clip(cos_arc, -1.0, 1.0)) * (40000 / (2 * pi)) * 1000, 0.0)
+    # `np.where()` rather than masked assignments, which fail on 0-d results (of two single points).
+    very_close = np.maximum(np.abs(terms1.lats - terms2.lats), np.abs(terms1.lons - terms2.lons)) < 0.00001
+    identical = (terms1.lats == terms2.lats) & (terms1.lons == terms2.lons)
+    return np.where(identical, 0.0, np.where(very_close, 0.001, distances))
+
+
+def prim_mst(distances_matrix: np.ndarray) -> Tuple[float, float]:
+    """
+    The total weight and the longest edge of the minimum spanning tree of the complete graph with
+     the given (symmetric) weights.
+    Prim's algorithm, where each step updates the distances of all the vertices to the tree at once.
+    """
+    nr_vertices = len(distances_matrix)
+    if nr_vertices <= 1:
+        return 0., 0.
+    distances_to_tree = distances_matrix[0].copy()
+    distances_to_tree[0] = np.inf
+    in_tree = np.zeros(nr_vertices, dtype=bool)
+    in_tree[0] = True
+    total_weight = longest_edge = 0.
+    for _ in range(nr_vertices - 1):
+        vertex = int(np.argmin(distances_to_tree))
+        edge_weight = distances_to_tree.item(vertex)
+        total_weight += edge_weight
+        longest_edge = max(longest_edge, edge_weight)
+        in_tree[vertex] = True
+        np.minimum(distances_to_tree, distances_matrix[vertex], out=distances_to_tree)
+        distances_to_tree[in_tree] = np.inf
+    return total_weight, longest_edge
+
+
 def base_traffic_pattern():
     ''' Creates a base traffic pattern:
             we can go at max speed (divide by 1)
@@ -84,6 +178,52 @@ def generate_traffic_noise_params(seed1, seed2) -> Tuple[float, float]:
     return wavelength_cos, wavelength_sin
 
 
+def dhash_array(values) -> np.ndarray:
+    """
+    Vectorized `dhash(value)` of a single integer each, for an array of 64-bit integers.
+    The Adler-32 checksum of `str((value,))` is computed from the decimal digits of the values:
+     for the bytes d_1..d_n of the string, a = 1 + sum(d_i) and b = n + sum((n - i + 1) * d_i) (mod 65521).
+    The hashes are identical to `dhash()`.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    magnitudes = np.abs(values)
+    nr_digits = np.ones(values.shape, dtype=np.int64)
+    for power in range(1, 19):
+        nr_digits += magnitudes >= 10 ** power
+    # The string is '(' [ '-' ] digits ',)': its length, and the contributions of the fixed characters.
+    is_negative = (values < 0).astype(np.int64)
+    length = nr_digits + is_negative + 3
+    a = 1 + ord('(') + ord('-') * is_negative + ord(',') + ord(')')
+    b = length + length * ord('(') + (length - 1) * ord('-') * is_negative + 2 * ord(',') + ord(')')
+    digits_sum = np.zeros(values.shape, dtype=np.int64)
+    weighted_digits_sum = np.zeros(values.shape, dtype=np.int64)
+    remaining = magnitudes.copy()
+    for digit_from_right in range(int(nr_digits.max(initial=1))):
+        # The digit is followed by `digit_from_right` digits and ',)', so its weight is 3 + digit_from_right.
+        digit_bytes = np.where(digit_from_right < nr_digits, remaining % 10 + ord('0'), 0)
+        digits_sum += digit_bytes
+        weighted_digits_sum += (3 + digit_from_right) * digit_bytes
+        remaining //= 10
+    a = (a + digits_sum) % 65521
+    b = (b + weighted_digits_sum) % 65521
+    checksums = b * 65536 + a
+    # `abs(checksum * 100) * SEED % 0xffffffff`, without overflowing 64 bits: both factors are below 2 ** 32,
+    #  so the seed is multiplied by its 16-bit halves (each product is below 2 ** 48).
+    factor = checksums * 100 % 0xffffffff
+    seed = SEED % 0xffffffff
+    high_product = factor * (seed >> 16) % 0xffffffff
+    return (high_product * 65536 + factor * (seed & 0xffff)) % 0xffffffff
+
+
+def generate_traffic_noise_params_array(seeds1, seeds2) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized `generate_traffic_noise_params()`, for arrays of seeds. The parameters are identical."""
+    seeds1 = np.asarray(seeds1, dtype=np.int64)
+    seeds2 = np.asarray(seeds2, dtype=np.int64)
+    wavelengths_cos = 60 + 20 * (dhash_array(seeds1 + seeds2) / 0xffffffff) - 10
+    wavelengths_sin = 60 + 20 * (dhash_array(seeds1 * seeds2) / 0xffffffff) - 10
+    return wavelengths_cos, wavelengths_sin
+
+
 def timed(f):
     '''decorator for printing the timing of functions
     usage: 
@@ -91,9 +231,9 @@ def timed(f):
     def some_funcion(args...):'''
 
     def wrap(*x, **d):
-        start = clock()
+        start = perf_counter()
         res = f(*x, **d)
-        print("{}: {:.2f}sec".format(f.__name__, clock() - start))
+        print("{}: {:.2f}sec".format(f.__name__, perf_counter() - start))
         return res
 
     return wrap
@@ -102,3 +242,19 @@ def timed(f):
 if __name__ == '__main__':
     for i in range(100):
         print(dhash(i))
+
+    # The vectorized hashes are the same as `dhash()`, also with seeds of up to 32 bits.
+    values = list(range(-1000, 1000)) + [2 ** 63 - 1, -2 ** 63 + 1] + \
+        np.random.RandomState(0).randint(-2 ** 62, 2 ** 62, 10000, dtype=np.int64).tolist()
+    for SEED in (0x23587643, 0x7fffffff, 0xfffffff0, 0xfffffffe, 0xffffffff, 0x1ffffffff):
+        assert dhash_array(values).tolist() == [dhash(value) for value in values], hex(SEED)
+
+    # The vectorized distances are the same as `compute_distance()`, also of two single points (0-d terms).
+    points = [(32.0853, 34.7818), (32.0853, 34.7818), (32.0853, 34.781805), (31.7683, 35.2137)]
+    for point1 in points:
+        for point2 in points:
+            distance = compute_distances(GeodesicTerms.of(*point1), GeodesicTerms.of(*point2))
+            assert distance.shape == () and math.isclose(distance, compute_distance(point1, point2)), (point1, point2)
+    terms = GeodesicTerms.of(*zip(*points))
+    assert np.allclose(compute_distances(terms.reshape(-1, 1), terms),
+                       [[compute_distance(point1, point2) for point2 in points] for point1 in points])
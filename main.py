@@ -69,10 +69,10 @@ def run_astar_for_weights_in_range(heuristic_type: HeuristicFunctionType, proble
     weights=np.linspace(0.5,1,20)
     costs = list()
     expanded_states= list()
-    for weight in weights:
-        print('********runing for weight: ', weight, '*******')
-        astar = AStar(heuristic_type, weight)
-        res = astar.solve_problem(problem)
+    # The runs are independent, so they are solved in parallel (the results come in the order of the weights).
+    jobs = [(AStar(heuristic_type, weight), problem) for weight in weights]
+    for weight_idx, res in solve_many(jobs, ordered=True):
+        print('********solved for weight: ', weights[weight_idx], '*******')
         costs.append(res.final_search_node.cost)
         expanded_states.append(res.nr_expanded_states)
     plot_distance_and_expanded_wrt_weight_figure(weights, costs, expanded_states)
@@ -167,9 +167,10 @@ def relaxed_deliveries_problem():
     irange = range(1,101)
     anytimeReslist= list()
     anytimeRes = float()
-    for i in irange:
-        gs = GreedyStochastic(MSTAirDistHeuristic)
-        res = gs.solve_problem(big_deliveries_prob).final_search_node.cost
+    gs_jobs = [(GreedyStochastic(MSTAirDistHeuristic), big_deliveries_prob) for _ in irange]
+    gs_results = solve_many(gs_jobs, ordered=True)
+    for i, (_, gs_res) in zip(irange, gs_results):
+        res = gs_res.final_search_node.cost
         if i == 1 :
             anytimeRes = res
         else:
@@ -204,8 +205,10 @@ def strict_deliveries_problem():
     print('Solve the strict deliveries problem.')
 
     small_delivery = DeliveriesProblemInput.load_from_file('small_delivery.in', roads)
+    # The road distances are computed once, before the sweeps fan the problem out to the worker processes
+    #  (each of which would otherwise solve all the inner map problems again, with its own empty cache).
     small_deliveries_strict_problem = StrictDeliveriesProblem(
-        small_delivery, roads, inner_problem_solver=AStar(AirDistHeuristic))
+        small_delivery, roads, inner_problem_solver=AStar(AirDistHeuristic), precompute_distances=True)
 
     # Ex.26
     #  Call here the function `run_astar_for_weights_in_range()`